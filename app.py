@@ -4,6 +4,9 @@ from datetime import datetime
 import utils
 import data_manager
 import ui_components
+from portfolio_core import income_forecast
+from portfolio_core import drip_simulator
+from portfolio_core import instrumentation
 import streamlit.components.v1 as components
 
 # 페이지 설정
@@ -13,6 +16,9 @@ st.set_page_config(
     layout="wide"
 )
 
+# 실행(rerun) 시간 측정 시작 (?diagnostics=1 이면 하단에 진단 패널 표시)
+run_id = instrumentation.start_run(st.query_params.get('portfolio'))
+
 # PWA 지원 추가
 pwa_html = """
 <link rel="manifest" href="/app/static/manifest.json">
@@ -37,20 +43,30 @@ components.html(pwa_html, height=0)
 # CSS 주입
 ui_components.inject_custom_css()
 
+# 사용자/포트폴리오 선택 (URL 의 ?user=...&portfolio=... 로 지정 가능)
+user_id = st.query_params.get('user', utils.DEFAULT_USER)
+portfolio_options = sorted(set(utils.list_portfolios(user_id)) | {st.query_params.get('portfolio', utils.DEFAULT_PORTFOLIO)})
+portfolio_id = st.sidebar.selectbox(
+    "포트폴리오",
+    portfolio_options,
+    index=portfolio_options.index(st.query_params.get('portfolio', utils.DEFAULT_PORTFOLIO)),
+    accept_new_options=True,
+    key="portfolio_id"
+) or utils.DEFAULT_PORTFOLIO
+
 # 타이틀과 업데이트 정보
 col_title, col_update = st.columns([3, 1])
 with col_title:
     st.title("💰 배당금 캘린더 & 포트폴리오 매니저")
 with col_update:
-    last_update = utils.get_last_update()
+    last_update = utils.get_last_update(user_id, portfolio_id)
     st.markdown(f"<div style='text-align: right; padding-top: 20px; color: #888;'><small>📅 최근 업데이트: {last_update}</small></div>", unsafe_allow_html=True)
 
 # 사이드바: 종목 추가
 st.sidebar.header("포트폴리오 관리")
 
-# 세션 상태 초기화
-if 'portfolio' not in st.session_state:
-    st.session_state.portfolio = utils.load_portfolio()
+# 저장소에서 매 실행마다 읽음 (다른 세션의 수정도 반영)
+st.session_state.portfolio = utils.load_portfolio(user_id, portfolio_id)
 
 # 종목 추가 입력 폼
 with st.sidebar.form("add_stock_form"):
@@ -60,134 +76,135 @@ with st.sidebar.form("add_stock_form"):
     submitted = st.form_submit_button("종목 추가")
 
     if submitted and ticker:
-        # 간단한 중복 체크 (선택 사항)
-        new_row = pd.DataFrame({'Ticker': [ticker], 'Quantity': [quantity], 'TargetRatio': [target_ratio]})
-        st.session_state.portfolio = pd.concat([st.session_state.portfolio, new_row], ignore_index=True)
-        utils.save_portfolio(st.session_state.portfolio)
+        # 이미 있는 종목이면 수량을 더함 (목표 비중은 입력한 경우에만 변경)
+        existing = st.session_state.portfolio[st.session_state.portfolio['Ticker'] == ticker]
+        if not existing.empty:
+            quantity_total = float(existing['Quantity'].iloc[0]) + quantity
+            target_ratio = target_ratio or float(existing['TargetRatio'].iloc[0])
+        else:
+            quantity_total = quantity
+        utils.upsert_holding(ticker, quantity_total, target_ratio, user_id, portfolio_id)
+        st.session_state.portfolio = utils.load_portfolio(user_id, portfolio_id)
         st.success(f"{ticker} {quantity}주 추가됨!")
 
+# 거래 기록 (매수/매도/배당/분할 → 보유 수량과 취득원가 자동 반영)
+TRANSACTION_LABELS = {'BUY': '매수', 'SELL': '매도', 'DIVIDEND': '배당 수령', 'SPLIT': '주식 분할'}
+with st.sidebar.expander("🧾 거래 기록"):
+    with st.form("transaction_form", clear_on_submit=True):
+        txn_kind = st.selectbox("거래 종류", utils.TRANSACTION_KINDS, format_func=TRANSACTION_LABELS.get)
+        txn_ticker = st.text_input("종목 티커").upper()
+        txn_date = st.date_input("거래일")
+        txn_quantity = st.number_input("수량 (분할은 비율, 예: 2:1 분할 → 2)", min_value=0.0, value=0.0, step=0.001, format="%.3f")
+        txn_price = st.number_input("단가 (현지 통화)", min_value=0.0, value=0.0, step=0.01)
+        txn_amount = st.number_input("배당 수령액 (현지 통화)", min_value=0.0, value=0.0, step=0.01)
+        txn_fee = st.number_input("수수료 (현지 통화)", min_value=0.0, value=0.0, step=0.01)
+        if st.form_submit_button("거래 기록") and txn_ticker:
+            try:
+                utils.record_transaction(txn_ticker, txn_kind, txn_quantity, txn_price, txn_amount, txn_fee,
+                                         txn_date, user_id, portfolio_id)
+                st.session_state.portfolio = utils.load_portfolio(user_id, portfolio_id)
+                st.success(f"{txn_ticker} {TRANSACTION_LABELS[txn_kind]} 기록됨!")
+            except ValueError as e:
+                st.error(f"거래를 기록하지 못했습니다: {e}")
+
 # 포트폴리오가 비어있지 않으면 사이드바 목록 표시
 if not st.session_state.portfolio.empty:
     st.sidebar.markdown("---")
     st.sidebar.subheader("보유 종목")
     
-    # 리스트 표시 및 수정
-    for i, row in st.session_state.portfolio.iterrows():
-        ticker = row['Ticker']
-        quantity = float(row['Quantity'])
-        target_ratio = float(row.get('TargetRatio', 0.0))
-        
-        st.sidebar.markdown(f"**{ticker}**")
-        c1, c2, c3 = st.sidebar.columns([2, 2, 1])
-        
-        # 수량 수정
-        val = c2.number_input("수량", min_value=0.001, value=quantity, step=0.001, format="%.3f", key=f"qty_{i}_{ticker}", label_visibility="collapsed")
-        
-        # 목표 비중 수정
-        target_val = st.sidebar.number_input(f"목표 비중 (%)", min_value=0.0, max_value=100.0, value=target_ratio, step=1.0, key=f"target_{i}_{ticker}")
-
-        if val != row['Quantity'] or target_val != target_ratio:
-            st.session_state.portfolio.at[i, 'Quantity'] = val
-            st.session_state.portfolio.at[i, 'TargetRatio'] = target_val
-            utils.save_portfolio(st.session_state.portfolio)
-            st.rerun()
-            
-        if c3.button("🗑️", key=f"del_{i}_{ticker}", help="삭제"):
-            st.session_state.portfolio = st.session_state.portfolio.drop(i).reset_index(drop=True)
-            utils.save_portfolio(st.session_state.portfolio)
-            st.rerun()
-        
-        st.sidebar.markdown("---")
+    # 여러 종목을 고친 뒤 한 번에 저장 (편집 중에는 다시 실행되지 않음)
+    with st.sidebar.form("holdings_form"):
+        edited = st.data_editor(
+            st.session_state.portfolio,
+            column_config={
+                'Ticker': st.column_config.TextColumn("종목", required=True),
+                'Quantity': st.column_config.NumberColumn("수량", min_value=0.001, step=0.001, format="%.3f", required=True),
+                'TargetRatio': st.column_config.NumberColumn("목표 비중 (%)", min_value=0.0, max_value=100.0, step=1.0, format="%.1f"),
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            use_container_width=True,
+            key=f"holdings_editor_{portfolio_id}_{last_update}"
+        )
+        st.caption("행을 선택해 삭제하거나 마지막 행에 새 종목을 추가할 수 있습니다.")
+        if st.form_submit_button("변경 사항 저장"):
+            upserts, deletes = utils.diff_holdings(st.session_state.portfolio, edited)
+            if upserts or deletes:
+                utils.apply_holding_changes(upserts, deletes, user_id, portfolio_id)
+                st.rerun()
+            else:
+                st.info("변경 사항이 없습니다.")
 
     # 초기화 버튼
     if st.sidebar.button("포트폴리오 초기화"):
-        st.session_state.portfolio = pd.DataFrame(columns=['Ticker', 'Quantity', 'TargetRatio'])
-        utils.save_portfolio(st.session_state.portfolio)
+        utils.save_portfolio(pd.DataFrame(columns=['Ticker', 'Quantity', 'TargetRatio']), user_id, portfolio_id)
         st.rerun()
 
     # 메인 화면: 데이터 로딩 및 표시
+    # 시세/환율/배당은 백그라운드에서 미리 갱신하고, 화면은 갱신된 캐시만 읽음
+    data_manager.start_background_refresh(st.session_state.portfolio['Ticker'].unique().tolist(),
+                                          owner=(user_id, portfolio_id))
     with st.spinner('주가 및 배당 정보를 분석 중입니다...'):
         # Batch Data Fetching
-        df_result, total_value, total_div, monthly_div_list = data_manager.fetch_stock_data_batch(st.session_state.portfolio)
+        df_result, total_value, total_div, monthly_divs, fx_snapshot = data_manager.fetch_stock_data_batch(
+            st.session_state.portfolio, cost_basis=utils.get_ledger_positions(user_id, portfolio_id))
         
         if not df_result.empty:
+            data_as_of = data_manager.get_data_as_of(df_result['Ticker'].tolist())
+            if data_as_of is not None:
+                st.caption(f"📡 시세 기준: {data_as_of:%Y-%m-%d %H:%M:%S} (자동 갱신)")
             dividend_yield_total = (total_div / total_value * 100) if total_value > 0 else 0
             
-            # 이번 달 배당금 계산
+            # 이번 달 배당금 (월별 합계와 지급완료/지급예정 구분은 미리 계산되어 있음)
             current_month = datetime.now().month
-            current_month_divs = [d for d in monthly_div_list if d['Month'] == current_month]
-            
-            now = datetime.now()
-            paid_total = sum(d['Dividend'] for d in current_month_divs if d['Date'] < now)
-            expected_total = sum(d['Dividend'] for d in current_month_divs if d['Date'] >= now)
+            paid_total, expected_total = monthly_divs.paid_expected(current_month)
             current_month_total = paid_total + expected_total
             
-            current_month_divs.sort(key=lambda x: x['Date'])
-            
             # 배당금 HTML 생성
-            if current_month_divs:
-                pay_dates_html = ""
-                for d in current_month_divs:
-                    date_str = d['Date'].strftime('%m/%d')
-                    t_symbol = d['Ticker']
-                    amount = d['Dividend']
-                    
-                    if d['Date'] < now:
-                        style = "color: #aaa;"
-                        icon = "✅"
-                    else:
-                        style = "color: #fff; font-weight: bold;"
-                        icon = "📅"
-                        
-                    pay_dates_html += f"<div style='font-size: 0.8em; {style}; display: flex; justify-content: space-between;'><span>{icon} {date_str} {t_symbol}</span> <span>₩{amount:,.0f}</span></div>"
-                
-                summary_html = f"""
-                <div style='font-size: 0.8em; margin-top: 5px; padding-top: 5px; border-top: 1px dashed rgba(255,255,255,0.2); display: flex; justify-content: space-between; color: #ddd;'>
-                    <span>✅ 지급완료:</span> <span>₩{paid_total:,.0f}</span>
-                </div>
-                <div style='font-size: 0.8em; display: flex; justify-content: space-between; color: #fff; font-weight: bold;'>
-                    <span>📅 지급예정:</span> <span>₩{expected_total:,.0f}</span>
-                </div>
-                """
-                pay_dates_html += summary_html
-            else:
-                pay_dates_html = "<div style='font-size: 0.8em; color: #888;'>배당 없음</div>"
+            pay_dates_html = ui_components.build_pay_dates_html(monthly_divs.for_month(current_month), paid_total, expected_total)
             
             # 대시보드 레이아웃
             col1, col2, col3 = st.columns(3)
             
             with col1:
                 ui_components.render_portfolio_card(total_value, total_div, current_month_total, pay_dates_html, dividend_yield_total)
-                with st.expander("📊 상세 보기", expanded=False):
-                    st.metric("총 자산", f"₩{total_value:,.0f}")
-                    st.metric("연 배당금", f"₩{total_div:,.0f}")
-                    st.markdown("#### 📊 포트폴리오 비중")
-                    ui_components.render_portfolio_pie_chart(df_result)
+                with st.expander("📊 상세 보기", expanded=False, key="portfolio_details", on_change="rerun") as portfolio_details:
+                    # 펼쳤을 때만 차트를 그림 (plotly 는 이때 처음 불러옴)
+                    if portfolio_details.open:
+                        st.metric("총 자산", f"₩{total_value:,.0f}")
+                        st.metric("연 배당금", f"₩{total_div:,.0f}")
+                        st.markdown("#### 📊 포트폴리오 비중")
+                        ui_components.render_portfolio_pie_chart(df_result)
                     
-                    st.markdown("#### 📅 월별 예상 배당금")
-                    ui_components.render_monthly_dividend_chart(monthly_div_list)
+                        st.markdown("#### 📅 월별 예상 배당금")
+                        ui_components.render_monthly_dividend_chart(monthly_divs)
                     
-                    st.markdown("#### 📋 보유 현황")
-                    display_df = df_result[['Ticker', 'Quantity', 'Current Price', 'Market Value (KRW)', 'Annual Dividend (KRW)', 'Dividend Yield (%)']].copy()
-                    display_df.columns = ['종목', '수량', '현재가', '평가액', '연 배당금', '배당률']
-                    st.dataframe(display_df.style.format({
-                        '현재가': '{:,.2f}',
-                        '평가액': '₩{:,.0f}',
-                        '연 배당금': '₩{:,.0f}',
-                        '배당률': '{:.2f}%'
-                    }), use_container_width=True)
+                        st.markdown("#### 📋 보유 현황")
+                        display_df = df_result[['Ticker', 'Quantity', 'Current Price', 'Market Value (KRW)', 'Annual Dividend (KRW)', 'Dividend Yield (%)',
+                                                'Avg Cost', 'Unrealized Gain (KRW)', 'Yield on Cost (%)']].copy()
+                        display_df.columns = ['종목', '수량', '현재가', '평가액', '연 배당금', '배당률', '평균 단가', '평가 손익', '투자금 대비 배당률']
+                        st.dataframe(display_df.style.format({
+                            '현재가': '{:,.2f}',
+                            '평가액': '₩{:,.0f}',
+                            '연 배당금': '₩{:,.0f}',
+                            '배당률': '{:.2f}%',
+                            '평균 단가': '{:,.2f}',
+                            '평가 손익': '₩{:+,.0f}',
+                            '투자금 대비 배당률': '{:.2f}%'
+                        }, na_rep='-'), use_container_width=True)
 
             with col2:
                 exchange_data = data_manager.get_exchange_rate_analysis()
                 ui_components.render_exchange_card(exchange_data)
                 if exchange_data:
-                    with st.expander("💵 상세 보기", expanded=False):
-                        st.metric("현재 환율", f"₩{exchange_data['current_price']:,.0f}", f"{exchange_data['change']:+.2f}")
-                        st.metric("RSI (14일)", f"{exchange_data['rsi']:.1f}")
-                        st.markdown(f"상태: :{exchange_data['rsi_color']}[**{exchange_data['rsi_status']}**]")
+                    with st.expander("💵 상세 보기", expanded=False, key="exchange_details", on_change="rerun") as exchange_details:
+                        if exchange_details.open:
+                            st.metric("현재 환율", f"₩{exchange_data['current_price']:,.0f}", f"{exchange_data['change']:+.2f}")
+                            st.metric("RSI (14일)", f"{exchange_data['rsi']:.1f}")
+                            st.markdown(f"상태: :{exchange_data['rsi_color']}[**{exchange_data['rsi_status']}**]")
                         
-                        chart_style = st.radio("차트 스타일", ["📈 라인", "🌊 영역", "🕯️ 캔들", "📊 OHLC"], horizontal=True, key="chart_style_exchange")
-                        ui_components.render_exchange_chart(exchange_data, chart_style)
+                            chart_style = st.radio("차트 스타일", ["📈 라인", "🌊 영역", "🕯️ 캔들", "📊 OHLC"], horizontal=True, key="chart_style_exchange")
+                            ui_components.render_exchange_chart(exchange_data, chart_style)
 
             with col3:
                 # 리밸런싱 섹션
@@ -198,37 +215,33 @@ if not st.session_state.portfolio.empty:
                     if st.button("적용하기"):
                         if opt_strategy == "균등 투자":
                             weight = 100 / len(df_result)
-                            st.session_state.portfolio['TargetRatio'] = weight
+                            utils.update_target_ratios(dict.fromkeys(st.session_state.portfolio['Ticker'], weight), user_id, portfolio_id)
                         elif opt_strategy == "배당 극대화":
                             total_yield = df_result['Dividend Yield (%)'].sum()
                             if total_yield > 0:
-                                for _, row in df_result.iterrows():
-                                    idx = st.session_state.portfolio[st.session_state.portfolio['Ticker'] == row['Ticker']].index
-                                    if not idx.empty:
-                                        weight = (row['Dividend Yield (%)'] / total_yield) * 100
-                                        st.session_state.portfolio.at[idx[0], 'TargetRatio'] = weight
-                        utils.save_portfolio(st.session_state.portfolio)
+                                weights = df_result['Dividend Yield (%)'] / total_yield * 100
+                                utils.update_target_ratios(dict(zip(df_result['Ticker'], weights)), user_id, portfolio_id)
                         st.rerun()
 
                 if total_target_ratio == 0:
                     st.warning("목표 비중을 설정해주세요.")
                 else:
-                    rebal_data, proj_div = utils.calculate_rebalancing(df_result, total_value)
+                    df_rebal, proj_div = utils.calculate_rebalancing(df_result, total_value, rates=fx_snapshot)
                     
                     st.markdown("#### 📊 리밸런싱 제안")
-                    df_rebal = pd.DataFrame(rebal_data)
-                    st.dataframe(df_rebal[['종목', '목표 비중', '조정 필요 금액', '추천 동작']].style.format({
-                        '조정 필요 금액': '{:+,.0f}'
-                    }).applymap(lambda x: 'color: red' if '매도' in str(x) else 'color: green' if '매수' in str(x) else 'color: black', subset=['추천 동작']), 
+                    st.dataframe(df_rebal[['종목', '목표 비중', '조정 필요 금액', '추천 동작', '예상 실현 손익']].style.format({
+                        '목표 비중': '{:.1f}%',
+                        '조정 필요 금액': '{:+,.0f}',
+                        '예상 실현 손익': '₩{:+,.0f}'
+                    }, na_rep='-').map(lambda x: 'color: red' if '매도' in str(x) else 'color: green' if '매수' in str(x) else 'color: black', subset=['추천 동작']), 
                     use_container_width=True)
                     
                     st.markdown("---")
                     st.subheader("💰 추가 매수 전략 (매도 X)")
-                    buy_only_data, total_add = utils.calculate_buy_only_rebalancing(df_result, total_value)
+                    df_buy, total_add = utils.calculate_buy_only_rebalancing(df_result, total_value, rates=fx_snapshot)
                     
-                    if buy_only_data:
+                    if not df_buy.empty:
                         st.metric("필요 추가 투자금", f"₩{total_add:,.0f}")
-                        df_buy = pd.DataFrame(buy_only_data)
                         st.dataframe(df_buy[['종목', '추가 매수 금액', '추가 매수 수량']].style.format({
                             '추가 매수 금액': '₩{:,.0f}',
                             '추가 매수 수량': '{:.2f}'
@@ -253,17 +266,12 @@ if not st.session_state.portfolio.empty:
                                 st.caption("일일 투자금액")
                             
                             st.markdown("#### 📋 종목별 일 적립 금액 상세")
-                            dca_breakdown = []
-                            for item in buy_only_data:
-                                amount = item['추가 매수 금액']
-                                dca_breakdown.append({
-                                    '종목': item['종목'],
-                                    '1개월 (일)': amount / 30,
-                                    '3개월 (일)': amount / 90,
-                                    '6개월 (일)': amount / 180
-                                })
-                            
-                            df_dca = pd.DataFrame(dca_breakdown)
+                            df_dca = pd.DataFrame({
+                                '종목': df_buy['종목'],
+                                '1개월 (일)': df_buy['추가 매수 금액'] / 30,
+                                '3개월 (일)': df_buy['추가 매수 금액'] / 90,
+                                '6개월 (일)': df_buy['추가 매수 금액'] / 180
+                            })
                             st.dataframe(df_dca.style.format({
                                 '1개월 (일)': '₩{:,.0f}',
                                 '3개월 (일)': '₩{:,.0f}',
@@ -271,7 +279,47 @@ if not st.session_state.portfolio.empty:
                             }), use_container_width=True)
                     else:
                         st.success("추가 매수가 필요 없습니다.")
-                    
+
+                    # 정수 주 매수 계획 (예산 내에서 목표 비중에 가장 가깝게)
+                    st.markdown("---")
+                    st.subheader("🧮 정수 주 매수 계획")
+                    col_plan1, col_plan2 = st.columns([2, 1])
+                    with col_plan1:
+                        plan_budget = st.number_input(
+                            "매수 예산 (₩)",
+                            min_value=0,
+                            value=1000000,
+                            step=100000,
+                            key="integer_plan_budget"
+                        )
+                    with col_plan2:
+                        lot_size = st.selectbox(
+                            "최소 매수 단위 (주)",
+                            [1, 0.1, 0.01, 0.001],
+                            key="integer_plan_lot_size"
+                        )
+
+                    if plan_budget > 0:
+                        df_plan, plan_spent, plan_left = utils.optimize_integer_allocation(
+                            df_result, plan_budget, total_value, lot_size=lot_size, rates=fx_snapshot)
+                        if not df_plan.empty:
+                            col_plan1, col_plan2 = st.columns(2)
+                            with col_plan1:
+                                st.metric("총 매수 금액", f"₩{plan_spent:,.0f}")
+                            with col_plan2:
+                                st.metric("남는 현금", f"₩{plan_left:,.0f}")
+                            st.dataframe(df_plan.style.format({
+                                '현재가': '{:,.2f}',
+                                '매수 수량': '{:,.3f}' if lot_size < 1 else '{:,.0f}',
+                                '매수 금액': '₩{:,.0f}',
+                                '현재 비중': '{:.1f}%',
+                                '매수 후 비중': '{:.1f}%',
+                                '목표 비중': '{:.1f}%',
+                                '예상 연 배당금': '₩{:,.0f}'
+                            }), use_container_width=True)
+                        else:
+                            st.info("예산으로 살 수 있는 종목이 없습니다.")
+
                     # 배당 극대화 3종목 투자 제안
                     st.markdown("---")
                     st.subheader("🎯 배당 극대화 3종목 투자")
@@ -299,9 +347,9 @@ if not st.session_state.portfolio.empty:
                     
                     if additional_investment > 0:
                         # 배당 극대화 3종목 계산
-                        top3_data, expected_annual, expected_monthly = utils.calculate_dividend_maximized_top3(df_result, additional_investment)
+                        df_top3, expected_annual, expected_monthly = utils.calculate_dividend_maximized_top3(df_result, additional_investment, rates=fx_snapshot)
                         
-                        if top3_data:
+                        if not df_top3.empty:
                             # 예상 배당금 표시
                             col_div1, col_div2 = st.columns(2)
                             with col_div1:
@@ -311,7 +359,6 @@ if not st.session_state.portfolio.empty:
                             
                             # 종목별 투자 제안 테이블
                             st.markdown("#### 💎 종목별 투자 제안")
-                            df_top3 = pd.DataFrame(top3_data)
                             
                             # 표시용 데이터프레임
                             display_top3 = df_top3[['종목', '배당률', '가중치', '투자 금액', '매수 수량', '예상 연 배당금']].copy()
@@ -327,7 +374,7 @@ if not st.session_state.portfolio.empty:
                             
                             # 상세 정보 (확장 가능)
                             with st.expander("📋 상세 투자 정보"):
-                                for item in top3_data:
+                                for _, item in df_top3.iterrows():
                                     st.markdown(f"**{item['종목']}**")
                                     st.markdown(f"- 배당률: {item['배당률']:.2f}%")
                                     st.markdown(f"- 현재가: {item['통화']} {item['현재가']:,.2f}")
@@ -345,25 +392,44 @@ if not st.session_state.portfolio.empty:
                     else:
                         st.info("투자 가능 금액을 입력하세요.")
                         
-            # 종목별 상세 정보
+            # 종목별 상세 정보 (요청한 종목만 지연 조회)
             st.markdown("---")
             st.subheader("🔍 종목별 상세 정보")
-            for _, row in df_result.iterrows():
+            tickers = df_result['Ticker'].tolist()
+            loaded_details = data_manager.get_ticker_details(tickers, fetch_missing=False).set_index('Ticker')
+            for i, row in df_result.iterrows():
                 with st.expander(f"📌 {row['Ticker']} | {row['Currency']} {row['Current Price']:,.2f}"):
-                    st.write(row['Summary'])
+                    if row['Ticker'] in loaded_details.index:
+                        detail = loaded_details.loc[row['Ticker']]
+                    elif st.button("상세 정보 불러오기", key=f"detail_{i}_{row['Ticker']}"):
+                        fetched_detail = data_manager.get_ticker_details([row['Ticker']])
+                        if fetched_detail.empty:
+                            st.warning("상세 정보를 가져오지 못했습니다.")
+                            continue
+                        detail = fetched_detail.iloc[0]
+                    else:
+                        continue
+                    st.write(data_manager.get_ticker_summary(detail['Summary']))
                     c1, c2 = st.columns(2)
-                    c1.metric("52주 최고", f"{row['52WeekHigh']:,.2f}")
-                    c1.metric("52주 최저", f"{row['52WeekLow']:,.2f}")
-                    c2.metric("Beta", f"{row['Beta']:.2f}")
-                    c2.metric("목표주가", f"{row['Target Price']:,.2f}")
+                    c1.metric("52주 최고", f"{detail['52WeekHigh']:,.2f}")
+                    c1.metric("52주 최저", f"{detail['52WeekLow']:,.2f}")
+                    c2.metric("Beta", f"{detail['Beta']:.2f}")
+                    c2.metric("목표주가", f"{detail['Target Price']:,.2f}")
 
             # 포트폴리오 분석 및 추천 섹션
             st.markdown("---")
             st.header("🎯 포트폴리오 분석 및 추천")
             
+            # 종목 지표(Beta, 전문가 의견, 52주 범위)는 상세 정보가 필요하므로 요청 시에만 조회
+            if st.toggle("종목 지표 분석 포함 (Beta · 전문가 의견 · 52주 범위)", key="load_all_details"):
+                detail_df = data_manager.get_ticker_details(tickers)
+            else:
+                detail_df = data_manager.get_ticker_details(tickers, fetch_missing=False)
+            analysis_df = df_result.merge(detail_df, on='Ticker', how='left')
+            
             # 분석 지표 계산
             avg_yield = df_result['Dividend Yield (%)'].mean()
-            avg_beta = df_result['Beta'].mean()
+            avg_beta = analysis_df['Beta'].mean()
             
             # 추천/경고 카운터
             recommendations = []
@@ -375,23 +441,23 @@ if not st.session_state.portfolio.empty:
                 warnings.append(f"⚠️ **저배당 종목**: {', '.join(low_yield_stocks['Ticker'].tolist())} (배당률 2% 미만)")
             
             # 2. 리스크 분석
-            high_beta_stocks = df_result[df_result['Beta'] > 1.5]
+            high_beta_stocks = analysis_df[analysis_df['Beta'] > 1.5]
             if not high_beta_stocks.empty:
                 warnings.append(f"⚠️ **고위험 종목**: {', '.join(high_beta_stocks['Ticker'].tolist())} (Beta 1.5 이상)")
             
             # 3. 전문가 추천분석
-            strong_buy = df_result[df_result['Recommendation'].str.contains('STRONG_BUY', na=False)]
+            strong_buy = analysis_df[analysis_df['Recommendation'].str.contains('STRONG_BUY', na=False)]
             if not strong_buy.empty:
                 recommendations.append(f"✅ **전문가 강력 매수 추천**: {', '.join(strong_buy['Ticker'].tolist())}")
             
-            sell_stocks = df_result[df_result['Recommendation'].str.contains('SELL', na=False)]
+            sell_stocks = analysis_df[analysis_df['Recommendation'].str.contains('SELL', na=False)]
             if not sell_stocks.empty:
                 warnings.append(f"🚨 **전문가 매도 추천**: {', '.join(sell_stocks['Ticker'].tolist())}")
             
             # 4. 52주 가격 위치 분석
             near_high = []
             near_low = []
-            for _, row in df_result.iterrows():
+            for _, row in analysis_df.iterrows():
                 if row['52WeekHigh'] > 0 and row['52WeekLow'] > 0:
                     range_pct = (row['Current Price'] - row['52WeekLow']) / (row['52WeekHigh'] - row['52WeekLow']) * 100
                     if range_pct > 90:
@@ -404,8 +470,8 @@ if not st.session_state.portfolio.empty:
             if near_low:
                 recommendations.append(f"💎 **52주 최저가 근처**: {', '.join(near_low)} (저가 매수 기회)")
             
-            # 탭으로 구성
-            tab1, tab2, tab3 = st.tabs(["📊 종합 분석", "💡 개선 제안", "📈 성과 예측"])
+            # 탭으로 구성 (성과 예측 탭의 시뮬레이션과 차트는 탭을 열었을 때만 계산)
+            tab1, tab2, tab3 = st.tabs(["📊 종합 분석", "💡 개선 제안", "📈 성과 예측"], key="analysis_tab", on_change="rerun")
             
             with tab1:
                 st.markdown("#### 포트폴리오 종합 평가")
@@ -421,13 +487,17 @@ if not st.session_state.portfolio.empty:
                         st.warning("배당률이 낮습니다")
                 
                 with col2:
-                    st.metric("평균 Beta (위험도)", f"{avg_beta:.2f}")
-                    if avg_beta < 1.0:
-                        st.success("시장 대비 안정적")
-                    elif avg_beta < 1.3:
-                        st.info("시장 수준의 위험")
+                    if pd.isna(avg_beta):
+                        st.metric("평균 Beta (위험도)", "-")
+                        st.caption("종목 지표 분석을 켜면 표시됩니다")
                     else:
-                        st.warning("시장 대비 고위험")
+                        st.metric("평균 Beta (위험도)", f"{avg_beta:.2f}")
+                        if avg_beta < 1.0:
+                            st.success("시장 대비 안정적")
+                        elif avg_beta < 1.3:
+                            st.info("시장 수준의 위험")
+                        else:
+                            st.warning("시장 대비 고위험")
                 
                 with col3:
                     diversification = len(df_result)
@@ -499,33 +569,53 @@ if not st.session_state.portfolio.empty:
 
             
             with tab3:
-                st.markdown("#### 📈 배당 수익 예측 (1년/3년/5년)")
+                if tab3.open:
+                    st.markdown("#### 📈 배당 수익 예측 (1년/3년/5년/10년)")
+                    st.caption(f"종목별 과거 배당 성장률·삭감 이력으로 {income_forecast.DEFAULT_PATHS:,}개 시나리오를 시뮬레이션한 누적 배당금입니다.")
                 
-                # 현재 연 배당금 기준 예측
-                year1 = total_div
-                year3 = total_div * 3  # 단순 누적
-                year5 = total_div * 5
+                    drip = st.toggle("배당 재투자 (DRIP)", value=False, key="forecast_drip")
+                    with st.spinner("배당 시나리오 계산 중..."):
+                        forecast = data_manager.get_income_forecast(df_result, drip=drip)
                 
-                # 배당 성장 가정 (연 5%)
-                year1_growth = total_div
-                year3_growth = total_div * (1.05**1 + 1.05**2 + 1.05**3)
-                year5_growth = sum(total_div * (1.05**i) for i in range(1, 6))
+                    # 중앙값 (50%)
+                    cols = st.columns(len(forecast))
+                    for col, (years, row) in zip(cols, forecast.iterrows()):
+                        with col:
+                            st.metric(f"{years}년", f"₩{row['P50']:,.0f}", f"평균 ₩{row['Mean']:,.0f}", delta_color="off")
                 
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.markdown("**배당 성장 없을 경우 (누적)**")
-                    st.metric("1년", f"₩{year1:,.0f}")
-                    st.metric("3년", f"₩{year3:,.0f}")
-                    st.metric("5년", f"₩{year5:,.0f}")
+                    # 분위수 범위
+                    forecast_df = forecast[['P5', 'P25', 'P50', 'P75', 'P95']].reset_index()
+                    forecast_df.columns = ['기간', '비관 (5%)', '하위 25%', '중앙값', '상위 25%', '낙관 (95%)']
+                    forecast_df['기간'] = forecast_df['기간'].map(lambda y: f"{y}년")
+                    st.dataframe(forecast_df.set_index('기간').style.format('₩{:,.0f}'), use_container_width=True)
                 
-                with col2:
-                    st.markdown("**연 5% 배당 성장 시 (누적)**")
-                    st.metric("1년", f"₩{year1_growth:,.0f}")
-                    st.metric("3년", f"₩{year3_growth:,.0f}", f"+₩{year3_growth-year3:,.0f}")
-                    st.metric("5년", f"₩{year5_growth:,.0f}", f"+₩{year5_growth-year5:,.0f}")
+                    st.info("💡 배당 성장률과 삭감 확률은 과거 실적을 기반으로 한 추정이며, 환율은 현재 값으로 고정합니다. 실제 결과는 다를 수 있습니다.")
                 
-                st.info("💡 배당 성장률은 과거 실적을 기반으로 한 가정이며, 실제 결과는 다를 수 있습니다.")
-
+                    st.markdown("---")
+                    st.markdown("#### 💧 배당 재투자 시뮬레이션")
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        drip_years = st.slider("기간 (년)", min_value=5, max_value=drip_simulator.MAX_YEARS, value=20, step=5, key="drip_years")
+                    with col2:
+                        drip_scenario = st.selectbox("시나리오", list(drip_simulator.SCENARIOS), index=1, key="drip_scenario")
+                
+                    drip_projection = data_manager.get_drip_projection(df_result, monthly_divs, years=drip_years)
+                    if not drip_projection.empty:
+                        scenario_df = drip_projection[drip_projection['Scenario'] == drip_scenario]
+                        final = scenario_df.groupby('Reinvest').last()
+                        # 마지막 1년 평균 (분기 배당 종목은 달마다 차이가 큼)
+                        last_year_income = scenario_df.groupby('Reinvest').tail(12).groupby('Reinvest')['Monthly Income'].mean()
+                        col1, col2, col3 = st.columns(3)
+                        with col1:
+                            st.metric(f"{drip_years}년 차 월평균 배당금 (재투자)", f"₩{last_year_income[True]:,.0f}",
+                                      f"+₩{last_year_income[True] - last_year_income[False]:,.0f}")
+                        with col2:
+                            st.metric("누적 배당금 (재투자)", f"₩{final.loc[True, 'Cumulative Income']:,.0f}")
+                        with col3:
+                            st.metric("평가액 (재투자)", f"₩{final.loc[True, 'Portfolio Value']:,.0f}",
+                                      f"+₩{final.loc[True, 'Portfolio Value'] - final.loc[False, 'Portfolio Value']:,.0f}")
+                    ui_components.render_drip_chart(drip_projection, drip_scenario)
+                    st.caption("보수적: 배당 성장률 -2%p, 주가 0% / 기본: 주가 연 5% / 낙관적: 배당 성장률 +2%p, 주가 연 8% (세금·수수료 제외)")
 
 else:
     st.info("👈 사이드바에서 종목을 추가해주세요.")
@@ -534,3 +624,8 @@ else:
     1. 사이드바에 주식 티커(예: AAPL, 005930.KS)와 수량을 입력하세요.
     2. 자동으로 주가, 배당금, 환율 정보를 가져와 분석해줍니다.
     """)
+
+# 진단 패널 (숨김: URL 에 ?diagnostics=1 을 붙이면 표시)
+run_ms = instrumentation.finish_run()
+if st.query_params.get('diagnostics') == '1':
+    ui_components.render_diagnostics_panel(instrumentation.get_recorder(), run_id, run_ms)
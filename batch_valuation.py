@@ -0,0 +1,52 @@
+import sys
+import os
+import argparse
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core import batch
+
+# 여러 포트폴리오 CSV 를 한 번에 평가합니다. (브라우저/Streamlit 없이 실행)
+#   python batch_valuation.py portfolios/                       # 디렉터리 안의 *.csv
+#   python batch_valuation.py "clients/*/portfolio.csv" --format parquet --workers 8
+#   python batch_valuation.py portfolios/ --forecast-paths 2000   # 1/3/5/10년 누적 배당 중앙값 포함
+# 결과: <output>/positions, summary, monthly (.csv 또는 .parquet)
+
+
+def _on_progress(done, total):
+    print(f"\r시세 조회 {done}/{total}", end="" if done < total else "\n", flush=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="포트폴리오 CSV 일괄 평가")
+    parser.add_argument('inputs', nargs='+', help="CSV 파일이 있는 디렉터리 또는 glob 패턴")
+    parser.add_argument('--output', default='batch_output', help="결과 저장 디렉터리")
+    parser.add_argument('--format', choices=list(batch.OUTPUT_FORMATS), default='csv')
+    parser.add_argument('--workers', type=int, default=None, help="평가 프로세스 수 (기본값: CPU 수)")
+    parser.add_argument('--forecast-paths', type=int, default=0,
+                        help="배당 수익 몬테카를로 경로 수 (0 이면 예측 생략)")
+    args = parser.parse_args()
+    # 시세 조회 전에 저장 형식에 필요한 패키지 확인 (parquet 은 pyarrow)
+    try:
+        batch.check_output_format(args.format)
+    except ValueError as e:
+        parser.error(str(e))
+
+    result = batch.run(args.inputs, args.output, fmt=args.format, workers=args.workers,
+                       forecast_paths=args.forecast_paths, on_progress=_on_progress)
+
+    for path, e in result['failed'].items():
+        print(f"⚠️ {path}: 읽지 못함 ({e})")
+    if not result['portfolios']:
+        print("평가할 포트폴리오가 없습니다.")
+        sys.exit(1)
+
+    print(f"Portfolios: {result['portfolios']} ({result['files']} files), "
+          f"unique tickers: {result['tickers']}, positions: {result['positions']}")
+    print(f"load {result['load_s']:.2f}s, fetch {result['fetch_s']:.2f}s, "
+          f"value {result['value_s']:.2f}s, write {result['write_s']:.2f}s")
+    print(f"Throughput: {result['portfolios'] / result['value_s']:,.1f} portfolios/s (valuation), "
+          f"{result['portfolios'] / result['total_s']:,.1f} portfolios/s (end to end)")
+    for path in result['outputs']:
+        print(f"  → {path}")
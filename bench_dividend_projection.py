@@ -0,0 +1,65 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core import dividend_projection
+
+# 종목 수 x 배당 이력 연수에 따른 배당 일정 추정 시간을 측정합니다.
+SIZES = [(100, 5), (1000, 5), (1000, 20), (5000, 10), (10000, 10)]
+LEGACY_LIMIT = 1000  # 기존 방식은 느리므로 이 종목 수까지만 측정
+
+
+def make_histories(n_tickers, years, seed=0):
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize()
+    histories = {}
+    for i in range(n_tickers):
+        periods = years * (12 if i % 2 == 0 else 4)
+        freq = 'MS' if i % 2 == 0 else 'QS'
+        dates = pd.date_range(end=end, periods=periods, freq=freq) + pd.Timedelta(days=int(rng.integers(0, 25)))
+        histories[f"T{i:05d}"] = pd.Series(rng.uniform(0.1, 1.0, periods), index=dates)
+    return histories
+
+
+def legacy_projection(histories):
+    """기존 fetch_stock_data_batch 의 종목별/배당별 while 루프"""
+    now = pd.Timestamp.now().normalize()
+    current_month_start = now.replace(day=1)
+    one_year_later = now + pd.DateOffset(years=1)
+    lookback_start = now - pd.DateOffset(years=2)
+    monthly_dividend_list = []
+    for ticker, hist in histories.items():
+        for date, amount in hist[hist.index >= lookback_start].items():
+            next_date = date
+            while next_date < current_month_start:
+                next_date += pd.DateOffset(years=1)
+            if current_month_start <= next_date <= one_year_later:
+                monthly_dividend_list.append({'Month': next_date.month, 'Date': next_date, 'Ticker': ticker, 'Dividend': amount})
+    return monthly_dividend_list
+
+
+for n_tickers, years in SIZES:
+    histories = make_histories(n_tickers, years)
+
+    start = time.perf_counter()
+    history = dividend_projection.build_history_frame(histories)
+    build_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    projected = dividend_projection.project_dividends(history)
+    vector_time = time.perf_counter() - start
+
+    line = (f"{n_tickers:>6} tickers x {years:>2}y ({len(history):>8,} rows): "
+            f"build {build_time * 1000:8.1f}ms, project {vector_time * 1000:8.1f}ms ({len(projected):,} events)")
+    if n_tickers <= LEGACY_LIMIT:
+        start = time.perf_counter()
+        legacy = legacy_projection(histories)
+        legacy_time = time.perf_counter() - start
+        assert len(legacy) == len(projected), "기존 방식과 추정 결과 개수가 다릅니다"
+        line += f", legacy loop {legacy_time * 1000:8.1f}ms (x{legacy_time / vector_time:.0f})"
+    print(line)
@@ -0,0 +1,60 @@
+import sys
+import os
+import time
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core import fetch_engine
+from portfolio_core.providers import FakeProvider
+
+# 가짜 제공자(요청당 지연)로 순차 조회와 동시 조회 시간을 비교합니다.
+N_TICKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 150
+LATENCY = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+
+tickers = [f"T{i:04d}" for i in range(N_TICKERS)]
+print(f"Tickers: {N_TICKERS}, latency per request: {LATENCY * 1000:.0f}ms")
+
+# 순차 조회 (기존 방식)
+provider = FakeProvider(latency=LATENCY)
+start = time.perf_counter()
+for t in tickers:
+    provider.get_price(t)
+    provider.get_info(t)
+    provider.get_dividends(t)
+sequential = time.perf_counter() - start
+print(f"Sequential: {sequential:.2f}s")
+
+for workers in (4, 8, 16, 32):
+    provider = FakeProvider(latency=LATENCY)
+    start = time.perf_counter()
+    results = fetch_engine.fetch_all(tickers, provider, max_workers=workers)
+    elapsed = time.perf_counter() - start
+    errors = sum(1 for r in results.values() if r['error'] is not None)
+    assert list(results) == tickers, "결과 순서가 포트폴리오 순서와 다릅니다"
+    print(f"Concurrent ({workers:>2} workers): {elapsed:.2f}s  (x{sequential / elapsed:.1f}, errors: {errors})")
+
+# 현재가 일괄 조회 전후의 요청(왕복) 횟수 비교 (핵심 데이터: 현재가 + 배당)
+print()
+for label, batch in (("Per-ticker prices", False), ("Batched prices", True)):
+    provider = FakeProvider(latency=LATENCY)
+    start = time.perf_counter()
+    fetch_engine.fetch_all(tickers, provider, max_workers=8, batch_prices=batch)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<18}: {elapsed:.2f}s, round trips {provider.round_trips:>4} {provider.calls}")
+
+# 처음에는 통화를 티커로 추정해 바로 표시하고 백그라운드에서 확인하며,
+# 캐시가 채워진 뒤에는 통화/배당은 캐시에서, 현재가는 한 번의 일괄 요청으로 조회
+import tempfile
+from portfolio_core.market_cache import MarketCache, CachedProvider
+provider = FakeProvider(latency=LATENCY)
+cached = CachedProvider(provider, MarketCache(tempfile.mkdtemp(), ttls={'quote': 0}))
+start = time.perf_counter()
+fetch_engine.fetch_all(tickers, cached, max_workers=8)
+elapsed = time.perf_counter() - start
+cached.drain()  # 통화 확인 완료 대기 (조회 시간에는 포함하지 않음)
+print(f"{'Cold cache':<18}: {elapsed:.2f}s, round trips {provider.round_trips:>4} {provider.calls}")
+provider.calls = dict.fromkeys(provider.calls, 0)
+fetch_engine.fetch_all(tickers, cached, max_workers=8)
+cached.drain()  # 백그라운드 갱신 완료 대기
+print(f"{'Warm cache':<18}: round trips {provider.round_trips:>4} {provider.calls}")
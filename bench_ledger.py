@@ -0,0 +1,74 @@
+import sys
+import os
+import time
+import tempfile
+import numpy as np
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core.portfolio_store import PortfolioStore
+from portfolio_core.ledger import TransactionLedger, BUY, SELL, DIVIDEND, SPLIT
+
+# 원장 크기(거래 수)별 거래 추가 비용: 누적값 갱신(O(1)) vs 원장 전체 재계산
+SIZES = [1000, 10000, 100000]
+N_TICKERS = 200
+ADDS = 200  # 거래 추가 시간을 측정할 건수
+
+
+def make_transactions(n, seed=0):
+    """날짜순 가상 거래 (매수 위주, 가끔 매도/배당/분할)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2005-01-01', periods=n, freq='h').strftime('%Y-%m-%d')
+    held = {}
+    transactions = []
+    for i in range(n):
+        ticker = f"T{rng.integers(N_TICKERS):03d}"
+        r = rng.random()
+        quantity = held.get(ticker, 0.0)
+        if r < 0.15 and quantity > 1:
+            txn = {'kind': SELL, 'quantity': float(rng.uniform(0, quantity / 2)), 'price': float(rng.uniform(50, 150))}
+            held[ticker] = quantity - txn['quantity']
+        elif r < 0.30 and quantity > 0:
+            txn = {'kind': DIVIDEND, 'amount': float(rng.uniform(1, 20))}
+        elif r < 0.301 and quantity > 0:
+            txn = {'kind': SPLIT, 'quantity': 2.0}
+            held[ticker] = quantity * 2
+        else:
+            txn = {'kind': BUY, 'quantity': float(rng.integers(1, 20)), 'price': float(rng.uniform(50, 150)), 'fee': 1.0}
+            held[ticker] = quantity + txn['quantity']
+        txn.update(ticker=ticker, trade_date=dates[i])
+        transactions.append(txn)
+    return transactions
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    for n in SIZES:
+        ledger = TransactionLedger(PortfolioStore(os.path.join(tmp, f"ledger_{n}.sqlite3")))
+        transactions = make_transactions(n + ADDS)
+
+        start = time.perf_counter()
+        ledger.record_many('bench', 'bench', transactions[:n])
+        load_time = time.perf_counter() - start
+
+        # 거래 한 건씩 추가 (누적값 한 줄만 갱신)
+        start = time.perf_counter()
+        for txn in transactions[n:]:
+            ledger.record('bench', 'bench', **txn)
+        add_time = (time.perf_counter() - start) / ADDS
+
+        incremental = ledger.positions('bench', 'bench').set_index('Ticker')
+
+        # 거래마다 원장 전체를 다시 계산하는 경우의 한 건 비용
+        start = time.perf_counter()
+        ledger.rebuild('bench', 'bench')
+        replay_time = time.perf_counter() - start
+
+        rebuilt = ledger.positions('bench', 'bench').set_index('Ticker')
+        diff = (incremental - rebuilt).abs().max().max()
+        assert diff < 1e-6, f"누적값과 재계산 결과가 다릅니다 ({diff})"
+
+        print(f"{n:>7,} txns: bulk load {load_time * 1000:9.1f}ms, "
+              f"add {add_time * 1000:6.2f}ms/txn, full replay {replay_time * 1000:9.1f}ms/txn "
+              f"(x{replay_time / add_time:.0f})")
@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import numpy as np
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core import rebalancing
+
+# 종목 수에 따른 리밸런싱 계산 시간을 측정합니다. (여러 계좌 합산 화면 기준 10k 종목)
+SIZES = [100, 1000, 10000, 100000]
+LEGACY_LIMIT = 10000  # 기존 iterrows 방식은 이 종목 수까지만 측정
+OPTIMIZER_SIZES = [100, 500, 2000]  # 정수 주 매수 계획 (목표: 500 종목 50ms 이내)
+OPTIMIZER_BUDGET = 5_000_000
+
+
+def make_positions(n, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Ticker': [f"T{i:06d}" for i in range(n)],
+        'Quantity': rng.integers(0, 100, n).astype(float),
+        'TargetRatio': rng.dirichlet(np.ones(n)) * 100,
+        'Current Price': rng.uniform(5, 500, n),
+        'Currency': rng.choice(['USD', 'KRW'], n),
+    })
+    df['FX Rate'] = np.where(df['Currency'] == 'USD', 1400.0, 1.0)
+    df['Market Value (KRW)'] = df['Quantity'] * df['Current Price'] * df['FX Rate']
+    df['Dividend Yield (%)'] = rng.uniform(0, 10, n)
+    df['Annual Dividend (KRW)'] = df['Market Value (KRW)'] * df['Dividend Yield (%)'] / 100
+    return df
+
+
+def legacy_rebalancing(df_result, total_value):
+    """기존 utils.calculate_rebalancing 의 행 단위 루프 (비교용)"""
+    rows = []
+    for _, row in df_result.iterrows():
+        if row['Quantity'] > 0 and row['Current Price'] > 0:
+            implied_rate = row['Market Value (KRW)'] / (row['Quantity'] * row['Current Price'])
+        else:
+            implied_rate = 1400 if row['Currency'] == 'USD' else 1
+        target_val = total_value * (row['TargetRatio'] / 100)
+        diff_val = target_val - row['Market Value (KRW)']
+        price_krw = row['Current Price'] * implied_rate
+        rows.append({'종목': row['Ticker'], '조정 필요 금액': diff_val, '수량': abs(diff_val / price_krw) if price_krw > 0 else 0})
+    return rows
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+for n in SIZES:
+    df = make_positions(n)
+    total_value = df['Market Value (KRW)'].sum()
+    results = {
+        'rebalancing': timed(rebalancing.calculate_rebalancing, df, total_value),
+        'buy_only': timed(rebalancing.calculate_buy_only_rebalancing, df, total_value),
+        'proximity': timed(rebalancing.check_rebalancing_proximity, df, total_value),
+        'top3': timed(rebalancing.calculate_dividend_maximized_top3, df, 1_000_000),
+    }
+    line = f"{n:>7} positions: " + ", ".join(f"{name} {ms:7.1f}ms" for name, ms in results.items())
+    if n <= LEGACY_LIMIT:
+        legacy_ms = timed(legacy_rebalancing, df, total_value)
+        line += f" | legacy rebalancing loop {legacy_ms:8.1f}ms (x{legacy_ms / results['rebalancing']:.0f})"
+    print(line)
+
+for n in OPTIMIZER_SIZES:
+    df = make_positions(n)
+    total_value = df['Market Value (KRW)'].sum()
+    for lot_size in (1.0, 0.001):
+        start = time.perf_counter()
+        plan, spent, remaining = rebalancing.optimize_integer_allocation(df, OPTIMIZER_BUDGET, total_value, lot_size=lot_size)
+        ms = (time.perf_counter() - start) * 1000
+        print(f"{n:>7} positions: integer plan (lot {lot_size:g}) {ms:7.1f}ms, {len(plan)} buys, 남는 현금 ₩{remaining:,.0f}")
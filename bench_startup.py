@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import argparse
+import subprocess
+
+# 새 파이썬 프로세스에서 모듈 import 시간을 재고 기준 결과와 비교합니다. (앱 콜드 스타트 회귀 확인)
+#   python bench_startup.py                    # 측정 후 bench_startup_baseline.json 과 비교 (회귀 시 종료 코드 1)
+#   python bench_startup.py --save-baseline    # 현재 결과를 기준으로 저장
+#   python bench_startup.py --top 20           # 앱 import 중 오래 걸린 패키지 20개 표시
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, 'bench_startup_baseline.json')
+
+# 측정 대상: 이름 -> import 할 모듈
+TARGETS = {
+    'streamlit': ['streamlit'],                                  # 하한 (streamlit 자체)
+    'app': ['data_manager', 'ui_components', 'utils'],           # app.py 가 시작할 때 불러오는 모듈
+    'core': ['portfolio_core.data_service'],                     # 화면 없는 계산 모듈
+    'batch': ['portfolio_core.batch'],                           # 일괄 평가 CLI
+}
+
+# 시작할 때 불러오면 안 되는 무거운 모듈 (차트를 그리거나 실제로 조회/번역할 때 불러옴)
+DEFERRED_MODULES = ['yfinance', 'plotly.express', 'deep_translator', 'matplotlib']
+
+REPEAT = 5
+TIME_THRESHOLD = 0.25
+TIME_NOISE_MS = 50.0
+
+_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+{imports}
+elapsed = time.perf_counter() - start
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def _probe_code(modules):
+    return _PROBE.format(imports="\n".join(f"import {m}" for m in modules), deferred=DEFERRED_MODULES)
+
+
+def measure(modules, repeat=REPEAT):
+    """새 프로세스에서 import 시간(ms, repeat 번 중 최솟값)과 함께 불러온 무거운 모듈 목록"""
+    times, loaded = [], []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', _probe_code(modules)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        times.append(result['ms'])
+        loaded = result['loaded']
+    return min(times), loaded
+
+
+def slowest_imports(modules, top=15):
+    """python -X importtime 결과를 최상위 패키지별 자체 import 시간 합계(ms)로 묶어 긴 순서로 반환합니다."""
+    err = subprocess.run([sys.executable, '-X', 'importtime', '-c', _probe_code(modules)], cwd=ROOT,
+                         capture_output=True, text=True, check=True).stderr
+    totals = {}
+    for line in err.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        own, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        totals[package] = totals.get(package, 0) + int(own) / 1000
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def compare(results, baseline, threshold=TIME_THRESHOLD):
+    """기준 대비 회귀 목록 [(대상, 항목, 기준, 현재)]"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if current['ms'] > base['ms'] * (1 + threshold) and current['ms'] - base['ms'] > TIME_NOISE_MS:
+            regressions.append((name, 'ms', f"{base['ms']:.0f}", f"{current['ms']:.0f}"))
+        newly_loaded = sorted(set(current['loaded']) - set(base['loaded']))
+        if newly_loaded:
+            regressions.append((name, 'loaded', ",".join(base['loaded']) or '-', ",".join(newly_loaded)))
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="import 시간 측정 (콜드 스타트)")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="대상별 측정 횟수 (최솟값 사용)")
+    parser.add_argument('--top', type=int, default=15, help="앱 import 중 오래 걸린 패키지 표시 개수")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="현재 결과를 기준으로 저장")
+    parser.add_argument('--threshold', type=float, default=TIME_THRESHOLD, help="회귀 판정 비율")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'target':<12}{'import (ms)':>14}  deferred modules loaded")
+    for name, modules in TARGETS.items():
+        ms, loaded = measure(modules, args.repeat)
+        results[name] = {'ms': round(ms, 1), 'loaded': loaded}
+        print(f"{name:<12}{ms:>14.1f}  {', '.join(loaded) or '-'}")
+
+    if args.top:
+        print(f"\nSlowest packages while importing the app ({', '.join(TARGETS['app'])}):")
+        for package, ms in slowest_imports(TARGETS['app'], args.top):
+            print(f"  {package:<28}{ms:>10.1f}ms")
+
+    meta = {'python': sys.version.split()[0]}
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"\nSaved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline['results'], args.threshold)
+        if regressions:
+            print(f"\n⚠️ 회귀 {len(regressions)}건 (기준: {args.baseline})")
+            for name, metric, base, current in regressions:
+                print(f"  {name:<12} {metric:<8} {base:>12} → {current}")
+            sys.exit(1)
+        print(f"\n✅ 회귀 없음 (기준: {args.baseline}, 허용 +{args.threshold:.0%})")
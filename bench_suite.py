@@ -0,0 +1,279 @@
+import sys
+import os
+import gc
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import logging
+import numpy as np
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core import data_service
+from portfolio_core import fx_indicators
+from portfolio_core import fx_rates
+from portfolio_core import instrumentation
+import ui_components
+import utils
+from portfolio_core.dividend_store import DividendStore
+from portfolio_core.providers import FakeProvider, FixtureProvider, RecordingProvider, YFinanceProvider
+
+# 화면 없이 실행하므로 Streamlit 의 "missing ScriptRunContext" 등 경고는 숨김
+logging.disable(logging.WARNING)
+
+# 네트워크 없이 전체 흐름(조회 → 평가 → 리밸런싱 → 차트)을 종목 수별로 측정하고 기준 결과와 비교합니다.
+#   python bench_suite.py                            # 측정 후 bench_baseline.json 과 비교 (회귀 시 종료 코드 1)
+#   python bench_suite.py --save-baseline            # 현재 결과를 기준으로 저장
+#   python bench_suite.py --sizes 10,100 --latency 0.02
+#   python bench_suite.py --fixture fixture.pkl      # 녹화한 실제 응답으로 측정
+#   python bench_suite.py --record fixture.pkl --tickers JEPI,JEPQ,DIVO   # yfinance 응답 녹화 (네트워크 필요)
+DEFAULT_SIZES = [10, 100, 1000, 10000]
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_baseline.json')
+
+# 회귀 판정: 기준보다 이 비율 이상 느리거나 메모리를 더 쓰면 회귀
+# 시간은 기준 대비 max(비율 × 기준, TIME_NOISE_MS) 를 넘게 늘어야 회귀 (몇 ms 짜리 단계의 흔들림만 무시)
+# 비율은 같은 컴퓨터에서 연속 실행한 최솟값의 편차(대부분 단계 최대 x1.5)보다 넓게 잡았습니다.
+TIME_THRESHOLD = 0.5
+MEMORY_THRESHOLD = 0.25
+TIME_NOISE_MS = 3.0
+MEMORY_NOISE_KB = 256.0
+# 흔들림이 더 큰 단계의 시간 판정 비율 (연속 실행 편차: fetch_cold/drip 최대 x1.7, 차트 최대 x1.8)
+#   fetch_cold: 매번 새 SQLite 파일/스레드 풀 생성, drip: 큰 배열 할당, chart_*: Plotly 그림 생성
+STAGE_TIME_THRESHOLDS = {'fetch_cold': 0.75, 'drip': 0.75, 'chart_monthly': 1.0, 'chart_pie': 1.0,
+                         'chart_drip': 1.0, 'chart_exchange': 1.0}
+
+_fx_calls = [0]
+
+REPEAT = 5                 # 시간은 여러 번 중 최솟값
+LARGE_SIZE = 1000          # 이 종목 수부터는 LARGE_REPEAT 번만 측정 (10k 종목 월별 차트는 수십 초)
+LARGE_REPEAT = 3
+OPTIMIZER_LIMIT = 2000     # 정수 주 매수 계획은 이 종목 수까지만 측정
+TOP3_BUDGET = 1_000_000
+PLAN_BUDGET = 5_000_000
+DRIP_YEARS = 20
+FX_RATES = {'USD': 1400.0, 'KRW': 1.0, 'JPY': 9.5, 'HKD': 180.0, 'CAD': 1000.0, 'EUR': 1500.0, 'GBP': 1800.0}
+
+
+def synthetic_fx_history(start=None):
+    """1년치 결정적 원/달러 일봉 (IndicatorEngine.fetch_history 형식)"""
+    _fx_calls[0] += 1
+    dates = pd.bdate_range(end=pd.Timestamp('2026-01-02'), periods=260)
+    close = 1300 + 50 * np.sin(np.arange(len(dates)) / 20) + np.arange(len(dates)) * 0.2
+    bars = pd.DataFrame({'Open': close - 2, 'High': close + 5, 'Low': close - 5, 'Close': close}, index=dates)
+    return bars if start is None else bars[bars.index >= start]
+
+
+def make_portfolio(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Ticker': [f"T{i:05d}" for i in range(n)],
+        'Quantity': rng.integers(1, 100, n).astype(float),
+        'TargetRatio': rng.dirichlet(np.ones(n)) * 100,
+    })
+
+
+def round_trips(provider):
+    return provider.round_trips + _fx_calls[0]
+
+
+def calibrate(repeat=REPEAT * 2):
+    """
+    이 컴퓨터의 속도를 재는 고정 작업(numpy/pandas 연산)의 최소 시간(ms).
+    기준 결과와 다른 컴퓨터에서 비교할 때 기준 시간을 이 비율로 맞춥니다.
+    """
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame({'key': rng.integers(0, 1000, 1_000_000), 'value': rng.random(1_000_000)})
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frame.groupby('key')['value'].agg(['sum', 'mean', 'std'])
+        np.sort(frame['value'].to_numpy())
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def measure(func, provider, setup=None, repeat=REPEAT):
+    """
+    (최소 실행 시간 ms, 최대 메모리 KB, 요청 수, 결과) 를 반환합니다.
+    시간은 tracemalloc 없이 repeat 번 중 최솟값, 메모리는 tracemalloc 을 켠 별도 실행에서 잰 값입니다.
+    요청 수는 마지막 실행에서 제공자(provider)/환율 이력 조회를 호출한 횟수입니다.
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup()
+    gc.collect()
+    calls_before = round_trips(provider)
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1024, round_trips(provider) - calls_before, result
+
+
+def _entry(wall_ms, peak_kb, calls):
+    return {'wall_ms': round(wall_ms, 3), 'peak_kb': round(peak_kb, 1), 'calls': calls}
+
+
+def run_size(n, tmp, provider):
+    """종목 n 개 포트폴리오의 단계별 측정 결과 {단계: {'wall_ms', 'peak_kb', 'calls'}} (provider: 시장 데이터 제공자)"""
+    portfolio = make_portfolio(n)
+    repeat = LARGE_REPEAT if n >= LARGE_SIZE else REPEAT
+    results = {}
+
+    def reset_market_data():
+        # 현재가 메모와 배당 이력 저장소를 비워 첫 화면(cold) 상태로 만듦
+        data_service.set_provider(provider)
+        data_service.set_dividend_store(DividendStore(tempfile.mkdtemp(dir=tmp)))
+
+    def record(name, func, setup=None):
+        *metrics, value = measure(func, provider, setup=setup, repeat=repeat)
+        results[name] = _entry(*metrics)
+        return value
+
+    record('fetch_cold', lambda: data_service.fetch_stock_data_batch(portfolio), setup=reset_market_data)
+    df_result, total_value, _, monthly_divs, rates = record(
+        'fetch_warm', lambda: data_service.fetch_stock_data_batch(portfolio))
+
+    record('rebalancing', lambda: utils.calculate_rebalancing(df_result, total_value, rates=rates))
+    record('buy_only', lambda: utils.calculate_buy_only_rebalancing(df_result, total_value, rates=rates))
+    record('top3', lambda: utils.calculate_dividend_maximized_top3(df_result, TOP3_BUDGET, rates=rates))
+    if n <= OPTIMIZER_LIMIT:
+        record('integer_plan', lambda: utils.optimize_integer_allocation(df_result, PLAN_BUDGET, total_value, rates=rates))
+
+    record('chart_monthly', lambda: ui_components.render_monthly_dividend_chart(monthly_divs))
+    record('chart_pie', lambda: ui_components.render_portfolio_pie_chart(df_result))
+    projection = record('drip', lambda: data_service.get_drip_projection(df_result, monthly_divs, DRIP_YEARS))
+    record('chart_drip', lambda: ui_components.render_drip_chart(projection, '기본'))
+    return results
+
+
+def run_fx(provider):
+    """원/달러 분석 (첫 조회 / 캐시 재사용) 과 환율 차트"""
+    def reset_engine():
+        data_service.set_fx_engine(fx_indicators.IndicatorEngine("KRW=X", fetch_history=synthetic_fx_history))
+
+    results = {}
+    *metrics, _ = measure(data_service.get_exchange_rate_analysis, provider, setup=reset_engine)
+    results['analysis_cold'] = _entry(*metrics)
+    *metrics, analysis = measure(data_service.get_exchange_rate_analysis, provider)
+    results['analysis_warm'] = _entry(*metrics)
+    *metrics, _ = measure(lambda: ui_components.render_exchange_chart(analysis, "🕯️ 캔들"), provider)
+    results['chart_exchange'] = _entry(*metrics)
+    return results
+
+
+def compare(results, baseline, time_threshold=TIME_THRESHOLD, memory_threshold=MEMORY_THRESHOLD, speed=1.0):
+    """
+    기준 결과 대비 회귀 목록 [(단계, 항목, 기준, 현재)]
+    speed: 기준 컴퓨터 대비 현재 컴퓨터의 보정 작업 시간 비율 (기준 시간에 곱해 비교)
+    """
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        base_ms = base['wall_ms'] * speed
+        threshold = max(time_threshold, STAGE_TIME_THRESHOLDS.get(key.split('/')[-1], 0.0))
+        if current['wall_ms'] - base_ms > max(threshold * base_ms, TIME_NOISE_MS):
+            regressions.append((key, 'wall_ms', base_ms, current['wall_ms']))
+        if current['peak_kb'] > base['peak_kb'] * (1 + memory_threshold) and current['peak_kb'] - base['peak_kb'] > MEMORY_NOISE_KB:
+            regressions.append((key, 'peak_kb', base['peak_kb'], current['peak_kb']))
+        if current['calls'] > base['calls']:
+            regressions.append((key, 'calls', base['calls'], current['calls']))
+    return regressions
+
+
+def record_fixture(path, tickers):
+    """yfinance 응답을 녹화합니다. (네트워크 필요)"""
+    recorder = RecordingProvider(YFinanceProvider())
+    recorder.get_prices(tickers)
+    for t in tickers:
+        for method in (recorder.get_currency, recorder.get_info):
+            try:
+                method(t)
+            except Exception as e:
+                print(f"{t}: {method.__name__} 녹화 실패 ({e})")
+    recorder.get_dividends_batch(tickers)
+    recorder.save(path)
+    print(f"Recorded {len(tickers)} tickers to {path}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="오프라인 벤치마크 (가짜/녹화 제공자)")
+    parser.add_argument('--sizes', default=",".join(map(str, DEFAULT_SIZES)), help="종목 수 목록 (쉼표 구분)")
+    parser.add_argument('--latency', type=float, default=0.0, help="요청당 지연(초)")
+    parser.add_argument('--fixture', help="RecordingProvider 로 녹화한 파일 (없으면 결정적 가짜 데이터)")
+    parser.add_argument('--record', help="yfinance 응답을 이 파일로 녹화하고 종료")
+    parser.add_argument('--tickers', default="JEPI,JEPQ,DIVO,SCHD,O", help="--record 에 사용할 종목")
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help="현재 결과를 기준으로 저장")
+    parser.add_argument('--threshold', type=float, default=TIME_THRESHOLD,
+                        help="시간 회귀 판정 비율 (STAGE_TIME_THRESHOLDS 의 단계는 더 큰 값 사용)")
+    parser.add_argument('--output', help="결과를 JSON 으로 저장할 경로")
+    args = parser.parse_args()
+
+    if args.record:
+        record_fixture(args.record, [t.strip().upper() for t in args.tickers.split(",") if t.strip()])
+        sys.exit(0)
+
+    provider = FixtureProvider(args.fixture, latency=args.latency) if args.fixture else FakeProvider(latency=args.latency)
+    data_service.set_rate_table(fx_rates.StaticRates(FX_RATES))
+    utils.set_store(None)
+    instrumentation.get_recorder().reset()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in [int(s) for s in args.sizes.split(",")]:
+            for stage, values in run_size(n, tmp, provider).items():
+                results[f"{n}/{stage}"] = values
+            print(f"{n:>6} tickers done", flush=True)
+        for stage, values in run_fx(provider).items():
+            results[f"fx/{stage}"] = values
+
+    print()
+    print(f"{'stage':<28}{'wall (ms)':>12}{'peak (KB)':>12}{'calls':>8}")
+    for key, v in results.items():
+        print(f"{key:<28}{v['wall_ms']:>12.1f}{v['peak_kb']:>12.1f}{v['calls']:>8}")
+    counters = instrumentation.get_recorder().counter_values()
+    print(f"\nCounters: {json.dumps(counters, ensure_ascii=False)}")
+
+    meta = {'latency': args.latency, 'provider': 'fixture' if args.fixture else 'fake', 'calibration_ms': round(calibrate(), 3),
+            'python': sys.version.split()[0], 'numpy': np.__version__, 'pandas': pd.__version__}
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2, ensure_ascii=False)
+        print(f"Saved baseline to {args.baseline}")
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('latency') != args.latency or baseline['meta'].get('provider') != meta['provider']:
+            print(f"\n기준 결과와 측정 조건이 다릅니다 ({baseline['meta']}) - 비교하지 않음")
+            sys.exit(0)
+        # 기준에 보정 시간이 있으면 컴퓨터 속도 차이만큼 기준 시간을 맞춤
+        # (보정 작업도 흔들리므로 기준을 더 엄격하게 만들지는 않음)
+        speed = max(1.0, meta['calibration_ms'] / baseline['meta'].get('calibration_ms', meta['calibration_ms']))
+        regressions = compare(results, baseline['results'], args.threshold, MEMORY_THRESHOLD, speed)
+        if regressions:
+            print(f"\n⚠️ 회귀 {len(regressions)}건 (기준: {args.baseline})")
+            for key, metric, base, current in regressions:
+                print(f"  {key:<28} {metric:<8} {base:>12,.1f} → {current:>12,.1f}")
+            sys.exit(1)
+        print(f"\n✅ 회귀 없음 (기준: {args.baseline}, 시간 허용 +{args.threshold:.0%} (흔들리는 단계는 단계별), "
+              f"메모리 허용 +{MEMORY_THRESHOLD:.0%}, 속도 보정 x{speed:.2f})")
@@ -0,0 +1,10 @@
+"""
+화면(Streamlit)과 독립된 포트폴리오 계산 모듈 모음.
+
+- data_service: 시세/배당 이력 조회, 평가, 배당 예측 (진행률/오류는 콜백으로 전달)
+- valuation, dividend_projection, income_forecast, drip_simulator, rebalancing: 순수 계산
+- providers, fetch_engine, market_cache, dividend_store, fx_rates, fx_indicators: 시장 데이터
+- portfolio_store, ledger: 포트폴리오/거래 원장 저장소
+
+배치 작업이나 프로세스 풀 워커에서는 streamlit 없이 이 패키지만 import 하면 됩니다.
+"""
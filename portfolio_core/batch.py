@@ -0,0 +1,254 @@
+import os
+import glob
+import time
+import importlib
+from concurrent.futures import ProcessPoolExecutor
+import pandas as pd
+from . import data_service
+from . import income_forecast
+from . import instrumentation
+from . import valuation
+from .portfolio_store import PORTFOLIO_COLUMNS
+
+# 포트폴리오 여러 개를 한 번에 평가하는 배치 작업 (야간 일괄 평가 등, Streamlit 없이 실행)
+# 종목은 모든 포트폴리오에서 중복을 제거하여 한 번만 조회하고, 평가는 프로세스 풀에서 나누어 계산합니다.
+
+SUMMARY_COLUMNS = ['Portfolio', 'Tickers', 'Market Value (KRW)', 'Annual Dividend (KRW)', 'Dividend Yield (%)', 'Errors']
+MONTHLY_COLUMNS = ['Portfolio', 'Month', 'Dividend (KRW)', 'Paid (KRW)', 'Expected (KRW)']
+
+# 저장 형식별로 필요한 패키지 (하나만 있으면 됨)
+OUTPUT_FORMATS = {'csv': (), 'parquet': ('pyarrow', 'fastparquet')}
+
+# 워커 한 번에 넘기는 포트폴리오 수를 정할 때 워커당 묶음 수 (작을수록 묶음이 커짐)
+CHUNKS_PER_WORKER = 4
+
+# 워커 프로세스가 공유하는 시장 데이터 (프로세스 시작 시 한 번만 전달)
+_shared = None
+
+
+def find_portfolio_files(patterns):
+    """디렉터리(안의 *.csv) 또는 glob 패턴 목록을 CSV 경로 목록으로 바꿉니다. (중복 제거, 정렬)"""
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '*.csv')))
+        else:
+            paths.update(p for p in glob.glob(pattern) if os.path.isfile(p))
+    return sorted(paths)
+
+
+def load_portfolio_csv(path):
+    """
+    portfolio.csv 형식(Ticker, Quantity, TargetRatio) 파일을 읽습니다.
+    종목 코드는 대문자로 맞추고, 종목이 비었거나 수량이 0 이하인 줄은 제외합니다.
+    """
+    df = pd.read_csv(path)
+    if 'TargetRatio' not in df.columns:
+        df['TargetRatio'] = 0.0
+    df = df[PORTFOLIO_COLUMNS].copy()
+    df['Ticker'] = df['Ticker'].fillna('').astype(str).str.strip().str.upper()
+    df['Quantity'] = pd.to_numeric(df['Quantity'], errors='coerce')
+    df['TargetRatio'] = pd.to_numeric(df['TargetRatio'], errors='coerce').fillna(0.0)
+    return df[(df['Ticker'] != '') & (df['Quantity'] > 0)].reset_index(drop=True)
+
+
+def load_portfolios(paths):
+    """
+    {포트폴리오 이름(파일 이름): DataFrame} 과 읽지 못한 파일 {경로: 오류} 를 반환합니다.
+    이름이 겹치면 상위 디렉터리 이름을 붙여 구분합니다.
+    """
+    portfolios, failed = {}, {}
+    stems = [os.path.splitext(os.path.basename(p))[0] for p in paths]
+    for path, stem in zip(paths, stems):
+        name = stem if stems.count(stem) == 1 else os.path.join(os.path.basename(os.path.dirname(path)), stem)
+        try:
+            portfolios[name] = load_portfolio_csv(path)
+        except Exception as e:
+            failed[path] = e
+    return portfolios, failed
+
+
+def _currency(data):
+    return (data.get('price') or {}).get('currency') or (data.get('info') or {}).get('currency', 'USD')
+
+
+def prepare_market(tickers, on_progress=None, forecast_paths=0):
+    """
+    모든 포트폴리오의 종목을 한 번에 조회하여 평가에 필요한 공유 데이터를 만듭니다.
+    시세, 환율 스냅샷, 배당 추정(종목별로 한 번만 계산)과 배당 예측 모델을 담습니다.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    # 평가 결과 파일에는 확인된 통화만 사용 (티커로 추정한 통화를 쓰지 않음)
+    data_service.set_currency_hints(False)
+    with instrumentation.span('batch.market_data', tickers=len(tickers)):
+        market_data = data_service.get_market_data(tickers, on_progress=on_progress)
+    history = data_service.get_dividend_history(tickers)
+    with instrumentation.span('batch.prepare', tickers=len(tickers)):
+        rates = data_service.get_rate_snapshot(
+            {_currency(data) for data in market_data.values() if data.get('error') is None})
+        shared = {
+            'market_data': market_data,
+            'rates': rates,
+            'projection': valuation.project_history(history),
+            'forecast_paths': forecast_paths,
+            'model': income_forecast.fit_dividend_model(history, tickers) if forecast_paths else None,
+        }
+    return shared
+
+
+def _init_worker(shared):
+    global _shared
+    _shared = shared
+
+
+def value_portfolio(name, portfolio_df, shared=None):
+    """
+    포트폴리오 하나를 평가합니다. (네트워크 호출 없음)
+    Returns:
+        tuple: (종목별 평가 DataFrame, 요약 dict, 월별 배당 DataFrame)
+    """
+    shared = shared or _shared
+    errors = []
+    df_result, total_value, total_div, monthly_divs, _ = valuation.compute_positions(
+        portfolio_df, shared['market_data'], shared['rates'],
+        on_error=lambda ticker, e: errors.append(f"{ticker}: {e}"),
+        projection=shared['projection']
+    )
+    summary = {
+        'Portfolio': name,
+        'Tickers': len(df_result),
+        'Market Value (KRW)': total_value,
+        'Annual Dividend (KRW)': total_div,
+        'Dividend Yield (%)': total_div / total_value * 100 if total_value > 0 else 0.0,
+        'Errors': "; ".join(errors),
+    }
+    if shared['forecast_paths'] and not df_result.empty:
+        forecast = income_forecast.forecast_income(df_result, None, n_paths=shared['forecast_paths'],
+                                                   seed=data_service.FORECAST_SEED, model=shared['model'])
+        for years, row in forecast.iterrows():
+            summary[f'Forecast {years}y P50 (KRW)'] = row['P50']
+
+    monthly = pd.DataFrame({
+        'Portfolio': name,
+        'Month': monthly_divs.month_order,
+        'Dividend (KRW)': monthly_divs.month_totals.to_numpy(),
+        'Paid (KRW)': monthly_divs.paid_totals.to_numpy(),
+        'Expected (KRW)': monthly_divs.expected_totals.to_numpy(),
+    }, columns=MONTHLY_COLUMNS)
+    return df_result.assign(Portfolio=name), summary, monthly
+
+
+def _value_item(item):
+    return value_portfolio(*item)
+
+
+def value_portfolios(portfolios, shared, workers=None):
+    """
+    포트폴리오들을 프로세스 풀에서 평가합니다. (workers=1 이면 현재 프로세스에서 순서대로)
+    공유 데이터는 워커마다 한 번만 전달하고, 포트폴리오는 묶음 단위로 나누어 보냅니다.
+
+    Returns:
+        tuple: (종목별 평가, 포트폴리오 요약, 월별 배당) DataFrame - 입력 순서 유지
+    """
+    items = list(portfolios.items())
+    workers = max(1, min(workers or os.cpu_count() or 1, len(items)))
+    if workers == 1:
+        results = [value_portfolio(name, df, shared) for name, df in items]
+    else:
+        chunksize = max(1, len(items) // (workers * CHUNKS_PER_WORKER))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared,)) as executor:
+            results = list(executor.map(_value_item, items, chunksize=chunksize))
+
+    if not results:
+        return pd.DataFrame(), pd.DataFrame(columns=SUMMARY_COLUMNS), pd.DataFrame(columns=MONTHLY_COLUMNS)
+    positions = pd.concat([r[0] for r in results if not r[0].empty] or [pd.DataFrame()], ignore_index=True)
+    if not positions.empty:
+        positions = positions[['Portfolio'] + [c for c in positions.columns if c != 'Portfolio']]
+    summary = pd.DataFrame([r[1] for r in results])
+    monthly = pd.concat([r[2] for r in results], ignore_index=True)
+    return positions, summary, monthly
+
+
+def check_output_format(fmt):
+    """
+    저장 형식과 필요한 패키지를 확인합니다. 시세 조회 전에 호출하여 평가를 마친 뒤 저장에 실패하지 않도록 합니다.
+    지원하지 않는 형식이거나 패키지가 없으면 ValueError 를 발생시킵니다.
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"지원하지 않는 저장 형식입니다: {fmt} ({', '.join(OUTPUT_FORMATS)})")
+    engines = OUTPUT_FORMATS[fmt]
+    if not engines:
+        return
+    for engine in engines:
+        try:
+            importlib.import_module(engine)
+            return
+        except ImportError:
+            continue
+    raise ValueError(f"{fmt} 저장에는 {' 또는 '.join(engines)} 패키지가 필요합니다 (pip install {engines[0]})")
+
+
+def write_results(output_dir, tables, fmt='csv'):
+    """{이름: DataFrame} 을 output_dir 에 csv 또는 parquet 으로 저장하고 경로 목록을 반환합니다."""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for name, df in tables.items():
+        path = os.path.join(output_dir, f"{name}.{fmt}")
+        if fmt == 'parquet':
+            df.to_parquet(path, index=False)
+        else:
+            df.to_csv(path, index=False, encoding='utf-8-sig')
+        paths.append(path)
+    return paths
+
+
+def run(patterns, output_dir, fmt='csv', workers=None, forecast_paths=0, on_progress=None):
+    """
+    CSV 파일들을 읽어 평가하고 결과를 저장합니다.
+    Returns:
+        dict: 처리 건수와 단계별 소요 시간(초), 저장한 파일 경로
+              (읽은 포트폴리오가 없으면 조회/저장 없이 'portfolios' 0 과 빈 'outputs' 를 반환)
+    """
+    check_output_format(fmt)
+    started = time.perf_counter()
+    paths = find_portfolio_files(patterns)
+    portfolios, failed = load_portfolios(paths)
+    tickers = [t for df in portfolios.values() for t in df['Ticker']]
+    loaded = time.perf_counter()
+    if not portfolios:
+        # 읽은 포트폴리오가 없으면 시세를 조회하거나 빈 결과 파일을 쓰지 않음
+        return {
+            'files': len(paths),
+            'portfolios': 0,
+            'failed': failed,
+            'tickers': 0,
+            'positions': 0,
+            'load_s': loaded - started,
+            'fetch_s': 0.0,
+            'value_s': 0.0,
+            'write_s': 0.0,
+            'total_s': loaded - started,
+            'outputs': [],
+        }
+
+    shared = prepare_market(tickers, on_progress=on_progress, forecast_paths=forecast_paths)
+    fetched = time.perf_counter()
+
+    positions, summary, monthly = value_portfolios(portfolios, shared, workers=workers)
+    valued = time.perf_counter()
+
+    written = write_results(output_dir, {'positions': positions, 'summary': summary, 'monthly': monthly}, fmt)
+    finished = time.perf_counter()
+    return {
+        'files': len(paths),
+        'portfolios': len(portfolios),
+        'failed': failed,
+        'tickers': len(set(tickers)),
+        'positions': len(positions),
+        'load_s': loaded - started,
+        'fetch_s': fetched - loaded,
+        'value_s': valued - fetched,
+        'write_s': finished - valued,
+        'total_s': finished - started,
+        'outputs': written,
+    }
@@ -0,0 +1,375 @@
+import pandas as pd
+import time
+import threading
+from datetime import datetime
+from . import fetch_engine
+from . import valuation
+from . import dividend_projection
+from . import income_forecast
+from . import instrumentation
+from . import drip_simulator
+from . import translation
+from . import fx_indicators
+from . import fx_rates
+from .providers import YFinanceProvider
+from .market_cache import MarketCache, CachedProvider
+from .dividend_store import DividendStore
+from .refresh_scheduler import RefreshScheduler
+from .result_cache import memoize
+
+# 시세 조회, 평가, 배당 예측을 담당하는 화면 독립 서비스 (Streamlit 없이 배치 작업/워커에서도 사용)
+# 진행률과 오류는 콜백(on_progress, on_error)으로 알리며, 화면 표시는 data_manager 가 담당합니다.
+
+# 동시 조회 설정 (종목 수가 많은 계좌에서 콜드 로딩 시간을 줄이기 위함)
+FETCH_MAX_WORKERS = 8
+FETCH_TIMEOUT = 20.0
+
+# 종목 심볼 단위 시장 데이터 캐시 (모든 세션이 공유)
+# 메모 시각이 아니라 시세를 받은 시각 기준으로 만료되므로, 캐시(CachedProvider)의 만료된 시세를 받아도
+# 메모 유지 시간이 더해지지 않습니다. (화면 시세는 최대 MARKET_DATA_TTL + 백그라운드 갱신 한 번만큼 오래됨)
+MARKET_DATA_TTL = 300
+_market_data = {}
+_market_data_lock = threading.Lock()
+# 조회 중인 종목 {(메모 id, ticker): Event} - 같은 종목을 여러 세션이 동시에 조회하지 않도록
+_in_flight = {}
+
+# 종목 상세 정보 (상세 패널 요청 시 지연 조회)
+DETAIL_TTL = 60 * 60
+DETAIL_COLUMNS = ['Ticker', 'Summary', 'Recommendation', 'Target Price', '52WeekHigh', '52WeekLow', 'Beta']
+_ticker_details = {}
+
+# 시장 데이터 제공자 (벤치마크 시 FakeProvider 등으로 교체 가능)
+# 영구 캐시(MarketCache)를 거쳐 조회하므로 재시작 후에도 캐시가 유지됩니다.
+_provider = CachedProvider(YFinanceProvider(), MarketCache())
+# 처음 보는 종목의 통화를 티커로 추정해 먼저 표시할지 (확인은 백그라운드, 일괄 평가는 끄고 조회를 기다림)
+_currency_hints = True
+
+# 배당 이력 저장소 (과거 배당은 바뀌지 않으므로 새 배당만 추가)
+_dividend_store = DividendStore()
+
+# 통화별 원화 환율표 (필요한 통화를 한 번에 조회, 5분 유지)
+_rate_table = fx_rates.RateTable(ttl=300)
+
+# 환율 일봉/지표 (처음 이후에는 새 봉만 받아 증분 갱신)
+FX_ANALYSIS_TTL = 300
+_fx_engine = fx_indicators.IndicatorEngine("KRW=X", cache=MarketCache())
+
+# 배당 수익 예측 (같은 평가 결과면 재사용, 시드 고정으로 다시 실행해도 같은 결과)
+FORECAST_TTL = 60 * 60
+FORECAST_SEED = 42
+
+# 백그라운드 갱신 스케줄러 (실행 중이면 화면은 미리 갱신된 캐시만 읽음)
+_scheduler = None
+
+def set_rate_table(rate_table):
+    """fetch_stock_data_batch 가 사용할 환율표를 교체합니다. (fx_rates.StaticRates 등)"""
+    global _rate_table
+    _rate_table = rate_table
+
+def set_dividend_store(store):
+    """배당 이력 저장소를 교체합니다."""
+    global _dividend_store
+    _dividend_store = store
+
+def set_fx_engine(engine):
+    """원/달러 지표 엔진을 교체합니다. (벤치마크/검증용)"""
+    global _fx_engine
+    _fx_engine = engine
+
+def set_currency_hints(enabled):
+    """저장된 통화가 없는 종목에 티커로 추정한 통화를 임시로 쓸지 설정합니다."""
+    global _currency_hints
+    _currency_hints = enabled
+
+def set_provider(provider):
+    """fetch_stock_data_batch 가 사용할 데이터 제공자를 교체합니다."""
+    global _provider
+    _provider = provider
+    with _market_data_lock:
+        _market_data.clear()
+        _ticker_details.clear()
+
+@memoize(ttl=300)  # 5분간 캐시
+def get_exchange_rate(currency_pair="KRW=X"):
+    """
+    실시간 환율 정보를 가져옵니다.
+    실패 시 기본값 1400원을 반환하지만 경고를 로그에 남깁니다.
+    캐시 적용: 5분마다 갱신
+    """
+    import yfinance as yf
+    try:
+        ticker = yf.Ticker(currency_pair)
+        # fast_info가 더 빠르고 안정적일 수 있음
+        price = ticker.fast_info.last_price
+        if price and price > 0:
+            return price
+        
+        # history로 재시도
+        hist = ticker.history(period="1d")
+        if not hist.empty:
+            return hist['Close'].iloc[-1]
+            
+        return 1400.0 # Fallback
+    except Exception as e:
+        print(f"Error fetching exchange rate: {e}")
+        return 1400.0
+
+def _fetch_and_store(store, tickers, kinds, on_progress=None):
+    fetched = fetch_engine.fetch_all(
+        tickers, _provider,
+        kinds=kinds,
+        max_workers=FETCH_MAX_WORKERS,
+        timeout=FETCH_TIMEOUT,
+        on_progress=on_progress,
+        currency_hints=_currency_hints
+    )
+    now = time.time()
+    with _market_data_lock:
+        for t, data in fetched.items():
+            if data['error'] is None:
+                store[t] = (now, data)
+    return fetched
+
+def _quote_time(entry):
+    # 제공자에서 시세를 받은 시각 (시세가 없거나 캐시를 거치지 않는 제공자는 메모에 저장한 시각)
+    stored_at, data = entry
+    return (data.get('price') or {}).get('fetched_at', stored_at)
+
+def _fetch_memoized(store, tickers, ttl, kinds, on_progress=None, cache_name=None):
+    """
+    종목 심볼을 키로 하는 메모(store)에서 값을 찾고, 없거나 만료된 종목만 한 번에 동시 조회합니다.
+    다른 세션이 이미 조회 중인 종목은 다시 요청하지 않고 그 결과를 기다립니다. (포트폴리오가 여러 개여도 종목당 한 번)
+    실패한 종목은 메모하지 않고 다음 실행 시 재시도합니다.
+    시세는 제공자에서 받은 시각(fetched_at)부터 ttl 동안 유효합니다.
+    cache_name 이 있으면 적중/누락 수를 'cache.<cache_name>.hit/miss' 카운터에 기록합니다.
+    """
+    now = time.time()
+    found = {}
+    mine, waiting = [], {}
+    with _market_data_lock:
+        for t in dict.fromkeys(tickers):
+            entry = store.get(t)
+            if entry and now - _quote_time(entry) < ttl:
+                found[t] = entry[1]
+                continue
+            key = (id(store), t)
+            if key in _in_flight:
+                waiting[t] = _in_flight[key]
+            else:
+                _in_flight[key] = threading.Event()
+                mine.append(t)
+    if cache_name:
+        instrumentation.count(f'cache.{cache_name}.hit', len(found) + len(waiting))
+        instrumentation.count(f'cache.{cache_name}.miss', len(mine))
+
+    if mine:
+        try:
+            found.update(_fetch_and_store(store, mine, kinds, on_progress))
+        finally:
+            with _market_data_lock:
+                for t in mine:
+                    _in_flight.pop((id(store), t)).set()
+
+    retry = []
+    for t, event in waiting.items():
+        event.wait(FETCH_TIMEOUT)
+        with _market_data_lock:
+            entry = store.get(t)
+        if entry:
+            found[t] = entry[1]
+        else:
+            retry.append(t)
+    if retry:
+        # 먼저 조회한 세션이 실패한 종목은 직접 다시 조회
+        found.update(_fetch_and_store(store, retry, kinds))
+
+    return found
+
+def get_market_data(tickers, on_progress=None):
+    """
+    종목별 핵심 시장 데이터(현재가, 통화)를 가져옵니다. 배당 내역은 get_dividend_history 를 사용합니다.
+    캐시 키는 종목 심볼만 사용하므로 수량/목표 비중이 바뀌어도 재조회하지 않습니다.
+    캐시 적용: 종목별 5분
+    """
+    ttl = float('inf') if _background_active() else MARKET_DATA_TTL
+    return _fetch_memoized(_market_data, tickers, ttl, ('price',), on_progress, cache_name='market_data')
+
+def get_dividend_history(tickers):
+    """
+    종목별 배당 내역을 배당 이력 저장소에서 읽습니다. (Ticker, Date, Amount long-format DataFrame)
+    확인 주기(12시간)가 지난 종목만 마지막 배당락일 이후의 배당을 한 번에 받아 추가합니다.
+    """
+    with instrumentation.span('data.dividend_sync'):
+        _dividend_store.sync(tickers, _provider, include_known=not _background_active())
+    with instrumentation.span('data.dividend_history'):
+        return _dividend_store.history(tickers)
+
+def get_data_as_of(tickers):
+    """화면에 표시 중인 현재가를 받은 시각 (가장 오래된 종목 기준, 없으면 None)"""
+    with _market_data_lock:
+        times = [_quote_time(_market_data[t]) for t in tickers if t in _market_data]
+    return datetime.fromtimestamp(min(times)) if times else None
+
+def get_rate_snapshot(currencies):
+    """통화별 원화 환산율 스냅샷 (fx_rates.RateSnapshot, 여러 포트폴리오를 같은 환율로 평가할 때 사용)"""
+    return _rate_table.snapshot(list(currencies))
+
+def _background_active():
+    return _scheduler is not None and _scheduler.is_running()
+
+def _refresh_prices(tickers):
+    """현재가를 만료 여부와 관계없이 다시 받아 메모를 갱신합니다. (스케줄러 작업)"""
+    if hasattr(_provider, 'refresh_prices'):
+        _provider.refresh_prices(tickers)
+    _fetch_memoized(_market_data, tickers, 0, ('price',))
+
+def _refresh_fx(tickers):
+    """보유 종목 통화의 환율과 원/달러 지표를 갱신합니다. (스케줄러 작업)"""
+    with _market_data_lock:
+        currencies = {(_market_data[t][1].get('price') or {}).get('currency') for t in tickers if t in _market_data}
+    if hasattr(_rate_table, 'refresh'):
+        _rate_table.refresh(currencies)
+    _fx_engine.refresh()
+
+def _refresh_dividends(tickers):
+    """확인 주기가 지난 종목의 새 배당을 받아 저장합니다. (스케줄러 작업)"""
+    _dividend_store.sync(tickers, _provider)
+
+def start_background_refresh(tickers, owner=None):
+    """
+    백그라운드 갱신 스케줄러를 (처음 한 번) 시작하고 종목을 등록합니다.
+    owner(포트폴리오)별로 등록하며, 같은 owner 의 이전 종목 목록은 교체됩니다.
+    시작 후에는 화면 실행 시 만료된 캐시도 그대로 사용하고, 처음 보는 종목만 직접 조회합니다.
+    """
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RefreshScheduler(_refresh_prices, _refresh_fx, _refresh_dividends)
+    if hasattr(_rate_table, 'serve_stale'):
+        _rate_table.serve_stale = True
+    _scheduler.watch(tickers, owner)
+    _scheduler.start()
+
+def get_ticker_details(tickers, fetch_missing=True):
+    """
+    종목 상세 정보(요약, 전문가 의견, 목표주가, 52주 범위, Beta)를 가져옵니다.
+    첫 화면에는 필요 없으므로 상세 패널을 요청할 때만 조회하고, 종목별로 메모이즈합니다.
+    fetch_missing=False 이면 이미 조회된 종목만 반환합니다. (네트워크 호출 없음)
+    캐시 적용: 종목별 1시간
+    """
+    if fetch_missing:
+        details = _fetch_memoized(_ticker_details, tickers, DETAIL_TTL, ('info',), cache_name='ticker_details')
+    else:
+        now = time.time()
+        with _market_data_lock:
+            details = {t: _ticker_details[t][1] for t in tickers
+                       if t in _ticker_details and now - _ticker_details[t][0] < DETAIL_TTL}
+
+    rows = [valuation.detail_row(t, data['info'] or {}) for t, data in details.items() if data['error'] is None]
+    return pd.DataFrame(rows, columns=DETAIL_COLUMNS)
+
+def get_ticker_summary(summary_en):
+    """
+    종목 요약을 한국어로 반환합니다.
+    번역이 캐시에 없으면 영문을 먼저 반환하고 백그라운드에서 번역합니다.
+    """
+    with instrumentation.span('data.translation'):
+        return translation.get_translator().get(summary_en)
+
+def _print_error(ticker, e):
+    print(f"Error processing {ticker}: {e}")
+
+@instrumentation.timed('data.fetch_stock_data_batch')
+def fetch_stock_data_batch(portfolio_df, cost_basis=None, on_progress=None, on_error=None):
+    """
+    포트폴리오 내 모든 종목의 데이터를 일괄(Batch)로 가져옵니다.
+    시장 데이터는 종목별로 캐시되고, 평가액/배당금은 매 실행마다 다시 계산합니다.
+    cost_basis: 거래 원장의 종목별 누적값 (있으면 평균 단가/평가 손익/투자금 대비 배당률 계산)
+    on_progress: on_progress(done, total) - 실제 조회가 필요한 경우에만 호출
+    on_error: on_error(ticker, exception) - 종목 처리 실패 시 호출 (기본값: 로그 출력)
+    """
+    if portfolio_df.empty:
+        return pd.DataFrame(), 0, 0, dividend_projection.MonthlyDividends(), fx_rates.RateSnapshot()
+
+    tickers = portfolio_df['Ticker'].unique().tolist()
+    
+    with instrumentation.span('data.market_data', tickers=len(tickers)):
+        market_data = get_market_data(tickers, on_progress=on_progress)
+    
+    dividend_history = get_dividend_history(tickers)
+    with instrumentation.span('data.valuation', tickers=len(tickers)):
+        return valuation.compute_positions(
+            portfolio_df, market_data, _rate_table,
+            on_error=on_error or _print_error,
+            dividend_history=dividend_history,
+            cost_basis=cost_basis
+        )
+
+@memoize(ttl=FORECAST_TTL)
+def get_income_forecast(df_result, drip=False):
+    """
+    저장된 배당 이력으로 종목별 배당 성장/삭감을 추정하여 1/3/5/10년 누적 배당 수익 분포를 시뮬레이션합니다.
+    Returns:
+        DataFrame: index=기간(년), 컬럼 P5/P25/P50/P75/P95/Mean (원화)
+    """
+    history = get_dividend_history(df_result['Ticker'].tolist())
+    with instrumentation.span('data.income_forecast', tickers=len(df_result)):
+        return income_forecast.forecast_income(df_result, history, drip=drip, seed=FORECAST_SEED)
+
+def get_drip_projection(df_result, monthly_divs, years=20):
+    """
+    배당 재투자 시나리오별 월별 배당금/평가액 추이 (drip_simulator.DRIP_COLUMNS)
+    배당 성장률은 저장된 배당 이력으로 종목별로 추정합니다.
+    """
+    tickers = df_result['Ticker'].tolist()
+    model = income_forecast.fit_dividend_model(get_dividend_history(tickers), tickers)
+    with instrumentation.span('data.drip_projection', tickers=len(tickers)):
+        return drip_simulator.simulate_drip(df_result, monthly_divs, years=years, model=model)
+
+def get_exchange_rate_analysis():
+    """원/달러 환율 기술적 분석 데이터
+    MA/RSI 는 fx_indicators 엔진이 새 봉만 받아 증분 계산합니다.
+    5분마다 갱신 (백그라운드 갱신 중에는 조회 없이 보관 중인 값 사용)
+    """
+    try:
+        with instrumentation.span('data.fx_analysis'):
+            hist = _fx_engine.refresh(max_age=float('inf') if _background_active() else FX_ANALYSIS_TTL)
+        
+        if hist is None or len(hist) < 2:
+            return None
+            
+        current_price = hist['Close'].iloc[-1]
+        prev_price = hist['Close'].iloc[-2]
+        change = current_price - prev_price
+        change_rate = (change / prev_price) * 100
+        
+        current_rsi = hist['RSI'].iloc[-1]
+        
+        analysis = {
+            'current_price': current_price,
+            'change': change,
+            'change_rate': change_rate,
+            'rsi': current_rsi,
+            'ma20': hist['MA20'].iloc[-1],
+            'ma60': hist['MA60'].iloc[-1],
+            'history': hist
+        }
+        
+        # RSI Status
+        if current_rsi >= 70:
+            analysis.update({'rsi_status': "과매수 (High)", 'rsi_signal': "매도 고려", 'rsi_color': "red"})
+        elif current_rsi <= 30:
+            analysis.update({'rsi_status': "과매도 (Low)", 'rsi_signal': "매수 기회", 'rsi_color': "green"})
+        else:
+            analysis.update({'rsi_status': "중립 (Neutral)", 'rsi_signal': "관망", 'rsi_color': "gray"})
+            
+        # Trend
+        if current_price > analysis['ma20']:
+            analysis['trend'] = "상승 추세"
+        else:
+            analysis['trend'] = "하락/조정 추세"
+            
+        return analysis
+        
+    except Exception as e:
+        print(f"Exchange analysis error: {e}")
+        return None
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+# 과거 배당 패턴을 참고할 기간(년)
+LOOKBACK_YEARS = 2
+
+HISTORY_COLUMNS = ['Ticker', 'Date', 'Amount']
+PROJECTION_COLUMNS = ['Ticker', 'Date', 'Month', 'Amount']
+
+
+def build_history_frame(dividends_by_ticker):
+    """
+    종목별 배당 내역 Series 를 하나의 long-format DataFrame(Ticker, Date, Amount)으로 합칩니다.
+
+    Args:
+        dividends_by_ticker: {ticker: Series(index=배당일, values=주당 배당금)}
+    """
+    tickers, dates, amounts = [], [], []
+    for ticker, hist in dividends_by_ticker.items():
+        if hist is None or hist.empty:
+            continue
+        index = pd.DatetimeIndex(hist.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        tickers.append(np.full(len(hist), ticker, dtype=object))
+        dates.append(index.to_numpy(dtype='datetime64[ns]'))
+        amounts.append(hist.to_numpy(dtype=float))
+    if not tickers:
+        return pd.DataFrame(columns=HISTORY_COLUMNS)
+    return pd.DataFrame({
+        'Ticker': np.concatenate(tickers),
+        'Date': np.concatenate(dates),
+        'Amount': np.concatenate(amounts)
+    })
+
+
+def _add_years(dates, years):
+    """
+    datetime64 배열에 종목별로 다른 연수를 더합니다. (pd.DateOffset(years=n) 과 동일하게
+    2월 29일처럼 없는 날짜는 그 달의 마지막 날로 맞춥니다)
+    """
+    days = dates.astype('datetime64[D]')
+    month_start = days.astype('datetime64[M]')
+    day_of_month = (days - month_start.astype('datetime64[D]')).astype(np.int64)
+    time_of_day = dates - days.astype(dates.dtype)
+
+    target_month = month_start + (years * 12).astype('timedelta64[M]')
+    month_length = ((target_month + np.timedelta64(1, 'M')).astype('datetime64[D]')
+                    - target_month.astype('datetime64[D]')).astype(np.int64)
+    day_of_month = np.minimum(day_of_month, month_length - 1)
+    shifted = target_month.astype('datetime64[D]') + day_of_month.astype('timedelta64[D]')
+    return shifted.astype(dates.dtype) + time_of_day
+
+
+def project_dividends(history, now=None, lookback_years=LOOKBACK_YEARS):
+    """
+    과거 배당 내역을 1년 단위로 반복된다고 가정하여 향후 12개월의 배당 일정을 추정합니다.
+    모든 종목을 한 번에 배열 연산으로 처리합니다.
+
+    최근 lookback_years 년의 배당일을, 이번 달 1일 이후가 될 때까지 1년씩 미룬 뒤
+    [이번 달 1일, 오늘 + 1년] 구간에 들어오는 것만 남깁니다.
+
+    Args:
+        history: Ticker, Date, Amount 컬럼의 long-format DataFrame (build_history_frame 결과)
+        now: 기준 시각 (기본값: 현재)
+        lookback_years: 참고할 과거 기간(년)
+
+    Returns:
+        DataFrame: Ticker, Date, Month, Amount(주당 배당금) 컬럼, 종목/날짜 순 정렬
+    """
+    if history is None or history.empty:
+        return pd.DataFrame(columns=PROJECTION_COLUMNS)
+
+    now = (pd.Timestamp.now() if now is None else pd.Timestamp(now)).normalize()
+    current_month_start = now.replace(day=1)
+    one_year_later = now + pd.DateOffset(years=1)
+    lookback_start = now - pd.DateOffset(years=lookback_years)
+
+    recent = history[history['Date'] >= lookback_start]
+    if recent.empty:
+        return pd.DataFrame(columns=PROJECTION_COLUMNS)
+
+    dates = recent['Date'].to_numpy(dtype='datetime64[ns]')
+    cms = np.datetime64(current_month_start.to_datetime64(), 'ns')
+
+    # 이번 달 1일 이후가 되기 위해 더해야 하는 최소 연수
+    years = current_month_start.year - recent['Date'].dt.year.to_numpy()
+    candidate = _add_years(dates, years)
+    years = np.where(candidate < cms, years + 1, years)
+    years = np.maximum(years, 0)
+    next_dates = _add_years(dates, years)
+
+    in_window = (next_dates >= cms) & (next_dates <= np.datetime64(one_year_later.to_datetime64(), 'ns'))
+    projected = pd.DataFrame({
+        'Ticker': recent['Ticker'].to_numpy()[in_window],
+        'Date': next_dates[in_window],
+        'Amount': recent['Amount'].to_numpy(dtype=float)[in_window]
+    })
+    projected['Month'] = projected['Date'].dt.month
+    return projected[PROJECTION_COLUMNS].sort_values(['Ticker', 'Date'], kind='stable').reset_index(drop=True)
+
+
+def trailing_annual_dividend(history, now=None):
+    """종목별 최근 1년 주당 배당금 합계 (Series, index=Ticker)"""
+    if history is None or history.empty:
+        return pd.Series(dtype=float)
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    one_year_ago = now - pd.DateOffset(years=1)
+    recent = history[history['Date'] >= one_year_ago]
+    return recent.groupby('Ticker')['Amount'].sum()
+
+
+class MonthlyDividends:
+    """
+    향후 12개월 배당 일정을 담는 열 기반(columnar) 결과 타입.
+    생성 시 월별/종목별 합계와 지급완료/지급예정 구분을 미리 계산해 두므로
+    대시보드 카드, 차트가 같은 구조를 반복 순회하지 않고 바로 읽을 수 있습니다.
+
+    Attributes:
+        events: (Month, Ticker) 인덱스, Date/Dividend/Paid 컬럼의 DataFrame (날짜순)
+        by_month_ticker: Month, Ticker, Dividend 컬럼의 월별·종목별 합계 (이번 달부터 순서대로)
+        month_totals: 월별 배당 합계 (Series, index=Month, 이번 달부터 순서대로)
+        paid_totals / expected_totals: 월별 지급완료 / 지급예정 합계 (Series, index=Month)
+    """
+
+    COLUMNS = ['Month', 'Date', 'Ticker', 'Dividend']
+
+    def __init__(self, events=None, now=None):
+        self.now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+        if events is None or events.empty:
+            events = pd.DataFrame({
+                'Month': pd.Series(dtype='int64'),
+                'Date': pd.Series(dtype='datetime64[ns]'),
+                'Ticker': pd.Series(dtype=object),
+                'Dividend': pd.Series(dtype=float)
+            })
+        events = events[self.COLUMNS].sort_values('Date', kind='stable')
+        events = events.assign(Month=events['Month'].astype('int64'),
+                               Dividend=events['Dividend'].astype(float),
+                               Paid=events['Date'] < self.now)
+        self.events = events.set_index(['Month', 'Ticker'])
+
+        # 이번 달부터 12개월 순서
+        current_month = self.now.month
+        self.month_order = [(current_month + i - 1) % 12 + 1 for i in range(12)]
+
+        grouped = events.groupby(['Month', 'Ticker'], sort=False)['Dividend'].sum().reset_index()
+        grouped['SortKey'] = (grouped['Month'] - current_month) % 12
+        self.by_month_ticker = grouped.sort_values(['SortKey', 'Ticker']).drop(columns='SortKey').reset_index(drop=True)
+
+        self.month_totals = events.groupby('Month')['Dividend'].sum().reindex(self.month_order, fill_value=0.0)
+        self.paid_totals = events[events['Paid']].groupby('Month')['Dividend'].sum().reindex(self.month_order, fill_value=0.0)
+        self.expected_totals = self.month_totals - self.paid_totals
+
+    def __len__(self):
+        return len(self.events)
+
+    def __bool__(self):
+        return not self.events.empty
+
+    def for_month(self, month):
+        """해당 월의 배당 일정 (Date, Ticker, Dividend, Paid 컬럼, 날짜순)"""
+        mask = self.events.index.get_level_values('Month') == month
+        return self.events[mask].reset_index(level='Month', drop=True).reset_index()
+
+    def paid_expected(self, month):
+        """해당 월의 (지급완료 합계, 지급예정 합계)"""
+        return float(self.paid_totals.get(month, 0.0)), float(self.expected_totals.get(month, 0.0))
+
+    def to_records(self):
+        """기존 list-of-dict 형식으로 변환합니다."""
+        return self.events.reset_index()[self.COLUMNS].to_dict('records')
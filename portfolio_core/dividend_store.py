@@ -0,0 +1,189 @@
+import os
+import time
+import sqlite3
+import threading
+import pandas as pd
+from .market_cache import CACHE_DIR
+
+# 처음 채울 때 받아오는 배당 이력 기간
+INITIAL_PERIOD = "5y"
+
+# 이 시간(초)이 지난 종목만 새 배당을 확인 (과거 배당은 바뀌지 않으므로 새 기록만 추가)
+SYNC_INTERVAL = 60 * 60 * 12
+
+# 같은 배당락일의 금액이 이 비율 이상 다르면 과거 배당이 다시 조정된 것으로 봄 (주식 분할 등)
+AMOUNT_TOLERANCE = 1e-4
+
+
+class DividendStore:
+    """
+    종목 + 배당락일 단위의 추가 전용(append-only) SQLite 배당 이력 저장소.
+    처음에는 여러 종목을 한 번에 받아 채우고, 이후에는 가장 최근 배당락일부터만 받아 추가합니다.
+    분할 등으로 과거 배당 금액이 다시 조정된 종목은 전체 이력을 다시 받아 교체합니다.
+    """
+
+    def __init__(self, cache_dir=None, sync_interval=SYNC_INTERVAL):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.sync_interval = sync_interval
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, 'dividends.sqlite3')
+        self._sync_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS dividends ("
+                " ticker TEXT NOT NULL,"
+                " ex_date TEXT NOT NULL,"
+                " amount REAL NOT NULL,"
+                " PRIMARY KEY (ticker, ex_date))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " ticker TEXT PRIMARY KEY,"
+                " synced_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    @staticmethod
+    def _rows(dividends_by_ticker):
+        rows = []
+        for ticker, hist in dividends_by_ticker.items():
+            if hist is None or hist.empty:
+                continue
+            index = pd.DatetimeIndex(hist.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            rows.extend(zip([ticker] * len(hist), index.strftime('%Y-%m-%d'), hist.to_numpy(dtype=float)))
+        return rows
+
+    def append(self, dividends_by_ticker):
+        """배당 내역을 추가합니다. (이미 있는 배당락일은 무시)"""
+        rows = self._rows(dividends_by_ticker)
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            before = conn.total_changes
+            conn.executemany("INSERT OR IGNORE INTO dividends (ticker, ex_date, amount) VALUES (?, ?, ?)", rows)
+            return conn.total_changes - before
+
+    def replace(self, dividends_by_ticker):
+        """종목별 배당 내역을 모두 지우고 새로 저장합니다. (과거 금액이 다시 조정된 종목)"""
+        rows = self._rows(dividends_by_ticker)
+        with self._connect() as conn:
+            conn.executemany("DELETE FROM dividends WHERE ticker = ?", [(t,) for t in dividends_by_ticker])
+            conn.executemany("INSERT OR REPLACE INTO dividends (ticker, ex_date, amount) VALUES (?, ?, ?)", rows)
+        return len(rows)
+
+    def mark_synced(self, tickers, synced_at=None):
+        synced_at = time.time() if synced_at is None else synced_at
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO sync_state (ticker, synced_at) VALUES (?, ?)",
+                [(t, synced_at) for t in tickers]
+            )
+
+    def _query(self, sql, tickers, *params):
+        tickers = list(dict.fromkeys(tickers))
+        if not tickers:
+            return []
+        placeholders = ",".join("?" * len(tickers))
+        with self._connect() as conn:
+            return conn.execute(sql.format(placeholders=placeholders), tickers + list(params)).fetchall()
+
+    def sync_times(self, tickers):
+        """{ticker: 마지막 확인 시각} (확인한 적 없는 종목은 제외)"""
+        return dict(self._query("SELECT ticker, synced_at FROM sync_state WHERE ticker IN ({placeholders})", tickers))
+
+    def newest(self, tickers):
+        """{ticker: 가장 최근 배당락일(Timestamp)} (저장된 배당이 없는 종목은 제외)"""
+        rows = self._query(
+            "SELECT ticker, MAX(ex_date) FROM dividends WHERE ticker IN ({placeholders}) GROUP BY ticker", tickers)
+        return {t: pd.Timestamp(d) for t, d in rows}
+
+    def amounts(self, tickers, since):
+        """{(ticker, 배당락일 문자열): 금액} (since 이후 저장된 배당)"""
+        rows = self._query(
+            "SELECT ticker, ex_date, amount FROM dividends WHERE ticker IN ({placeholders}) AND ex_date >= ?",
+            tickers, since.strftime('%Y-%m-%d'))
+        return {(t, d): a for t, d, a in rows}
+
+    def readjusted(self, fetched, since):
+        """
+        받아온 배당 중 과거 금액이 다시 조정된 종목.
+        조회 기간에 주식 분할이 있었거나(hist.attrs['split']), 이미 저장된 배당락일의 금액이 달라진 종목입니다.
+        """
+        changed = {t for t, hist in fetched.items() if hist is not None and hist.attrs.get('split')}
+        stored = self.amounts(fetched, since)
+        for ticker, ex_date, amount in self._rows(fetched):
+            old = stored.get((ticker, ex_date))
+            if old is not None and abs(amount - old) > AMOUNT_TOLERANCE * abs(old):
+                changed.add(ticker)
+        return [t for t in fetched if t in changed]
+
+    def history(self, tickers):
+        """종목별 배당 내역 (Ticker, Date, Amount 컬럼의 long-format DataFrame, 종목/날짜순)"""
+        rows = self._query(
+            "SELECT ticker, ex_date, amount FROM dividends WHERE ticker IN ({placeholders}) ORDER BY ticker, ex_date",
+            tickers)
+        history = pd.DataFrame(rows, columns=['Ticker', 'Date', 'Amount'])
+        history['Date'] = pd.to_datetime(history['Date']).astype('datetime64[ns]')
+        history['Amount'] = history['Amount'].astype(float)
+        return history
+
+    def sync(self, tickers, provider, now=None, include_known=True):
+        """
+        확인 주기가 지난 종목의 새 배당만 받아 저장합니다.
+        저장된 배당이 없는 종목은 INITIAL_PERIOD 만큼, 나머지는 가장 오래된 '최근 배당락일'부터
+        provider.get_dividends_batch 한 번으로 받아옵니다.
+        이미 저장된 배당락일과 겹쳐 받으므로, 분할이 있었거나 저장된 금액과 달라진 종목(yfinance 가 과거 금액을
+        다시 조정함)은 INITIAL_PERIOD 만큼 다시 받아 그 종목의 이력을 교체합니다. (서로 다른 기준의 금액이 섞이지 않도록)
+        응답에 없는 종목(일시적인 누락, 조회 실패)은 확인한 것으로 기록하지 않아 다음에 다시 받습니다.
+        include_known=False 이면 처음 보는 종목만 채웁니다. (백그라운드 갱신 중 화면 실행 시)
+
+        Returns:
+            int: 새로 추가되거나 다시 저장된 배당 건수
+        """
+        now = time.time() if now is None else now
+        with self._sync_lock:
+            synced = self.sync_times(tickers)
+            due = [t for t in dict.fromkeys(tickers)
+                   if t not in synced or (include_known and now - synced[t] >= self.sync_interval)]
+            if not due:
+                return 0
+
+            newest = self.newest(due)
+            new_tickers = [t for t in due if t not in newest]
+            known = [t for t in due if t in newest]
+            # 배당이 저장된 종목: 가장 오래된 '최근 배당락일'부터 (저장된 금액과 비교하기 위해 겹쳐 받음)
+            known_start = min((newest[t] for t in known), default=None)
+
+            added = 0
+            for group, start in ((new_tickers, None), (known, known_start)):
+                if not group:
+                    continue
+                try:
+                    fetched = provider.get_dividends_batch(group, start=start, period=INITIAL_PERIOD)
+                except Exception as e:
+                    print(f"Dividend history sync failed ({len(group)} tickers): {e}")
+                    continue
+                replaced = {}
+                readjusted = self.readjusted(fetched, start) if start is not None else []
+                if readjusted:
+                    # 다시 받지 못한 종목은 확인한 것으로 기록하지 않아 다음에 다시 시도
+                    replaced = self._refetch(readjusted, provider)
+                    added += self.replace(replaced)
+                    fetched = {t: hist for t, hist in fetched.items() if t not in readjusted}
+                added += self.append(fetched)
+                self.mark_synced([t for t in group if t in fetched or t in replaced], now)
+            return added
+
+    def _refetch(self, tickers, provider):
+        print(f"Dividend history re-adjusted, re-fetching: {', '.join(tickers)}")
+        try:
+            fetched = provider.get_dividends_batch(tickers, start=None, period=INITIAL_PERIOD)
+        except Exception as e:
+            print(f"Dividend history re-fetch failed ({len(tickers)} tickers): {e}")
+            return {}
+        return {t: fetched[t] for t in tickers if t in fetched}
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+from .income_forecast import DEFAULT_GROWTH_MEAN, PRICE_DRIFT
+
+# 최대 시뮬레이션 기간(년)
+MAX_YEARS = 30
+
+# 시나리오: (배당 성장률 가감, 연 주가 상승률) - 배당 성장률은 종목별 추정치(로그 성장률)에 더함
+SCENARIOS = {
+    '보수적': (-0.02, 0.0),
+    '기본': (0.0, PRICE_DRIFT),
+    '낙관적': (0.02, 0.08),
+}
+
+DRIP_COLUMNS = ['Scenario', 'Reinvest', 'Date', 'Monthly Income', 'Cumulative Income', 'Portfolio Value']
+
+
+def monthly_dividend_per_share(df_result, monthly_dividends):
+    """
+    향후 12개월 배당 일정(MonthlyDividends)을 종목별 월 주당 배당금(원화) 배열로 바꿉니다.
+    일정이 없지만 연 배당금이 있는 종목은 12개월에 나누어 지급하는 것으로 봅니다.
+
+    Returns:
+        ndarray: (종목 수, 12) - 열 0 은 이번 달
+    """
+    tickers = df_result['Ticker'].tolist()
+    quantity = df_result['Quantity'].to_numpy(dtype=float)
+    per_share = np.zeros((len(tickers), 12))
+
+    events = monthly_dividends.events.reset_index()
+    if not events.empty:
+        now = monthly_dividends.now
+        offset = ((events['Date'].dt.year - now.year) * 12 + events['Date'].dt.month - now.month).to_numpy()
+        row = pd.Index(tickers).get_indexer(events['Ticker'])
+        valid = (row >= 0) & (offset >= 0) & (offset < 12)
+        np.add.at(per_share, (row[valid], offset[valid]), events['Dividend'].to_numpy(dtype=float)[valid])
+
+    annual = df_result['Annual Dividend (KRW)'].to_numpy(dtype=float)
+    unscheduled = (per_share.sum(axis=1) == 0) & (annual > 0)
+    per_share[unscheduled] = annual[unscheduled, None] / 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(quantity[:, None] > 0, per_share / quantity[:, None], 0.0)
+
+
+def simulate_drip(df_result, monthly_dividends, years=20, scenarios=None, model=None, start=None):
+    """
+    배당 재투자(DRIP) 시 보유 수량이 월 단위로 불어나는 과정을 시나리오별로 계산합니다.
+    향후 12개월 배당 일정이 매년 반복되며 종목별 성장률로 커진다고 보고, 지급월마다 그 달의 주가로
+    다시 매수합니다. 재투자하지 않는 경우(현금 수령)도 함께 계산하여 비교할 수 있습니다.
+
+    수량은 지급월마다 (1 + 주당 배당금 / 주가) 배씩 늘어나므로 월 축의 누적곱 한 번으로 구하며,
+    시나리오 x 재투자 여부 x 종목 x 월을 하나의 배열로 계산합니다. (월/종목별 반복문 없음)
+
+    Args:
+        df_result: compute_positions 결과 (Ticker, Quantity, Current Price, FX Rate, Annual Dividend (KRW))
+        monthly_dividends: compute_positions 의 MonthlyDividends (향후 12개월 배당 일정)
+        years: 기간 (최대 MAX_YEARS 년)
+        scenarios: {이름: (배당 성장률 가감, 연 주가 상승률)} (기본값: SCENARIOS)
+        model: income_forecast.fit_dividend_model 결과 (없으면 모든 종목에 기본 성장률 적용)
+
+    Returns:
+        DataFrame: DRIP_COLUMNS (포트폴리오 합계, 월별, 원화)
+    """
+    scenarios = scenarios or SCENARIOS
+    if df_result.empty:
+        return pd.DataFrame(columns=DRIP_COLUMNS)
+    months = int(min(years, MAX_YEARS) * 12)
+    start = (monthly_dividends.now if start is None else pd.Timestamp(start)).to_period('M').to_timestamp()
+
+    tickers = df_result['Ticker'].tolist()
+    quantity = df_result['Quantity'].to_numpy(dtype=float)
+    price = (df_result['Current Price'] * df_result['FX Rate']).to_numpy(dtype=float)
+    base = monthly_dividend_per_share(df_result, monthly_dividends)
+
+    growth = (model['Growth Mean'].reindex(tickers).fillna(DEFAULT_GROWTH_MEAN).to_numpy(dtype=float)
+              if model is not None else np.full(len(tickers), DEFAULT_GROWTH_MEAN))
+    growth_offset = np.array([g for g, _ in scenarios.values()])
+    price_return = np.array([r for _, r in scenarios.values()])
+
+    # (시나리오, 종목, 월) 주당 배당금과 주가
+    elapsed = np.arange(months) / 12
+    dividend = base[None, :, np.arange(months) % 12] \
+        * np.exp((growth[None, :] + growth_offset[:, None])[:, :, None] * elapsed)
+    price_path = price[None, :, None] * np.exp(np.log1p(price_return)[:, None, None] * (elapsed + 1 / 12))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        reinvest_yield = np.where(price_path > 0, dividend / price_path, 0.0)
+
+    # 재투자 수량: 지급 후 수량 = 이전 수량 x (1 + 배당/주가)
+    drip_after = quantity[None, :, None] * np.cumprod(1 + reinvest_yield, axis=2)
+    drip_before = np.concatenate([np.broadcast_to(quantity[None, :, None], (len(scenarios), len(tickers), 1)),
+                                  drip_after[:, :, :-1]], axis=2)
+    cash_shares = np.broadcast_to(quantity[None, :, None], drip_after.shape)
+
+    # (재투자 여부, 시나리오, 월) 포트폴리오 합계
+    income = np.stack([(cash_shares * dividend).sum(axis=1), (drip_before * dividend).sum(axis=1)])
+    value = np.stack([(cash_shares * price_path).sum(axis=1), (drip_after * price_path).sum(axis=1)])
+
+    dates = pd.date_range(start, periods=months, freq='MS')
+    names = list(scenarios)
+    n = len(names) * months
+    return pd.DataFrame({
+        'Scenario': np.tile(np.repeat(names, months), 2),
+        'Reinvest': np.repeat([False, True], n),
+        'Date': np.tile(dates, 2 * len(names)),
+        'Monthly Income': income.reshape(-1),
+        'Cumulative Income': np.cumsum(income, axis=2).reshape(-1),
+        'Portfolio Value': value.reshape(-1),
+    })[DRIP_COLUMNS]
@@ -0,0 +1,141 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from . import instrumentation
+
+# 기본 동시 요청 수 / 종목당 제한 시간(초)
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 20.0
+
+
+# 데이터 종류별 조회 메서드
+FETCHERS = {
+    'price': 'get_price',
+    'currency': 'get_currency',
+    'info': 'get_info',
+    'dividends': 'get_dividends',
+}
+
+# 실패해도 종목 전체를 오류로 처리하지 않는 데이터 종류
+OPTIONAL_KINDS = {'dividends'}
+
+# 화면 첫 렌더링에 필요한 핵심 데이터 (info 는 상세 정보 요청 시 지연 조회)
+CORE_KINDS = ('price', 'dividends')
+
+
+def _fetch_prices(provider, tickers):
+    """
+    제공자가 일괄 조회(get_prices)를 지원하면 모든 종목의 현재가를 한 번에 가져옵니다.
+    실패하거나 지원하지 않으면 빈 dict 를 반환하여 종목별 조회로 대체합니다.
+    """
+    if not hasattr(provider, 'get_prices'):
+        return {}
+    try:
+        with instrumentation.span('fetch.prices_batch', tickers=len(tickers)):
+            return provider.get_prices(tickers) or {}
+    except Exception as e:
+        print(f"Batch price fetch failed, falling back to per-ticker requests: {e}")
+        return {}
+
+
+def _resolve_currency(provider, ticker, hint):
+    """
+    거래 통화. 제공자가 resolve_currency 를 지원하면(CachedProvider) 저장된 통화나 추정 통화(hint)를 사용하고,
+    그렇지 않으면 추정 통화는 믿지 않고 get_currency 로 조회합니다.
+    """
+    resolve = getattr(provider, 'resolve_currency', None)
+    if resolve is not None:
+        return resolve(ticker, hint)
+    return provider.get_currency(ticker)
+
+
+def _fetch_one(provider, ticker, kinds, started, batch_price=None, currency_hints=True):
+    """
+    한 종목의 요청된 데이터 종류를 가져옵니다. (작업 스레드에서 실행)
+    batch_price 가 있으면 현재가는 다시 조회하지 않고 통화만 확인해 합칩니다.
+    """
+    started[ticker] = time.monotonic()
+    data = {}
+    with instrumentation.span('fetch.ticker', ticker=ticker):
+        if batch_price is not None:
+            price = dict(batch_price)
+            hint = price.pop('currency_hint', None)
+            price['currency'] = _resolve_currency(provider, ticker, hint if currency_hints else None)
+            data['price'] = price
+            kinds = [k for k in kinds if k != 'price']
+        for kind in kinds:
+            try:
+                data[kind] = getattr(provider, FETCHERS[kind])(ticker)
+            except Exception:
+                if kind not in OPTIONAL_KINDS:
+                    raise
+                # 배당 내역이 없어도 시세는 사용할 수 있도록 None 으로 대체
+                data[kind] = None
+    return data
+
+
+def fetch_all(tickers, provider, kinds=CORE_KINDS, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+              on_progress=None, batch_prices=True, currency_hints=True):
+    """
+    여러 종목의 데이터를 제한된 스레드 풀에서 동시에 가져옵니다.
+    현재가는 먼저 모든 종목을 한 번에 일괄 조회하고, 일괄 조회에서 빠진 종목만 종목별로 조회합니다.
+
+    Args:
+        tickers: 종목 티커 리스트 (중복은 한 번만 조회)
+        provider: get_price(ticker), get_info(ticker), get_dividends(ticker) 를 제공하는 객체
+                  (get_prices(tickers), get_currency(ticker) 가 있으면 현재가 일괄 조회에 사용,
+                   resolve_currency(ticker, hint) 가 있으면 저장된 통화로 get_currency 호출을 줄임)
+        kinds: 조회할 데이터 종류 ('price', 'info', 'dividends')
+        max_workers: 최대 동시 요청 수
+        timeout: 종목당 제한 시간(초). 초과 시 해당 종목은 오류로 처리
+        on_progress: 종목 하나가 끝날 때마다 호출되는 콜백 (done, total).
+                     호출 스레드에서 실행되므로 st.progress 갱신에 사용할 수 있습니다.
+        batch_prices: False 이면 현재가도 종목별로 조회 (벤치마크 비교용)
+        currency_hints: False 이면 저장된 통화가 없을 때 티커로 추정한 통화를 쓰지 않고 기다려 조회 (일괄 평가용)
+
+    Returns:
+        dict: {ticker: {kind: 값, ..., 'error': Exception or None}}
+              입력 순서를 유지합니다. 실패한 종목의 값은 None 입니다.
+    """
+    unique = list(dict.fromkeys(tickers))
+    results = {t: dict({k: None for k in kinds}, error=None) for t in unique}
+    if not unique:
+        return results
+
+    total = len(unique)
+    done_count = 0
+    started = {}
+    prices = _fetch_prices(provider, unique) if batch_prices and 'price' in kinds else {}
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, total)))
+    futures = {executor.submit(_fetch_one, provider, t, kinds, started, prices.get(t), currency_hints): t for t in unique}
+    pending = set(futures)
+
+    def _finish():
+        nonlocal done_count
+        done_count += 1
+        if on_progress:
+            on_progress(done_count, total)
+
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=min(0.2, timeout), return_when=FIRST_COMPLETED)
+            for future in done:
+                ticker = futures[future]
+                try:
+                    results[ticker].update(future.result())
+                except Exception as e:
+                    results[ticker]['error'] = e
+                _finish()
+
+            # 실행 시간이 제한을 넘긴 요청은 기다리지 않고 오류로 처리
+            now = time.monotonic()
+            expired = [f for f in pending if futures[f] in started and now - started[futures[f]] > timeout]
+            for future in expired:
+                pending.discard(future)
+                results[futures[future]]['error'] = TimeoutError(f"{timeout:g}초 내에 응답이 없습니다")
+                _finish()
+    finally:
+        # 타임아웃된 스레드는 강제로 중단할 수 없으므로 기다리지 않고 반환
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
@@ -0,0 +1,123 @@
+import time
+import threading
+import pandas as pd
+from . import instrumentation
+
+# 이동평균/RSI 기간
+MA_WINDOWS = (20, 60)
+RSI_WINDOW = 14
+
+# 차트에 보여줄 기간 (처음 조회 시 이 기간만큼 받아옴)
+HISTORY_PERIOD = '1y'
+HISTORY_YEARS = 1
+
+PRICE_COLUMNS = ['Open', 'High', 'Low', 'Close']
+
+# 새 봉의 지표를 계산할 때 필요한 직전 봉 수 (가장 긴 이동평균 기간)
+TAIL_BARS = max(max(MA_WINDOWS), RSI_WINDOW + 1)
+
+
+def compute_indicators(prices):
+    """
+    일봉 DataFrame(Open/High/Low/Close)에 MA20, MA60, RSI 컬럼을 붙여 반환합니다.
+    RSI 는 기존 화면과 같이 14일 단순 평균 상승/하락폭 기준입니다.
+    """
+    df = prices[PRICE_COLUMNS].copy()
+    close = df['Close']
+    for window in MA_WINDOWS:
+        df[f'MA{window}'] = close.rolling(window=window).mean()
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=RSI_WINDOW).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=RSI_WINDOW).mean()
+    df['RSI'] = 100 - (100 / (1 + gain / loss))
+    return df
+
+
+class IndicatorEngine:
+    """
+    환율 일봉과 기술적 지표를 보관하고 증분 갱신하는 엔진.
+
+    처음에만 1년치 일봉을 받고, 이후에는 마지막 저장일 이후의 봉만 받아
+    직전 TAIL_BARS 개 봉과 함께 새 봉의 지표만 계산합니다. (갱신 비용 O(새 봉 수))
+    마지막 봉은 장중에 계속 바뀌므로 갱신 시 다시 받아 덮어씁니다.
+
+    Args:
+        ticker: 환율 심볼 (예: "KRW=X")
+        fetch_history: fetch_history(start) -> 일봉 DataFrame. start 가 None 이면 전체 기간
+                       (기본값: yfinance)
+        cache: 재시작 후에도 이력을 유지할 MarketCache (선택)
+    """
+
+    CACHE_KIND = 'fx_history'
+
+    def __init__(self, ticker="KRW=X", fetch_history=None, cache=None):
+        self.ticker = ticker
+        self.fetch_history = fetch_history or self._fetch_yfinance
+        self.cache = cache
+        self.history = None
+        self.last_fetched_bars = 0
+        self.fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def _fetch_yfinance(self, start=None):
+        import yfinance as yf
+        instrumentation.count('network.fx_history')
+        stock = yf.Ticker(self.ticker)
+        if start is None:
+            return stock.history(period=HISTORY_PERIOD, interval="1d")
+        return stock.history(start=start.strftime('%Y-%m-%d'), interval="1d")
+
+    def _load_cached(self):
+        if self.cache is None:
+            return None
+        history, _ = self.cache.get(self.ticker, self.CACHE_KIND)
+        return history
+
+    def _full_reload(self):
+        bars = self.fetch_history(None)
+        self.last_fetched_bars = len(bars)
+        if bars.empty:
+            return
+        self.history = compute_indicators(bars)
+
+    def _append(self, bars):
+        """마지막 저장일부터의 봉으로 이력을 갱신합니다. (마지막 저장 봉은 새 값으로 교체)"""
+        kept = self.history[self.history.index < bars.index[0]]
+        tail = kept.iloc[-TAIL_BARS:]
+        updated = compute_indicators(pd.concat([tail[PRICE_COLUMNS], bars[PRICE_COLUMNS]]))
+        history = pd.concat([kept, updated.iloc[len(tail):]])
+        cutoff = history.index[-1] - pd.DateOffset(years=HISTORY_YEARS)
+        self.history = history[history.index >= cutoff]
+
+    def refresh(self, max_age=0):
+        """
+        새 봉을 반영한 일봉+지표 DataFrame 을 반환합니다. (조회 실패 시 기존 이력 유지)
+        마지막 조회 시도 후 max_age 초가 지나지 않았으면 조회하지 않고 보관 중인 이력을 반환합니다.
+        Returns:
+            DataFrame: Open/High/Low/Close/MA20/MA60/RSI 컬럼, 이력이 없으면 None
+        """
+        with self._lock:
+            if self.history is None:
+                self.history = self._load_cached()
+            if self.history is not None and time.time() - self.fetched_at < max_age:
+                return self.history
+
+            self.fetched_at = time.time()
+            try:
+                if self.history is None or self.history.empty:
+                    self._full_reload()
+                else:
+                    last_date = self.history.index[-1]
+                    bars = self.fetch_history(last_date)
+                    bars = bars[bars.index >= last_date] if not bars.empty else bars
+                    self.last_fetched_bars = len(bars)
+                    if not bars.empty:
+                        self._append(bars)
+            except Exception as e:
+                print(f"Exchange history update error ({self.ticker}): {e}")
+                return self.history
+
+            if self.cache is not None and self.history is not None:
+                self.cache.set(self.ticker, self.CACHE_KIND, self.history)
+            return self.history
@@ -0,0 +1,183 @@
+import time
+import threading
+import pandas as pd
+from . import instrumentation
+
+# 평가 기준 통화
+BASE_CURRENCY = 'KRW'
+
+# 환율 유효 시간(초)
+RATE_TTL = 300
+
+# 보조 단위로 호가되는 통화 (예: 런던 증시의 GBp = 1/100 파운드)
+MINOR_UNITS = {
+    'GBp': ('GBP', 0.01),
+    'GBX': ('GBP', 0.01),
+    'ZAc': ('ZAR', 0.01),
+    'ZAC': ('ZAR', 0.01),
+    'ILA': ('ILS', 0.01),
+}
+
+
+def split_currency(code):
+    """통화 코드를 (주 통화, 배수)로 나눕니다. 예: 'GBp' -> ('GBP', 0.01)"""
+    if code in MINOR_UNITS:
+        return MINOR_UNITS[code]
+    return code.upper(), 1.0
+
+
+def pair_symbol(currency, base=BASE_CURRENCY):
+    """yfinance 환율 심볼 (예: USDKRW=X)"""
+    return f"{currency}{base}=X"
+
+
+def download_rates(currencies, base=BASE_CURRENCY):
+    """
+    여러 통화의 기준 통화 환율을 yf.download 한 번으로 가져옵니다.
+
+    Returns:
+        dict: {통화: 1 통화당 기준 통화 금액} (조회되지 않은 통화는 제외)
+    """
+    import yfinance as yf
+    symbols = [pair_symbol(c, base) for c in currencies]
+    instrumentation.count('network.fx_rates')
+    data = yf.download(symbols, period="5d", interval="1d", progress=False, auto_adjust=False)
+    if data is None or data.empty:
+        return {}
+    close = data['Close']
+    if isinstance(close, pd.Series):
+        close = close.to_frame(symbols[0])
+    last = close.ffill().iloc[-1]
+
+    rates = {}
+    for currency, symbol in zip(currencies, symbols):
+        rate = last.get(symbol)
+        if rate is not None and pd.notna(rate) and rate > 0:
+            rates[currency] = float(rate)
+    return rates
+
+
+class RateTable:
+    """
+    통화별 기준 통화(KRW) 환율표.
+    포트폴리오에 필요한 통화 중 만료되었거나 없는 것만 모아 한 번에 조회하고 TTL 동안 재사용합니다.
+    통화 간 교차 환율은 기준 통화 환율의 비율(rate[a] / rate[b])로 구할 수 있습니다.
+
+    Args:
+        base: 기준 통화
+        ttl: 환율 유효 시간(초)
+        fetch_rates: fetch_rates(currencies, base) -> {통화: 환율} (기본값: yfinance 일괄 조회)
+    """
+
+    def __init__(self, base=BASE_CURRENCY, ttl=RATE_TTL, fetch_rates=None):
+        self.base = base
+        self.ttl = ttl
+        self.fetch_rates = fetch_rates or download_rates
+        # True 이면 만료된 환율도 그대로 사용하고 없는 통화만 조회 (백그라운드 갱신 중)
+        self.serve_stale = False
+        self._rates = {}  # {주 통화: (조회 시각, 환율)}
+        self._lock = threading.Lock()
+
+    def _refresh(self, currencies, force=False):
+        now = time.time()
+        with self._lock:
+            expired = sorted(c for c in currencies
+                             if c not in self._rates or force
+                             or (not self.serve_stale and now - self._rates[c][0] >= self.ttl))
+        if not expired:
+            return
+        try:
+            fetched = self.fetch_rates(expired, self.base)
+        except Exception as e:
+            # 조회 실패 시 만료된 환율이라도 계속 사용
+            print(f"Error fetching exchange rates {expired}: {e}")
+            return
+        with self._lock:
+            for currency, rate in fetched.items():
+                self._rates[currency] = (now, rate)
+
+    def rates_for(self, currencies):
+        """
+        통화 코드별 기준 통화 환산율을 반환합니다. (보조 단위 통화는 배수 반영)
+
+        Returns:
+            dict: {통화 코드: 환산율}. 환율을 구하지 못한 통화는 제외됩니다.
+        """
+        codes = {c for c in currencies if isinstance(c, str) and c}
+        majors = {split_currency(c)[0] for c in codes} - {self.base}
+        self._refresh(majors)
+
+        rates = {}
+        with self._lock:
+            for code in codes:
+                major, factor = split_currency(code)
+                if major == self.base:
+                    rates[code] = factor
+                elif major in self._rates:
+                    rates[code] = self._rates[major][1] * factor
+        return rates
+
+    def refresh(self, currencies):
+        """만료 여부와 관계없이 주어진 통화들의 환율을 다시 조회합니다."""
+        majors = {split_currency(c)[0] for c in currencies if isinstance(c, str) and c} - {self.base}
+        self._refresh(majors, force=True)
+
+    def snapshot(self, currencies):
+        """주어진 통화들의 현재 환산율을 RateSnapshot 으로 고정합니다."""
+        return RateSnapshot(self.rates_for(currencies), base=self.base)
+
+    def clear(self):
+        with self._lock:
+            self._rates.clear()
+
+
+class RateSnapshot:
+    """
+    한 시점의 통화 코드별 기준 통화 환산율 (보조 단위 배수 반영).
+    평가 시 사용한 환율을 그대로 리밸런싱 계산에 넘기기 위한 값 객체입니다.
+
+    Attributes:
+        rates: {통화 코드: 환산율}
+        as_of: 스냅샷 생성 시각 (epoch 초)
+    """
+
+    def __init__(self, rates=None, base=BASE_CURRENCY, as_of=None):
+        self.rates = dict(rates or {})
+        self.base = base
+        self.as_of = time.time() if as_of is None else as_of
+
+    def rate(self, currency):
+        """통화 코드의 환산율 (없으면 None)"""
+        return self.rates.get(currency)
+
+    def column(self, currencies):
+        """통화 코드 배열을 환산율 배열로 바꿉니다. (없는 통화는 NaN)"""
+        return pd.Series(currencies).map(self.rates).to_numpy(dtype=float)
+
+    def rates_for(self, currencies):
+        return {c: self.rates[c] for c in currencies if c in self.rates}
+
+    def snapshot(self, currencies):
+        """이미 고정된 값이므로 자신을 반환합니다. (환율표 자리에 그대로 넘길 수 있음)"""
+        return self
+
+
+class StaticRates:
+    """고정 환율표 (검증/벤치마크용). RateTable 과 같은 rates_for/snapshot 인터페이스를 가집니다."""
+
+    def __init__(self, rates, base=BASE_CURRENCY):
+        self.rates = dict(rates)
+        self.base = base
+
+    def snapshot(self, currencies):
+        return RateSnapshot(self.rates_for(currencies), base=self.base)
+
+    def rates_for(self, currencies):
+        rates = {}
+        for code in set(currencies):
+            major, factor = split_currency(code)
+            if major == self.base:
+                rates[code] = factor
+            elif major in self.rates:
+                rates[code] = self.rates[major] * factor
+        return rates
@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+
+# 누적 배당 수익을 보여줄 기간(년)
+HORIZONS = (1, 3, 5, 10)
+PERCENTILES = (5, 25, 50, 75, 95)
+
+# 시뮬레이션 경로 수 / 한 번에 계산하는 경로 수 (메모리 사용량 = 묶음 x 종목 수)
+DEFAULT_PATHS = 10000
+CHUNK_PATHS = 2000
+
+# 배당 성장률 추정에 사용할 과거 기간(년, 최근 1년 단위 합계끼리 비교)
+FIT_YEARS = 5
+# 연 배당 합계가 이 비율 이상 줄어든 해는 배당 삭감으로 봄
+CUT_THRESHOLD = 0.10
+
+# 이력이 짧은 종목에 적용하는 기본값 (관측 연수가 PRIOR_YEARS 만큼 있다고 보고 섞음)
+PRIOR_YEARS = 3
+DEFAULT_GROWTH_MEAN = 0.03   # 연 로그 성장률 평균
+DEFAULT_GROWTH_STD = 0.05    # 연 로그 성장률 표준편차
+DEFAULT_CUT_PROB = 0.05      # 연 배당 삭감 확률
+DEFAULT_CUT_DEPTH = 0.30     # 삭감 시 감소 비율
+
+# 주가 경로 (배당 재투자 시 매수 단가) - 연 기대수익률/변동성, 종목 간 공통 시장 요인 비중
+PRICE_DRIFT = 0.05
+PRICE_VOLATILITY = 0.18
+MARKET_CORRELATION = 0.6
+
+MODEL_COLUMNS = ['Growth Mean', 'Growth Std', 'Cut Prob', 'Cut Depth', 'Years Observed']
+
+
+def fit_dividend_model(history, tickers, now=None, years=FIT_YEARS):
+    """
+    종목별 배당 이력에서 연 배당 성장률 분포와 삭감 확률을 추정합니다.
+    최근 1년 단위 배당 합계를 연도별로 비교하며, 관측 연수가 적은 종목은 기본값 쪽으로 당겨집니다.
+
+    Args:
+        history: Ticker, Date, Amount 컬럼의 배당 이력 (dividend_projection.build_history_frame 형식)
+        tickers: 추정할 종목 목록
+
+    Returns:
+        DataFrame: index=Ticker, MODEL_COLUMNS (성장률은 연 로그 성장률)
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    totals = np.zeros((len(tickers), years))
+    if history is not None and not history.empty:
+        # 배당일이 몇 번째 과거 1년 구간에 속하는지 (0 = 최근 1년)
+        age_days = (now - pd.to_datetime(history['Date'])).dt.days.to_numpy()
+        window = age_days // 365
+        row = pd.Index(tickers).get_indexer(history['Ticker'])
+        valid = (row >= 0) & (age_days >= 0) & (window < years)
+        np.add.at(totals, (row[valid], window[valid]), history['Amount'].to_numpy(dtype=float)[valid])
+
+    # 연도별 변화율 (앞뒤 구간 모두 배당이 있는 경우만)
+    recent, previous = totals[:, :-1], totals[:, 1:]
+    observed = (recent > 0) & (previous > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_change = np.where(observed, np.log(recent / np.where(previous > 0, previous, 1.0)), 0.0)
+    cut = observed & (log_change < np.log(1 - CUT_THRESHOLD))
+    growth = observed & ~cut
+
+    n_obs = observed.sum(axis=1)
+    n_growth = growth.sum(axis=1)
+    n_cut = cut.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth_mean = np.where(n_growth > 0, (log_change * growth).sum(axis=1) / n_growth, DEFAULT_GROWTH_MEAN)
+        growth_var = np.where(n_growth > 1,
+                              (((log_change - growth_mean[:, None]) ** 2) * growth).sum(axis=1) / np.maximum(n_growth - 1, 1),
+                              DEFAULT_GROWTH_STD ** 2)
+        cut_depth = np.where(n_cut > 0, (-np.expm1(log_change) * cut).sum(axis=1) / n_cut, DEFAULT_CUT_DEPTH)
+
+    weight = n_growth / (n_growth + PRIOR_YEARS)
+    return pd.DataFrame({
+        'Growth Mean': weight * growth_mean + (1 - weight) * DEFAULT_GROWTH_MEAN,
+        'Growth Std': np.sqrt(weight * growth_var + (1 - weight) * DEFAULT_GROWTH_STD ** 2),
+        'Cut Prob': (n_cut + DEFAULT_CUT_PROB * PRIOR_YEARS) / (n_obs + PRIOR_YEARS),
+        'Cut Depth': cut_depth,
+        'Years Observed': n_obs,
+    }, index=pd.Index(tickers, name='Ticker'))[MODEL_COLUMNS]
+
+
+def _simulate_chunk(rng, n_paths, years, shares, dividend, price, fx, model, drip):
+    """경로 n_paths 개의 연도별 원화 배당 수익 배열 (n_paths, years)"""
+    n_tickers = len(shares)
+    shares = np.broadcast_to(shares, (n_paths, n_tickers)).copy()
+    dividend = np.broadcast_to(dividend, (n_paths, n_tickers)).copy()
+    price = np.broadcast_to(price, (n_paths, n_tickers)).copy()
+    income = np.empty((n_paths, years))
+
+    price_mu = PRICE_DRIFT - PRICE_VOLATILITY ** 2 / 2
+    idio = np.sqrt(1 - MARKET_CORRELATION)
+    for year in range(years):
+        # 배당 성장 + 삭감 (첫해는 현재 연 배당금 그대로)
+        if year > 0:
+            growth = rng.standard_normal((n_paths, n_tickers)) * model['Growth Std'] + model['Growth Mean']
+            cut = rng.random((n_paths, n_tickers)) < model['Cut Prob']
+            growth += cut * np.log1p(-model['Cut Depth'])
+            dividend *= np.exp(growth)
+
+        cash = shares * dividend
+        income[:, year] = cash @ fx
+        if drip:
+            # 주가 (공통 시장 요인 + 종목 요인) - 재투자 단가에만 사용
+            shock = np.sqrt(MARKET_CORRELATION) * rng.standard_normal((n_paths, 1)) \
+                + idio * rng.standard_normal((n_paths, n_tickers))
+            shock *= PRICE_VOLATILITY
+            shock += price_mu
+            price *= np.exp(shock)
+            shares += cash / price
+    return income
+
+
+def forecast_income(df_result, history, horizons=HORIZONS, n_paths=DEFAULT_PATHS, drip=False, seed=None,
+                    chunk_size=CHUNK_PATHS, now=None, model=None):
+    """
+    종목별 배당 성장/삭감과 주가 경로를 몬테카를로로 시뮬레이션하여 누적 배당 수익 분포를 구합니다.
+    경로를 chunk_size 개씩 나누어 배열 연산으로 계산하므로 경로 수가 많아도 메모리 사용량이 일정합니다.
+    환율은 현재 값으로 고정합니다.
+
+    Args:
+        df_result: compute_positions 결과 (Ticker, Quantity, Current Price, FX Rate, Annual Dividend (KRW))
+        history: 배당 이력 (Ticker, Date, Amount)
+        drip: True 이면 받은 배당으로 같은 종목을 그 해 말 주가에 다시 매수
+        seed: 난수 시드 (같은 시드, 같은 chunk_size 면 같은 결과)
+        model: fit_dividend_model 결과 (없으면 history 로 추정)
+
+    Returns:
+        DataFrame: index=기간(년), 컬럼 P5/P25/P50/P75/P95/Mean (누적 원화 배당 수익)
+    """
+    columns = [f"P{p}" for p in PERCENTILES] + ['Mean']
+    horizons = sorted(horizons)
+    if df_result.empty or not horizons:
+        return pd.DataFrame(columns=columns, index=pd.Index(horizons, name='Years'), dtype=float)
+
+    tickers = df_result['Ticker'].tolist()
+    shares = df_result['Quantity'].to_numpy(dtype=float)
+    fx = df_result['FX Rate'].to_numpy(dtype=float)
+    price = df_result['Current Price'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dividend = np.where((shares > 0) & (fx > 0),
+                            df_result['Annual Dividend (KRW)'].to_numpy(dtype=float) / (shares * fx), 0.0)
+    # 주가를 모르는 종목은 재투자하지 않음
+    price = np.where(price > 0, price, np.inf)
+
+    if model is None:
+        model = fit_dividend_model(history, tickers, now=now)
+    params = {c: model[c].reindex(tickers).to_numpy(dtype=float) for c in ('Growth Mean', 'Growth Std', 'Cut Prob', 'Cut Depth')}
+
+    rng = np.random.default_rng(seed)
+    years = horizons[-1]
+    cumulative = np.empty((n_paths, len(horizons)))
+    horizon_index = np.array(horizons) - 1
+    for start in range(0, n_paths, chunk_size):
+        size = min(chunk_size, n_paths - start)
+        income = _simulate_chunk(rng, size, years, shares, dividend, price, fx, params, drip)
+        cumulative[start:start + size] = np.cumsum(income, axis=1)[:, horizon_index]
+
+    bands = np.percentile(cumulative, PERCENTILES, axis=0).T
+    result = pd.DataFrame(bands, columns=columns[:-1], index=pd.Index(horizons, name='Years'))
+    result['Mean'] = cumulative.mean(axis=0)
+    return result
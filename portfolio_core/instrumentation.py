@@ -0,0 +1,190 @@
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+
+# DIVIDEND_DIAGNOSTICS=0 이면 기록하지 않음 (측정 비용도 없음)
+ENABLED = os.environ.get('DIVIDEND_DIAGNOSTICS', '1') != '0'
+
+# 메모리에 보관하는 최근 구간/실행 기록 수
+MAX_SPANS = 20000
+MAX_RUNS = 200
+
+SUMMARY_COLUMNS = ['Stage', 'Calls', 'Total (ms)', 'Mean (ms)', 'P50 (ms)', 'P95 (ms)', 'Max (ms)']
+
+
+class Recorder:
+    """
+    구간(span) 소요 시간, 카운터, 화면 실행(rerun) 시간을 모아 두는 스레드 안전 기록기.
+    최근 MAX_SPANS 개 구간만 보관하므로 오래 실행해도 메모리가 일정합니다.
+    """
+
+    def __init__(self, max_spans=MAX_SPANS, max_runs=MAX_RUNS):
+        self.spans = deque(maxlen=max_spans)
+        self.runs = deque(maxlen=max_runs)
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._run_seq = 0
+
+    @property
+    def run_id(self):
+        """현재 스레드에서 진행 중인 화면 실행 번호 (백그라운드 스레드는 None)"""
+        return getattr(self._local, 'run', None)
+
+    def record_span(self, name, started, elapsed, attrs):
+        entry = {'type': 'span', 'name': name, 'run': self.run_id, 'thread': threading.current_thread().name,
+                 'start': started, 'ms': elapsed * 1000}
+        entry.update(attrs)
+        with self._lock:
+            self.spans.append(entry)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def counter_values(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def start_run(self, label=None):
+        with self._lock:
+            self._run_seq += 1
+            run = self._run_seq
+        self._local.run = run
+        self._local.run_started = (time.time(), time.perf_counter(), label)
+        return run
+
+    def finish_run(self):
+        """현재 실행을 마치고 소요 시간(ms)을 기록합니다. (중간에 st.rerun 으로 끊긴 실행은 기록되지 않음)"""
+        run = self.run_id
+        if run is None:
+            return None
+        started, perf_started, label = self._local.run_started
+        elapsed = (time.perf_counter() - perf_started) * 1000
+        with self._lock:
+            self.runs.append({'type': 'run', 'run': run, 'label': label, 'start': started, 'ms': elapsed})
+        self._local.run = None
+        return elapsed
+
+    def summary(self, run=None):
+        """구간 이름별 호출 수와 소요 시간 통계 (run 을 주면 그 실행의 구간만)"""
+        with self._lock:
+            spans = [s for s in self.spans if run is None or s['run'] == run]
+        if not spans:
+            return pd.DataFrame(columns=SUMMARY_COLUMNS)
+        df = pd.DataFrame({'Stage': [s['name'] for s in spans], 'ms': [s['ms'] for s in spans]})
+        grouped = df.groupby('Stage')['ms']
+        result = pd.DataFrame({
+            'Calls': grouped.size(),
+            'Total (ms)': grouped.sum(),
+            'Mean (ms)': grouped.mean(),
+            'P50 (ms)': grouped.median(),
+            'P95 (ms)': grouped.quantile(0.95),
+            'Max (ms)': grouped.max(),
+        }).reset_index()
+        return result.sort_values('Total (ms)', ascending=False, kind='stable')[SUMMARY_COLUMNS].reset_index(drop=True)
+
+    def by_ticker(self, name):
+        """ticker 속성이 있는 구간의 종목별 소요 시간 (평균/최대 ms, 호출 수)"""
+        with self._lock:
+            spans = [s for s in self.spans if s['name'] == name and 'ticker' in s]
+        if not spans:
+            return pd.DataFrame(columns=['Ticker', 'Calls', 'Mean (ms)', 'Max (ms)'])
+        df = pd.DataFrame({'Ticker': [s['ticker'] for s in spans], 'ms': [s['ms'] for s in spans]})
+        grouped = df.groupby('Ticker')['ms']
+        return pd.DataFrame({'Calls': grouped.size(), 'Mean (ms)': grouped.mean(), 'Max (ms)': grouped.max()}) \
+            .reset_index().sort_values('Mean (ms)', ascending=False, kind='stable').reset_index(drop=True)
+
+    def cache_ratios(self):
+        """'cache.<이름>.hit' / '.miss' 카운터로 캐시별 적중률을 계산합니다."""
+        counters = self.counter_values()
+        caches = {}
+        for key, value in counters.items():
+            parts = key.split('.')
+            if len(parts) == 3 and parts[0] == 'cache':
+                caches.setdefault(parts[1], {})[parts[2]] = value
+        rows = []
+        for cache, counts in sorted(caches.items()):
+            hits, misses = counts.get('hit', 0), counts.get('miss', 0)
+            rows.append({'Cache': cache, 'Hits': hits, 'Misses': misses, 'Stale': counts.get('stale', 0),
+                         'Hit Ratio': hits / (hits + misses) if hits + misses else np.nan})
+        return pd.DataFrame(rows, columns=['Cache', 'Hits', 'Misses', 'Stale', 'Hit Ratio'])
+
+    def run_durations(self):
+        with self._lock:
+            return pd.DataFrame(list(self.runs), columns=['run', 'label', 'start', 'ms'])
+
+    def to_jsonl(self):
+        """구간/실행 기록과 현재 카운터를 JSON lines 문자열로 내보냅니다. (오프라인 분석용)"""
+        with self._lock:
+            records = list(self.spans) + list(self.runs)
+            records.append({'type': 'counters', 'time': time.time(), 'counters': dict(self.counters)})
+        return "".join(json.dumps(r, ensure_ascii=False, default=str) + "\n" for r in records)
+
+    def export_jsonl(self, path):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(self.to_jsonl())
+
+    def reset(self):
+        with self._lock:
+            self.spans.clear()
+            self.runs.clear()
+            self.counters.clear()
+
+
+_recorder = Recorder()
+
+
+def get_recorder():
+    return _recorder
+
+
+@contextmanager
+def span(name, **attrs):
+    """
+    with span("stage", ticker="AAPL"): ... 구간의 소요 시간을 기록합니다.
+    예외가 나도 기록하며, 이때 error 속성에 예외 이름이 남습니다.
+    """
+    if not ENABLED:
+        yield
+        return
+    started = time.time()
+    perf_started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        attrs['error'] = type(e).__name__
+        raise
+    finally:
+        _recorder.record_span(name, started, time.perf_counter() - perf_started, attrs)
+
+
+def timed(name):
+    """함수 호출 전체를 name 구간으로 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, n=1):
+    """카운터 증가 (네트워크 호출 수: 'network.<종류>', 캐시: 'cache.<이름>.hit/miss/stale')"""
+    if ENABLED:
+        _recorder.count(name, n)
+
+
+def start_run(label=None):
+    return _recorder.start_run(label) if ENABLED else None
+
+
+def finish_run():
+    return _recorder.finish_run() if ENABLED else None
@@ -0,0 +1,330 @@
+import sqlite3
+from datetime import date
+import pandas as pd
+from .portfolio_store import PortfolioStore, DEFAULT_USER, DEFAULT_PORTFOLIO
+
+# 거래 종류
+BUY = 'BUY'            # 매수: quantity 주를 price 에 (수수료 fee 포함)
+SELL = 'SELL'          # 매도: quantity 주를 price 에 (수수료 fee 차감)
+DIVIDEND = 'DIVIDEND'  # 배당 수령: amount (현지 통화, 세후 금액)
+SPLIT = 'SPLIT'        # 주식 분할/병합: quantity = 분할 비율 (2:1 분할이면 2, 1:10 병합이면 0.1)
+KINDS = (BUY, SELL, DIVIDEND, SPLIT)
+# 수량 조정: quantity = 증감 수량 (원장 밖에서 입력한 보유 수량, 기초 잔고). 취득원가는 모름
+# 사용자가 입력하는 거래가 아니라 편집기/CSV 가져오기/첫 거래 기록 시 원장이 자동으로 추가합니다.
+ADJUST = 'ADJUST'
+
+# 수량이 이 값 이하로 남으면 전량 매도로 처리
+QUANTITY_EPSILON = 1e-9
+
+LEDGER_POSITION_COLUMNS = ['Ticker', 'Quantity', 'Cost Basis', 'Avg Cost', 'Realized Gain', 'Dividends Received']
+TRANSACTION_COLUMNS = ['Date', 'Ticker', 'Kind', 'Quantity', 'Price', 'Amount', 'Fee']
+
+
+def empty_position():
+    return {'quantity': 0.0, 'cost': 0.0, 'realized': 0.0, 'dividends': 0.0, 'uncosted': 0.0, 'last_date': None}
+
+
+def apply_transaction(position, kind, quantity=0.0, price=0.0, amount=0.0, fee=0.0, trade_date=None):
+    """
+    거래 한 건을 종목 누적값에 반영한 새 누적값을 반환합니다. (이동평균법, 모두 현지 통화)
+    누적값: quantity(보유 수량), cost(보유분 취득원가), realized(실현 손익), dividends(배당 수령액),
+            uncosted(보유 수량 중 취득원가를 모르는 수량 - 수량 조정으로 들어온 주식)
+    취득원가를 모르는 주식을 매도한 금액은 실현 손익에 넣지 않습니다.
+    """
+    position = dict(position)
+    if kind == BUY:
+        position['quantity'] += quantity
+        position['cost'] += quantity * price + fee
+    elif kind == SELL:
+        if quantity > position['quantity'] + QUANTITY_EPSILON:
+            raise ValueError(f"보유 수량({position['quantity']:g})보다 많이 매도할 수 없습니다")
+        sold_cost, sold_uncosted = _remove(position, quantity)
+        position['realized'] += (quantity - sold_uncosted) * price - fee - sold_cost
+    elif kind == DIVIDEND:
+        position['dividends'] += amount
+    elif kind == SPLIT:
+        if quantity <= 0:
+            raise ValueError("분할 비율은 0보다 커야 합니다")
+        position['quantity'] *= quantity
+        position['uncosted'] *= quantity
+    elif kind == ADJUST:
+        if quantity >= 0:
+            position['quantity'] += quantity
+            position['uncosted'] += quantity
+        else:
+            _remove(position, min(-quantity, position['quantity']))
+    else:
+        raise ValueError(f"알 수 없는 거래 종류: {kind}")
+    if trade_date is not None:
+        position['last_date'] = max(position['last_date'] or trade_date, trade_date)
+    return position
+
+
+def _remove(position, quantity):
+    """보유분에서 quantity 주를 평균 원가로 덜어냅니다. (덜어낸 취득원가, 덜어낸 원가 모르는 수량)"""
+    share = quantity / position['quantity'] if position['quantity'] > 0 else 0.0
+    removed_cost, removed_uncosted = position['cost'] * share, position['uncosted'] * share
+    position['cost'] -= removed_cost
+    position['uncosted'] -= removed_uncosted
+    position['quantity'] -= quantity
+    if position['quantity'] <= QUANTITY_EPSILON:
+        position['quantity'] = 0.0
+        position['cost'] = 0.0
+        position['uncosted'] = 0.0
+    return removed_cost, removed_uncosted
+
+
+class TransactionLedger:
+    """
+    매수/매도/배당/분할 거래 원장.
+    거래 원장(transactions)과 함께 종목별 누적값(ledger_positions)을 보관하여,
+    거래를 추가할 때 원장 전체를 다시 계산하지 않고 해당 종목 누적값 한 줄만 갱신합니다. (O(1))
+    마지막 거래일보다 이전 날짜의 거래가 들어오면 그 종목의 거래만 다시 계산합니다.
+    보유 수량은 같은 트랜잭션에서 포트폴리오 저장소(holdings)에도 반영됩니다.
+    원장 밖에서 입력한 보유 수량(CSV 가져오기, 편집기)은 수량 조정(ADJUST) 거래로 원장에 맞춥니다.
+
+    Args:
+        store: 같은 SQLite 파일을 사용하는 PortfolioStore (기본값: 기본 DB)
+    """
+
+    def __init__(self, store=None):
+        self.store = store or PortfolioStore()
+        self.path = self.store.path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transactions ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " user_id TEXT NOT NULL,"
+                " portfolio_id TEXT NOT NULL,"
+                " ticker TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " trade_date TEXT NOT NULL,"
+                " quantity REAL NOT NULL DEFAULT 0,"
+                " price REAL NOT NULL DEFAULT 0,"
+                " amount REAL NOT NULL DEFAULT 0,"
+                " fee REAL NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS transactions_by_ticker "
+                "ON transactions (user_id, portfolio_id, ticker, trade_date, id)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS ledger_positions ("
+                " user_id TEXT NOT NULL,"
+                " portfolio_id TEXT NOT NULL,"
+                " ticker TEXT NOT NULL,"
+                " quantity REAL NOT NULL,"
+                " cost REAL NOT NULL,"
+                " realized REAL NOT NULL,"
+                " dividends REAL NOT NULL,"
+                " last_date TEXT,"
+                " uncosted REAL NOT NULL DEFAULT 0,"
+                " PRIMARY KEY (user_id, portfolio_id, ticker))"
+            )
+            # 이전 버전 DB: 원가 모르는 수량 열 추가
+            columns = [r[1] for r in conn.execute("PRAGMA table_info(ledger_positions)")]
+            if 'uncosted' not in columns:
+                conn.execute("ALTER TABLE ledger_positions ADD COLUMN uncosted REAL NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _load_position(self, conn, user_id, portfolio_id, ticker):
+        row = conn.execute(
+            "SELECT quantity, cost, realized, dividends, uncosted, last_date FROM ledger_positions "
+            "WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+            (user_id, portfolio_id, ticker)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('quantity', 'cost', 'realized', 'dividends', 'uncosted', 'last_date'), row))
+
+    def _holding_quantity(self, conn, user_id, portfolio_id, ticker):
+        row = conn.execute(
+            "SELECT quantity FROM holdings WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+            (user_id, portfolio_id, ticker)
+        ).fetchone()
+        return float(row[0]) if row else 0.0
+
+    def _adjustment(self, conn, user_id, portfolio_id, ticker, position, trade_date):
+        """
+        보유 수량(holdings)이 원장 누적값과 다르면 차이를 맞추는 수량 조정 거래 (trade_date, 증감 수량) 를,
+        같으면 None 을 반환합니다. 조정은 원장의 마지막 거래일 이후에 일어난 것으로 기록합니다.
+        """
+        delta = self._holding_quantity(conn, user_id, portfolio_id, ticker) - position['quantity']
+        if abs(delta) <= QUANTITY_EPSILON:
+            return None
+        return max(trade_date, position['last_date'] or trade_date), delta
+
+    def _replay(self, conn, user_id, portfolio_id, ticker):
+        """한 종목의 거래를 날짜순으로 다시 계산합니다."""
+        position = empty_position()
+        rows = conn.execute(
+            "SELECT kind, quantity, price, amount, fee, trade_date FROM transactions "
+            "WHERE user_id = ? AND portfolio_id = ? AND ticker = ? ORDER BY trade_date, id",
+            (user_id, portfolio_id, ticker)
+        ).fetchall()
+        for row in rows:
+            position = apply_transaction(position, *row)
+        return position
+
+    def _save_positions(self, conn, user_id, portfolio_id, positions):
+        """종목 누적값을 저장하고 보유 수량을 holdings 에 반영합니다. (목표 비중은 유지)"""
+        conn.executemany(
+            "INSERT OR REPLACE INTO ledger_positions "
+            "(user_id, portfolio_id, ticker, quantity, cost, realized, dividends, uncosted, last_date) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(user_id, portfolio_id, t, p['quantity'], p['cost'], p['realized'], p['dividends'], p['uncosted'],
+              p['last_date'])
+             for t, p in positions.items()]
+        )
+        held = [(t, p['quantity']) for t, p in positions.items() if p['quantity'] > 0]
+        sold_out = [t for t, p in positions.items() if p['quantity'] <= 0]
+        conn.executemany(
+            "DELETE FROM holdings WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+            [(user_id, portfolio_id, t) for t in sold_out]
+        )
+        next_position = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM holdings WHERE user_id = ? AND portfolio_id = ?",
+            (user_id, portfolio_id)
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO holdings (user_id, portfolio_id, ticker, quantity, target_ratio, position) "
+            "VALUES (?, ?, ?, ?, 0, ?) "
+            "ON CONFLICT (user_id, portfolio_id, ticker) DO UPDATE SET quantity = excluded.quantity",
+            [(user_id, portfolio_id, t, q, next_position + i) for i, (t, q) in enumerate(held)]
+        )
+        self.store._touch(conn, user_id, portfolio_id)
+
+    def record(self, user_id, portfolio_id, ticker, kind, quantity=0.0, price=0.0, amount=0.0, fee=0.0,
+               trade_date=None):
+        """거래 한 건을 추가합니다. 매도 수량이 보유 수량보다 많으면 ValueError 를 발생시킵니다."""
+        self.record_many(user_id, portfolio_id, [{
+            'ticker': ticker, 'kind': kind, 'quantity': quantity, 'price': price,
+            'amount': amount, 'fee': fee, 'trade_date': trade_date,
+        }])
+
+    def record_many(self, user_id, portfolio_id, transactions):
+        """
+        여러 거래를 한 트랜잭션으로 추가합니다. (가져오기/일괄 입력)
+        transactions: ticker, kind, quantity, price, amount, fee, trade_date 키를 가진 dict 목록
+        하나라도 실패하면 아무것도 저장하지 않습니다.
+        """
+        today = date.today().isoformat()
+        with self._connect() as conn:
+            positions = {}
+            replay = set()
+            rows = []
+            for txn in transactions:
+                ticker = txn['ticker'].strip().upper()
+                kind = txn['kind'].upper()
+                trade_date = pd.Timestamp(txn.get('trade_date') or today).strftime('%Y-%m-%d')
+                values = [float(txn.get(k) or 0.0) for k in ('quantity', 'price', 'amount', 'fee')]
+                rows.append((user_id, portfolio_id, ticker, kind, trade_date, *values))
+
+                if ticker not in positions:
+                    # 처음 기록하는 종목은 현재 보유 수량을 기초 잔고로, 원장 밖에서 바뀐 수량은 조정으로 먼저 기록
+                    position = self._load_position(conn, user_id, portfolio_id, ticker) or empty_position()
+                    adjustment = self._adjustment(conn, user_id, portfolio_id, ticker, position, trade_date)
+                    if adjustment is not None:
+                        adjust_date, delta = adjustment
+                        rows.append((user_id, portfolio_id, ticker, ADJUST, adjust_date, delta, 0.0, 0.0, 0.0))
+                        position = apply_transaction(position, ADJUST, delta, trade_date=adjust_date)
+                    positions[ticker] = position
+                if ticker in replay:
+                    continue
+                last_date = positions[ticker]['last_date']
+                if last_date is not None and trade_date < last_date:
+                    # 이전 날짜 거래: 이동평균 원가가 달라지므로 저장 후 이 종목만 다시 계산
+                    replay.add(ticker)
+                    continue
+                positions[ticker] = apply_transaction(positions[ticker], kind, *values, trade_date=trade_date)
+
+            conn.executemany(
+                "INSERT INTO transactions (user_id, portfolio_id, ticker, kind, trade_date, quantity, price, amount, fee) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            for ticker in replay:
+                positions[ticker] = self._replay(conn, user_id, portfolio_id, ticker)
+            self._save_positions(conn, user_id, portfolio_id, positions)
+
+    def _record_adjustments(self, conn, user_id, portfolio_id, tickers):
+        """원장 기록이 있는 종목 중 보유 수량이 바뀐 종목에 수량 조정 거래를 추가합니다."""
+        today = date.today().isoformat()
+        positions = {}
+        for ticker in tickers:
+            position = self._load_position(conn, user_id, portfolio_id, ticker)
+            adjustment = position and self._adjustment(conn, user_id, portfolio_id, ticker, position, today)
+            if not adjustment:
+                continue
+            adjust_date, delta = adjustment
+            conn.execute(
+                "INSERT INTO transactions (user_id, portfolio_id, ticker, kind, trade_date, quantity) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (user_id, portfolio_id, ticker, ADJUST, adjust_date, delta)
+            )
+            positions[ticker] = apply_transaction(position, ADJUST, delta, trade_date=adjust_date)
+        self._save_positions(conn, user_id, portfolio_id, positions)
+
+    def apply_changes(self, user_id, portfolio_id, upserts, deletes):
+        """
+        보유 종목 편집(PortfolioStore.apply_changes)을 반영하고, 같은 트랜잭션에서
+        원장 기록이 있는 종목의 바뀐 수량을 수량 조정 거래로 기록합니다.
+        upserts: [(ticker, quantity, target_ratio)], deletes: [ticker]
+        """
+        with self._connect() as conn:
+            self.store._apply_changes(conn, user_id, portfolio_id, upserts, deletes)
+            self._record_adjustments(conn, user_id, portfolio_id, [u[0] for u in upserts] + list(deletes))
+
+    def replace(self, user_id, portfolio_id, df):
+        """포트폴리오 전체를 교체하고(PortfolioStore.replace) 원장 종목의 수량 차이를 조정으로 기록합니다."""
+        with self._connect() as conn:
+            self.store._replace(conn, user_id, portfolio_id, df)
+            tickers = [r[0] for r in conn.execute(
+                "SELECT ticker FROM ledger_positions WHERE user_id = ? AND portfolio_id = ?",
+                (user_id, portfolio_id)
+            )]
+            self._record_adjustments(conn, user_id, portfolio_id, tickers)
+
+    def rebuild(self, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+        """원장 전체를 처음부터 다시 계산하여 누적값을 교체합니다. (검증/복구용)"""
+        with self._connect() as conn:
+            tickers = [r[0] for r in conn.execute(
+                "SELECT DISTINCT ticker FROM transactions WHERE user_id = ? AND portfolio_id = ?",
+                (user_id, portfolio_id)
+            )]
+            positions = {t: self._replay(conn, user_id, portfolio_id, t) for t in tickers}
+            conn.execute("DELETE FROM ledger_positions WHERE user_id = ? AND portfolio_id = ?", (user_id, portfolio_id))
+            self._save_positions(conn, user_id, portfolio_id, positions)
+        return positions
+
+    def positions(self, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+        """
+        종목별 누적값 DataFrame (현지 통화)
+        Ticker, Quantity, Cost Basis(보유분 취득원가), Avg Cost(평균 단가),
+        Realized Gain(실현 손익), Dividends Received(배당 수령액)
+        평균 단가는 취득원가를 아는 수량 기준이며, 모두 수량 조정으로 들어온 종목은 비어 있습니다.
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ticker, quantity, cost, realized, dividends, uncosted FROM ledger_positions "
+                "WHERE user_id = ? AND portfolio_id = ? ORDER BY ticker",
+                (user_id, portfolio_id)
+            ).fetchall()
+        df = pd.DataFrame(rows, columns=['Ticker', 'Quantity', 'Cost Basis', 'Realized Gain', 'Dividends Received',
+                                         'Uncosted'])
+        df = df.astype({c: float for c in df.columns if c != 'Ticker'})
+        costed = df['Quantity'] - df['Uncosted']
+        df['Avg Cost'] = (df['Cost Basis'] / costed.where(costed > QUANTITY_EPSILON)).astype(float)
+        return df[LEDGER_POSITION_COLUMNS]
+
+    def transactions(self, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO, ticker=None):
+        """거래 내역 DataFrame (날짜순)"""
+        sql = ("SELECT trade_date, ticker, kind, quantity, price, amount, fee FROM transactions "
+               "WHERE user_id = ? AND portfolio_id = ?")
+        params = [user_id, portfolio_id]
+        if ticker is not None:
+            sql += " AND ticker = ?"
+            params.append(ticker)
+        with self._connect() as conn:
+            rows = conn.execute(sql + " ORDER BY trade_date, id", params).fetchall()
+        return pd.DataFrame(rows, columns=TRANSACTION_COLUMNS)
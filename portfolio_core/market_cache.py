@@ -0,0 +1,243 @@
+import os
+import time
+import pickle
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from . import instrumentation
+
+# 캐시 저장 위치 (환경 변수로 변경 가능)
+CACHE_DIR = os.environ.get(
+    'DIVIDEND_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.cache')
+)
+
+# 데이터 종류별 유효 시간(초)
+DEFAULT_TTLS = {
+    'price': 60,                # 현재가: 1분
+    'quote': 60,                # 일괄 조회 현재가: 1분
+    'currency': 60 * 60 * 24 * 30,  # 거래 통화: 30일
+    'info': 60 * 60 * 24,       # 종목 메타데이터: 1일
+    'dividends': 60 * 60 * 24 * 7,  # 배당 내역: 1주
+}
+
+
+class MarketCache:
+    """
+    종목(ticker) + 데이터 종류(kind) 단위로 값을 저장하는 SQLite 영구 캐시.
+    Streamlit 재시작/재배포 후에도 유지됩니다.
+    """
+
+    def __init__(self, cache_dir=None, ttls=None):
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.path = os.path.join(self.cache_dir, 'market_data.sqlite3')
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " ticker TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " value BLOB NOT NULL,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (ticker, kind))"
+            )
+
+    def _connect(self):
+        # 스레드마다 별도 연결을 사용 (sqlite3 연결은 스레드 간 공유 불가)
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, ticker, kind):
+        """
+        캐시된 값을 조회합니다.
+
+        Returns:
+            tuple: (value, is_fresh). 항목이 없으면 (None, False)
+        """
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, fetched_at FROM entries WHERE ticker = ? AND kind = ?",
+                    (ticker, kind)
+                ).fetchone()
+            if row is None:
+                return None, False
+            value = pickle.loads(row[0])
+        except Exception as e:
+            print(f"Cache read error ({ticker}/{kind}): {e}")
+            return None, False
+        age = time.time() - row[1]
+        return value, age <= self.ttls.get(kind, 0)
+
+    def set(self, ticker, kind, value):
+        """값을 저장합니다. (기존 항목은 덮어씀)"""
+        try:
+            blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (ticker, kind, value, fetched_at) VALUES (?, ?, ?, ?)",
+                    (ticker, kind, blob, time.time())
+                )
+        except Exception as e:
+            print(f"Cache write error ({ticker}/{kind}): {e}")
+
+    def clear(self):
+        """모든 캐시 항목을 삭제합니다."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+
+class CachedProvider:
+    """
+    데이터 제공자 앞단에 MarketCache 를 두는 래퍼.
+    - 신선한 항목: 캐시에서 바로 반환
+    - 만료된 항목: 만료된 값을 즉시 반환하고 백그라운드에서 갱신 (stale-while-revalidate)
+    - 없는 항목: 제공자에서 가져와 저장 후 반환
+    """
+
+    def __init__(self, provider, cache, refresh_workers=4):
+        self.provider = provider
+        self.cache = cache
+        self._refreshing = set()
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=refresh_workers)
+
+    def _submit(self, fn, *args):
+        future = self._refresher.submit(fn, *args)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard_future)
+
+    def _discard_future(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def drain(self, timeout=None):
+        """백그라운드 갱신/확인이 모두 끝날 때까지 기다립니다. (벤치마크에서 요청 수를 셀 때 사용)"""
+        with self._lock:
+            futures = list(self._futures)
+        wait(futures, timeout=timeout)
+
+    def _refresh(self, ticker, kind, fetch):
+        try:
+            self.cache.set(ticker, kind, fetch(ticker))
+        except Exception as e:
+            print(f"Background refresh failed ({ticker}/{kind}): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard((ticker, kind))
+
+    def _get(self, ticker, kind, fetch):
+        value, fresh = self.cache.get(ticker, kind)
+        if value is None:
+            instrumentation.count(f'cache.{kind}.miss')
+            value = fetch(ticker)
+            self.cache.set(ticker, kind, value)
+            return value
+        instrumentation.count(f'cache.{kind}.hit')
+        if not fresh:
+            instrumentation.count(f'cache.{kind}.stale')
+            key = (ticker, kind)
+            with self._lock:
+                if key in self._refreshing:
+                    return value
+                self._refreshing.add(key)
+            self._submit(self._refresh, ticker, kind, fetch)
+        return value
+
+    def _fetch_quotes(self, tickers):
+        # 시세마다 받은 시각(fetched_at)을 함께 저장 (캐시에서 꺼낸 만료된 시세도 원래 시각을 유지)
+        quotes = self.provider.get_prices(tickers)
+        fetched_at = time.time()
+        quotes = {t: dict(quote, fetched_at=fetched_at) for t, quote in quotes.items()}
+        for ticker, quote in quotes.items():
+            self.cache.set(ticker, 'quote', quote)
+        return quotes
+
+    def _fetch_price(self, ticker):
+        return dict(self.provider.get_price(ticker), fetched_at=time.time())
+
+    def refresh_prices(self, tickers):
+        """만료 여부와 관계없이 여러 종목의 현재가를 한 번에 다시 받아 저장합니다."""
+        self._fetch_quotes(tickers)
+
+    def _refresh_prices(self, tickers):
+        try:
+            self.refresh_prices(tickers)
+        except Exception as e:
+            print(f"Background price refresh failed ({len(tickers)} tickers): {e}")
+        finally:
+            with self._lock:
+                self._refreshing.difference_update((t, 'quote') for t in tickers)
+
+    def get_prices(self, tickers):
+        """
+        여러 종목의 현재가를 캐시에서 찾고, 없는 종목만 모아 한 번에 조회합니다.
+        만료된 종목은 만료된 값을 반환하고 한 번의 일괄 요청으로 백그라운드 갱신합니다.
+        각 시세의 'fetched_at' 은 제공자에서 받은 시각입니다.
+        """
+        prices, missing, stale = {}, [], []
+        for ticker in tickers:
+            value, fresh = self.cache.get(ticker, 'quote')
+            if value is None:
+                missing.append(ticker)
+                continue
+            prices[ticker] = value
+            if not fresh:
+                stale.append(ticker)
+
+        instrumentation.count('cache.quote.hit', len(prices))
+        instrumentation.count('cache.quote.miss', len(missing))
+        instrumentation.count('cache.quote.stale', len(stale))
+        if missing:
+            prices.update(self._fetch_quotes(missing))
+
+        with self._lock:
+            stale = [t for t in stale if (t, 'quote') not in self._refreshing]
+            self._refreshing.update((t, 'quote') for t in stale)
+        if stale:
+            self._submit(self._refresh_prices, stale)
+        return prices
+
+    def get_price(self, ticker):
+        return self._get(ticker, 'price', self._fetch_price)
+
+    def get_currency(self, ticker):
+        return self._get(ticker, 'currency', self.provider.get_currency)
+
+    def resolve_currency(self, ticker, hint=None):
+        """
+        거래 통화를 조회해 저장된 값(30일)으로 반환합니다.
+        저장된 값이 없고 hint(티커로 추정한 통화)가 있으면 첫 화면이 종목별 조회를 기다리지 않도록 hint 를 반환하고,
+        백그라운드에서 get_currency 로 확인해 저장합니다. (다음 시세 갱신부터 확인된 통화 사용)
+        """
+        if hint is None or self.cache.get(ticker, 'currency')[0] is not None:
+            return self.get_currency(ticker)
+        instrumentation.count('cache.currency.hint')
+        key = (ticker, 'currency')
+        with self._lock:
+            if key in self._refreshing:
+                return hint
+            self._refreshing.add(key)
+        self._submit(self._refresh, ticker, 'currency', lambda t: self._confirm_currency(t, hint))
+        return hint
+
+    def _confirm_currency(self, ticker, hint):
+        currency = self.provider.get_currency(ticker)
+        if currency != hint:
+            print(f"Currency for {ticker} is {currency}, not {hint} as guessed from the ticker")
+        return currency
+
+    def get_info(self, ticker):
+        return self._get(ticker, 'info', self.provider.get_info)
+
+    def get_dividends(self, ticker):
+        return self._get(ticker, 'dividends', self.provider.get_dividends)
+
+    def get_dividends_batch(self, tickers, start=None, period="5y"):
+        # 배당 이력은 DividendStore 가 영구 저장하므로 캐시 없이 그대로 전달
+        return self.provider.get_dividends_batch(tickers, start=start, period=period)
@@ -0,0 +1,189 @@
+import os
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# 포트폴리오 DB 경로 (환경 변수로 변경 가능)
+DB_PATH = os.environ.get(
+    'DIVIDEND_PORTFOLIO_DB',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'portfolio.sqlite3')
+)
+
+DEFAULT_USER = 'default'
+DEFAULT_PORTFOLIO = 'default'
+
+PORTFOLIO_COLUMNS = ['Ticker', 'Quantity', 'TargetRatio']
+
+
+def diff_holdings(before, after):
+    """
+    편집 전/후 보유 종목 DataFrame 을 비교하여 바뀐 줄만 구합니다.
+    티커가 비어 있거나 수량이 0 이하인 줄은 무시하고, 같은 티커가 여러 줄이면 마지막 줄을 사용합니다.
+
+    Returns:
+        tuple: (upserts [(ticker, quantity, target_ratio)], deletes [ticker])
+    """
+    after = after.copy()
+    after['Ticker'] = after['Ticker'].fillna('').astype(str).str.strip().str.upper()
+    after['Quantity'] = pd.to_numeric(after['Quantity'], errors='coerce')
+    after['TargetRatio'] = pd.to_numeric(after['TargetRatio'], errors='coerce').fillna(0.0)
+    after = after[(after['Ticker'] != '') & (after['Quantity'] > 0)].drop_duplicates('Ticker', keep='last')
+
+    old = before.set_index('Ticker')[['Quantity', 'TargetRatio']].astype(float)
+    new = after.set_index('Ticker')[['Quantity', 'TargetRatio']].astype(float)
+    merged = new.join(old, rsuffix='_old', how='left')
+    changed = (merged['Quantity_old'].isna()
+               | ~np.isclose(merged['Quantity'], merged['Quantity_old'])
+               | ~np.isclose(merged['TargetRatio'], merged['TargetRatio_old']))
+    upserts = list(merged.loc[changed, ['Quantity', 'TargetRatio']].itertuples(name=None))
+    deletes = [t for t in old.index if t not in new.index]
+    return upserts, deletes
+
+
+class PortfolioStore:
+    """
+    사용자 + 포트폴리오 단위로 보유 종목을 저장하는 SQLite(WAL) 저장소.
+    종목 한 줄씩 추가/수정/삭제하며, 각 변경은 하나의 트랜잭션으로 처리되어
+    여러 세션이 동시에 수정해도 파일이 깨지지 않습니다.
+    """
+
+    def __init__(self, db_path=None):
+        self.path = db_path or DB_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS portfolios ("
+                " user_id TEXT NOT NULL,"
+                " portfolio_id TEXT NOT NULL,"
+                " updated_at TEXT,"
+                " PRIMARY KEY (user_id, portfolio_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS holdings ("
+                " user_id TEXT NOT NULL,"
+                " portfolio_id TEXT NOT NULL,"
+                " ticker TEXT NOT NULL,"
+                " quantity REAL NOT NULL,"
+                " target_ratio REAL NOT NULL DEFAULT 0,"
+                " position INTEGER NOT NULL,"
+                " PRIMARY KEY (user_id, portfolio_id, ticker))"
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _touch(self, conn, user_id, portfolio_id):
+        conn.execute(
+            "INSERT INTO portfolios (user_id, portfolio_id, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id, portfolio_id) DO UPDATE SET updated_at = excluded.updated_at",
+            (user_id, portfolio_id, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        )
+
+    def load(self, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+        """보유 종목 DataFrame (Ticker, Quantity, TargetRatio, 추가한 순서)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT ticker, quantity, target_ratio FROM holdings "
+                "WHERE user_id = ? AND portfolio_id = ? ORDER BY position",
+                (user_id, portfolio_id)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=PORTFOLIO_COLUMNS).astype({'Quantity': float, 'TargetRatio': float})
+
+    def upsert(self, user_id, portfolio_id, ticker, quantity, target_ratio=0.0):
+        """종목 한 줄을 추가하거나 수정합니다. (기존 종목은 순서 유지)"""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO holdings (user_id, portfolio_id, ticker, quantity, target_ratio, position) "
+                "VALUES (?, ?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 FROM holdings "
+                "                       WHERE user_id = ? AND portfolio_id = ?)) "
+                "ON CONFLICT (user_id, portfolio_id, ticker) DO UPDATE SET "
+                " quantity = excluded.quantity, target_ratio = excluded.target_ratio",
+                (user_id, portfolio_id, ticker, float(quantity), float(target_ratio), user_id, portfolio_id)
+            )
+            self._touch(conn, user_id, portfolio_id)
+
+    def apply_changes(self, user_id, portfolio_id, upserts, deletes):
+        """
+        여러 줄의 추가/수정과 삭제를 한 트랜잭션으로 반영합니다.
+        upserts: [(ticker, quantity, target_ratio)], deletes: [ticker]
+        """
+        with self._connect() as conn:
+            self._apply_changes(conn, user_id, portfolio_id, upserts, deletes)
+
+    def _apply_changes(self, conn, user_id, portfolio_id, upserts, deletes):
+        conn.executemany(
+            "DELETE FROM holdings WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+            [(user_id, portfolio_id, t) for t in deletes]
+        )
+        next_position = conn.execute(
+            "SELECT COALESCE(MAX(position), -1) + 1 FROM holdings WHERE user_id = ? AND portfolio_id = ?",
+            (user_id, portfolio_id)
+        ).fetchone()[0]
+        conn.executemany(
+            "INSERT INTO holdings (user_id, portfolio_id, ticker, quantity, target_ratio, position) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, portfolio_id, ticker) DO UPDATE SET "
+            " quantity = excluded.quantity, target_ratio = excluded.target_ratio",
+            [(user_id, portfolio_id, t, float(q), float(r), next_position + i)
+             for i, (t, q, r) in enumerate(upserts)]
+        )
+        self._touch(conn, user_id, portfolio_id)
+
+    def update_targets(self, user_id, portfolio_id, target_ratios):
+        """여러 종목의 목표 비중을 한 트랜잭션으로 수정합니다. ({ticker: 목표 비중})"""
+        with self._connect() as conn:
+            conn.executemany(
+                "UPDATE holdings SET target_ratio = ? WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+                [(float(ratio), user_id, portfolio_id, ticker) for ticker, ratio in target_ratios.items()]
+            )
+            self._touch(conn, user_id, portfolio_id)
+
+    def delete(self, user_id, portfolio_id, ticker):
+        with self._connect() as conn:
+            conn.execute(
+                "DELETE FROM holdings WHERE user_id = ? AND portfolio_id = ? AND ticker = ?",
+                (user_id, portfolio_id, ticker)
+            )
+            self._touch(conn, user_id, portfolio_id)
+
+    def replace(self, user_id, portfolio_id, df):
+        """포트폴리오 전체를 한 트랜잭션으로 교체합니다. (CSV 가져오기, 초기화)"""
+        with self._connect() as conn:
+            self._replace(conn, user_id, portfolio_id, df)
+
+    def _replace(self, conn, user_id, portfolio_id, df):
+        rows = []
+        if not df.empty:
+            df = df.drop_duplicates('Ticker', keep='last')
+            target = df['TargetRatio'] if 'TargetRatio' in df.columns else pd.Series(0.0, index=df.index)
+            rows = [(user_id, portfolio_id, t, float(q), float(r) if pd.notna(r) else 0.0, i)
+                    for i, (t, q, r) in enumerate(zip(df['Ticker'], df['Quantity'], target))]
+        conn.execute("DELETE FROM holdings WHERE user_id = ? AND portfolio_id = ?", (user_id, portfolio_id))
+        conn.executemany(
+            "INSERT INTO holdings (user_id, portfolio_id, ticker, quantity, target_ratio, position) "
+            "VALUES (?, ?, ?, ?, ?, ?)", rows
+        )
+        self._touch(conn, user_id, portfolio_id)
+
+    def last_update(self, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+        """마지막 수정 시각 문자열 (없으면 None)"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT updated_at FROM portfolios WHERE user_id = ? AND portfolio_id = ?",
+                (user_id, portfolio_id)
+            ).fetchone()
+        return row[0] if row else None
+
+    def exists(self, user_id, portfolio_id):
+        return self.last_update(user_id, portfolio_id) is not None
+
+    def list_portfolios(self, user_id=DEFAULT_USER):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT portfolio_id FROM portfolios WHERE user_id = ? ORDER BY portfolio_id", (user_id,)
+            ).fetchall()
+        return [r[0] for r in rows]
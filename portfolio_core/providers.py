@@ -0,0 +1,365 @@
+import re
+import time
+import pickle
+import random
+import zlib
+import threading
+import pandas as pd
+from . import instrumentation
+
+# 거래소 접미사로 거래 통화를 추정할 수 있는 거래소 (런던(.L)처럼 종목마다 통화가 다른 거래소는 제외)
+EXCHANGE_CURRENCIES = {'.KS': 'KRW', '.KQ': 'KRW', '.T': 'JPY', '.HK': 'HKD',
+                       '.PA': 'EUR', '.DE': 'EUR', '.AS': 'EUR'}
+
+
+def infer_currency(ticker):
+    """
+    티커 형식으로 추정한 거래 통화. 모르면 None
+    확인되지 않은 추정값이므로 첫 조회의 임시값으로만 쓰고 get_currency 로 확인합니다. (CachedProvider.resolve_currency)
+    접미사가 없는 종목은 미국 종목(USD)으로 보며, 지수(^), 환율/선물(=X, =F), 암호화폐(BTC-KRW)는 제외합니다.
+    """
+    if ticker.startswith('^') or '=' in ticker or re.search(r'-[A-Z]{3}$', ticker):
+        return None
+    if '.' not in ticker:
+        return 'USD'
+    return EXCHANGE_CURRENCIES.get(ticker[ticker.rindex('.'):])
+
+
+class YFinanceProvider:
+    """
+    yfinance 기반 시장 데이터 제공자.
+    fetch_engine 은 이 인터페이스(get_prices, get_price, get_currency, get_info, get_dividends)만
+    사용하므로 같은 메서드를 가진 객체라면 어떤 것이든 대체할 수 있습니다.
+    yfinance 는 import 가 무거우므로 실제로 조회할 때 불러옵니다.
+    """
+
+    def get_prices(self, tickers):
+        """
+        여러 종목의 최근 종가/현재가를 yf.download 한 번으로 가져옵니다.
+        장중에는 오늘 일봉의 종가가 현재가입니다.
+        yf.download 는 통화를 주지 않으므로 티커 형식으로 알 수 있는 종목만 통화를 함께 넣습니다.
+
+        Returns:
+            dict: {ticker: {'price': 현재가(최근 종가), 'previous_close': 전일 종가, 'currency_hint': 티커로 추정한 통화(확인 전)}}
+                  (조회된 종목만)
+        """
+        import yfinance as yf
+        tickers = list(tickers)
+        instrumentation.count('network.prices')
+        data = yf.download(tickers, period="5d", interval="1d", threads=True, progress=False, auto_adjust=False)
+        if data is None or data.empty:
+            return {}
+        close = data['Close']
+        if isinstance(close, pd.Series):
+            close = close.to_frame(tickers[0])
+
+        prices = {}
+        for ticker in tickers:
+            if ticker not in close.columns:
+                continue
+            series = close[ticker].dropna()
+            if series.empty:
+                continue
+            prices[ticker] = {
+                'price': float(series.iloc[-1]),
+                'previous_close': float(series.iloc[-2]) if len(series) > 1 else None
+            }
+            hint = infer_currency(ticker)
+            if hint is not None:
+                prices[ticker]['currency_hint'] = hint
+        return prices
+
+    def get_dividends_batch(self, tickers, start=None, period="5y"):
+        """
+        여러 종목의 배당 내역을 yf.download(actions=True) 한 번으로 가져옵니다.
+        start 가 있으면 그 날짜 이후만, 없으면 period 기간만큼 가져옵니다.
+
+        Returns:
+            dict: {ticker: 배당 Series(tz 제거된 DatetimeIndex)}
+                  (배당이 없는 종목은 빈 Series, 시세를 받지 못한 종목은 제외 - 다음 동기화에서 다시 시도,
+                   기간 중 주식 분할이 있었던 종목은 Series.attrs['split'] = True - 과거 배당 금액이 다시 조정됨)
+        """
+        import yfinance as yf
+        tickers = list(tickers)
+        span = {'start': start.strftime('%Y-%m-%d')} if start is not None else {'period': period}
+        instrumentation.count('network.dividends_batch')
+        data = yf.download(tickers, interval="1d", actions=True, threads=True, progress=False,
+                           auto_adjust=False, **span)
+        if data is None or data.empty:
+            return {}
+        fields = data.columns.get_level_values(0)
+        frames = {}
+        for field in ('Close', 'Dividends', 'Stock Splits'):
+            frame = data[field] if field in fields else pd.DataFrame(index=data.index)
+            if isinstance(frame, pd.Series):
+                frame = frame.to_frame(tickers[0])
+            if frame.index.tz is not None:
+                frame.index = frame.index.tz_localize(None)
+            frames[field] = frame
+        close, dividends, splits = frames['Close'], frames['Dividends'], frames['Stock Splits']
+
+        result = {}
+        for ticker in tickers:
+            # 다운로드에 실패한 종목은 시세 열이 비어 있음
+            if ticker not in close.columns or not close[ticker].notna().any():
+                continue
+            hist = dividends[ticker] if ticker in dividends.columns else pd.Series(dtype=float, index=close.index)
+            result[ticker] = hist[hist > 0].rename('Dividends')
+            if ticker in splits.columns and (splits[ticker].fillna(0) > 0).any():
+                result[ticker].attrs['split'] = True
+        return result
+
+    def get_currency(self, ticker):
+        """거래 통화 (종목 메타데이터 요청이 필요하므로 길게 캐시하여 사용)"""
+        import yfinance as yf
+        instrumentation.count('network.currency')
+        return yf.Ticker(ticker).fast_info.currency
+
+    def get_price(self, ticker):
+        """현재가와 통화를 가져옵니다. (info 보다 가벼운 fast_info 사용)"""
+        import yfinance as yf
+        instrumentation.count('network.price')
+        fast = yf.Ticker(ticker).fast_info
+        return {'price': fast.last_price, 'currency': fast.currency}
+
+    def get_info(self, ticker):
+        """종목 메타데이터(info dict)를 가져옵니다."""
+        import yfinance as yf
+        instrumentation.count('network.info')
+        return yf.Ticker(ticker).info
+
+    def get_dividends(self, ticker):
+        """배당 내역(Series, tz 제거된 DatetimeIndex)을 가져옵니다."""
+        import yfinance as yf
+        instrumentation.count('network.dividends')
+        hist = yf.Ticker(ticker).dividends
+        if not hist.empty and hist.index.tz is not None:
+            hist.index = hist.index.tz_localize(None)
+        return hist
+
+
+class FakeProvider:
+    """
+    벤치마크/검증용 가짜 데이터 제공자.
+    네트워크 없이 인위적인 지연(latency)을 주고 결정적인 데이터를 돌려줍니다.
+    """
+
+    def __init__(self, latency=0.05, jitter=0.0, seed=0, fail_tickers=()):
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.fail_tickers = set(fail_tickers)
+        self.calls = {'prices': 0, 'price': 0, 'currency': 0, 'info': 0, 'dividends': 0, 'dividends_batch': 0}
+        self._lock = threading.Lock()
+
+    def _sleep(self, ticker, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        delay = self.latency
+        if self.jitter:
+            delay += random.Random(f"{self.seed}-{ticker}-{kind}").uniform(0, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        if ticker in self.fail_tickers:
+            raise RuntimeError(f"{ticker}: fake provider failure")
+
+    def _rng(self, ticker):
+        return random.Random(f"{self.seed}-{ticker}")
+
+    def _price(self, ticker):
+        return round(self._rng(ticker).uniform(10, 500), 2)
+
+    # 거래소 접미사별 통화 (접미사가 없으면 미국 종목)
+    SUFFIX_CURRENCIES = {'.KS': 'KRW', '.KQ': 'KRW', '.T': 'JPY', '.HK': 'HKD',
+                         '.TO': 'CAD', '.PA': 'EUR', '.DE': 'EUR', '.L': 'GBp'}
+
+    def _currency(self, ticker):
+        for suffix, currency in self.SUFFIX_CURRENCIES.items():
+            if ticker.endswith(suffix):
+                return currency
+        return 'USD'
+
+    @property
+    def round_trips(self):
+        """지금까지의 요청(왕복) 횟수"""
+        return sum(self.calls.values())
+
+    def get_prices(self, tickers):
+        # 일괄 조회는 종목 수와 관계없이 한 번의 요청
+        tickers = list(tickers)
+        self._sleep('', 'prices')
+        return {t: {'price': self._price(t), 'previous_close': self._price(t), 'currency_hint': self._currency(t)}
+                for t in tickers if t not in self.fail_tickers}
+
+    def get_price(self, ticker):
+        self._sleep(ticker, 'price')
+        return {'price': self._price(ticker), 'currency': self._currency(ticker)}
+
+    def get_currency(self, ticker):
+        self._sleep(ticker, 'currency')
+        return self._currency(ticker)
+
+    def get_info(self, ticker):
+        self._sleep(ticker, 'info')
+        rng = self._rng(ticker)
+        price = self._price(ticker)
+        return {
+            'currentPrice': price,
+            'currency': self._currency(ticker),
+            'dividendYield': None,
+            'dividendRate': None,
+            'longBusinessSummary': f"{ticker} is a synthetic company used for benchmarks.",
+            'recommendationKey': rng.choice(['buy', 'hold', 'strong_buy', 'sell']),
+            'targetMeanPrice': round(price * rng.uniform(0.8, 1.3), 2),
+            'fiftyTwoWeekHigh': round(price * 1.2, 2),
+            'fiftyTwoWeekLow': round(price * 0.8, 2),
+            'beta': round(rng.uniform(0.5, 1.8), 2),
+        }
+
+    def get_dividends(self, ticker):
+        self._sleep(ticker, 'dividends')
+        return self._dividends(ticker)
+
+    def get_dividends_batch(self, tickers, start=None, period=None):
+        # 일괄 조회는 종목 수와 관계없이 한 번의 요청
+        self._sleep('', 'dividends_batch')
+        result = {}
+        for t in tickers:
+            if t in self.fail_tickers:
+                continue
+            hist = self._dividends(t)
+            result[t] = hist[hist.index >= start] if start is not None else hist
+        return result
+
+    def _dividends(self, ticker):
+        rng = self._rng(ticker)
+        # 월배당 또는 분기배당 종목을 흉내냅니다
+        freq = rng.choice(['MS', 'QS'])
+        dates = pd.date_range(end=pd.Timestamp.now().normalize(), periods=36 if freq == 'MS' else 12, freq=freq)
+        dates = dates + pd.Timedelta(days=rng.randint(0, 20))
+        amount = rng.uniform(0.1, 1.0)
+        return pd.Series([amount] * len(dates), index=dates, name='Dividends')
+
+
+class RecordingProvider:
+    """
+    다른 제공자(예: YFinanceProvider)의 응답을 종목별로 기록하는 제공자.
+    save(path) 로 저장한 파일을 FixtureProvider 로 다시 재생하여 네트워크 없이 같은 데이터로 벤치마크할 수 있습니다.
+    """
+
+    KINDS = ('prices', 'currency', 'info', 'dividends')
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.records = {kind: {} for kind in self.KINDS}
+        self._lock = threading.Lock()
+
+    def _record(self, kind, values):
+        with self._lock:
+            self.records[kind].update(values)
+
+    def get_prices(self, tickers):
+        prices = self.provider.get_prices(tickers)
+        self._record('prices', prices)
+        return prices
+
+    def get_price(self, ticker):
+        price = self.provider.get_price(ticker)
+        self._record('prices', {ticker: {'price': price['price'], 'previous_close': None}})
+        self._record('currency', {ticker: price['currency']})
+        return price
+
+    def get_currency(self, ticker):
+        currency = self.provider.get_currency(ticker)
+        self._record('currency', {ticker: currency})
+        return currency
+
+    def get_info(self, ticker):
+        info = self.provider.get_info(ticker)
+        self._record('info', {ticker: info})
+        return info
+
+    def get_dividends(self, ticker):
+        hist = self.provider.get_dividends(ticker)
+        self._record('dividends', {ticker: hist})
+        return hist
+
+    def get_dividends_batch(self, tickers, start=None, period="5y"):
+        result = self.provider.get_dividends_batch(tickers, start=start, period=period)
+        self._record('dividends', result)
+        return result
+
+    def save(self, path):
+        with self._lock, open(path, 'wb') as f:
+            pickle.dump(self.records, f)
+
+
+class FixtureProvider:
+    """
+    RecordingProvider 로 저장한 응답을 재생하는 벤치마크용 제공자.
+    요청마다 latency 초만큼 지연하며, 기록에 없는 종목은 기록된 종목 중 하나(티커 해시 기준)의
+    데이터로 대신 응답하므로 적은 기록으로도 10k 종목 규모를 재현할 수 있습니다.
+    """
+
+    def __init__(self, path, latency=0.0):
+        with open(path, 'rb') as f:
+            self.records = pickle.load(f)
+        self.latency = latency
+        self.calls = {'prices': 0, 'price': 0, 'currency': 0, 'info': 0, 'dividends': 0, 'dividends_batch': 0}
+        self._lock = threading.Lock()
+        self._recorded = sorted(set().union(*(self.records[k].keys() for k in RecordingProvider.KINDS)))
+        if not self._recorded:
+            raise ValueError(f"{path}: 기록된 종목이 없습니다")
+
+    @property
+    def round_trips(self):
+        return sum(self.calls.values())
+
+    def _sleep(self, kind):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _lookup(self, kind, ticker, default=None):
+        values = self.records[kind]
+        if ticker in values:
+            return values[ticker]
+        alias = self._recorded[zlib.crc32(ticker.encode('utf-8')) % len(self._recorded)]
+        return values.get(alias, default)
+
+    def get_prices(self, tickers):
+        self._sleep('prices')
+        prices = {t: self._lookup('prices', t) for t in tickers}
+        return {t: p for t, p in prices.items() if p is not None}
+
+    def get_price(self, ticker):
+        self._sleep('price')
+        quote = self._lookup('prices', ticker)
+        if quote is None:
+            raise KeyError(f"{ticker}: 기록된 현재가가 없습니다")
+        return {'price': quote['price'], 'currency': self._lookup('currency', ticker, 'USD')}
+
+    def get_currency(self, ticker):
+        self._sleep('currency')
+        return self._lookup('currency', ticker, 'USD')
+
+    def get_info(self, ticker):
+        self._sleep('info')
+        return dict(self._lookup('info', ticker, {}))
+
+    def _dividends(self, ticker):
+        hist = self._lookup('dividends', ticker)
+        return hist.copy() if hist is not None else pd.Series(dtype=float, name='Dividends')
+
+    def get_dividends(self, ticker):
+        self._sleep('dividends')
+        return self._dividends(ticker)
+
+    def get_dividends_batch(self, tickers, start=None, period=None):
+        self._sleep('dividends_batch')
+        result = {}
+        for t in tickers:
+            hist = self._dividends(t)
+            result[t] = hist[hist.index >= start] if start is not None else hist
+        return result
@@ -0,0 +1,342 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+# 조정 필요 금액이 이 값(원)을 넘어야 매수/매도를 추천
+ACTION_THRESHOLD = 10000
+# 추가 매수 금액이 이 값(원)을 넘는 종목만 추가 매수 목록에 포함
+BUY_THRESHOLD = 1000
+
+REBALANCING_COLUMNS = ['종목', '현재 비중', '목표 비중', '목표 금액', '현재 금액', '조정 필요 금액', '추천 동작', '수량',
+                       '예상 실현 손익']
+BUY_ONLY_COLUMNS = ['종목', '현재 금액', '추가 매수 금액', '최종 금액', '추가 매수 수량']
+TOP3_COLUMNS = ['종목', '배당률', '가중치', '투자 금액', '매수 수량', '현재가', '통화', '예상 연 배당금', '예상 월 배당금']
+# 정수 배분 교환 보정 반복 횟수 / 후보 종목 수
+SWAP_ITERATIONS = 50
+SWAP_CANDIDATES = 64
+
+INTEGER_PLAN_COLUMNS = ['종목', '현재가', '통화', '매수 수량', '매수 금액', '현재 비중', '매수 후 비중', '목표 비중', '예상 연 배당금']
+
+
+def position_rates(df_result, rates=None):
+    """
+    종목별 원화 환산율 배열.
+    환율 스냅샷(rates)이 주어지면 통화 기준으로, 없으면 평가 결과의 FX Rate 컬럼을 사용합니다.
+    환율을 알 수 없는 종목은 NaN 이며 수량 계산에서 0 으로 처리됩니다.
+    """
+    if rates is not None:
+        return rates.column(df_result['Currency'])
+    if 'FX Rate' not in df_result.columns:
+        raise ValueError("FX Rate 컬럼 또는 환율 스냅샷(rates)이 필요합니다")
+    return df_result['FX Rate'].to_numpy(dtype=float)
+
+
+def _safe_divide(numerator, denominator):
+    """분모가 0 이하인 항목은 0 으로 처리하는 나눗셈"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1.0), 0.0)
+
+
+def calculate_rebalancing(df_result, total_value, rates=None):
+    """
+    리밸런싱 데이터 계산 (모든 종목을 열 단위로 한 번에 계산)
+    rates: 평가에 사용한 환율 RateSnapshot (없으면 FX Rate 컬럼 사용)
+    df_result 에 Avg Cost(거래 원장의 평균 단가)가 있으면 매도 추천 종목의 예상 실현 손익(원화)을 계산합니다.
+
+    Returns:
+        tuple: (리밸런싱 DataFrame, 목표 비중 달성 시 예상 월 배당금)
+               비중은 % 숫자, 금액은 원화 숫자이며 표시 형식은 UI 에서 지정합니다.
+    """
+    if df_result.empty:
+        return pd.DataFrame(columns=REBALANCING_COLUMNS), 0
+
+    current_val = df_result['Market Value (KRW)'].to_numpy(dtype=float)
+    target_ratio = df_result['TargetRatio'].to_numpy(dtype=float)
+    qty = df_result['Quantity'].to_numpy(dtype=float)
+    price = df_result['Current Price'].to_numpy(dtype=float)
+    rate = position_rates(df_result, rates)
+
+    # 목표 금액 / 차액
+    target_val = total_value * (target_ratio / 100)
+    diff_val = target_val - current_val
+
+    # 매수/매도 수량
+    price_krw = price * rate
+    action_qty = _safe_divide(diff_val, price_krw)
+    target_qty = _safe_divide(target_val, price_krw)
+
+    # 예상 배당금: 보유 중이면 주당 배당금, 아니면 배당률로 추정
+    div_per_share = np.where(
+        qty > 0,
+        _safe_divide(df_result['Annual Dividend (KRW)'].to_numpy(dtype=float), qty),
+        np.where(price > 0, price * (df_result['Dividend Yield (%)'].to_numpy(dtype=float) / 100) * rate, 0.0)
+    )
+    projected_total_monthly_div = float((target_qty * div_per_share).sum() / 12)
+
+    action = np.where(np.abs(diff_val) > ACTION_THRESHOLD,
+                      np.where(diff_val > 0, "매수 (Buy)", "매도 (Sell)"),
+                      "유지")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_ratio = current_val / total_value * 100
+
+    # 매도 시 실현 손익 (원가를 모르는 종목은 NaN, 매도가 아니면 0)
+    avg_cost = df_result['Avg Cost'].to_numpy(dtype=float) if 'Avg Cost' in df_result.columns \
+        else np.full(len(df_result), np.nan)
+    sell_qty = np.minimum(np.where(action == "매도 (Sell)", -action_qty, 0.0), qty)
+    realized_gain = np.where(sell_qty > 0, (price - avg_cost) * sell_qty * rate, 0.0)
+
+    rebalancing_df = pd.DataFrame({
+        '종목': df_result['Ticker'].to_numpy(),
+        '현재 비중': current_ratio,
+        '목표 비중': target_ratio,
+        '목표 금액': target_val,
+        '현재 금액': current_val,
+        '조정 필요 금액': diff_val,
+        '추천 동작': action,
+        '수량': np.abs(action_qty),
+        '예상 실현 손익': realized_gain
+    })
+    return rebalancing_df, projected_total_monthly_div
+
+
+def calculate_buy_only_rebalancing(df_result, total_value, rates=None):
+    """
+    매도 없는 리밸런싱 (추가 매수) 계산
+    rates: 평가에 사용한 환율 RateSnapshot (없으면 FX Rate 컬럼 사용)
+
+    Returns:
+        tuple: (추가 매수 DataFrame, 필요 추가 투자금 합계)
+    """
+    empty = pd.DataFrame(columns=BUY_ONLY_COLUMNS)
+    if df_result.empty:
+        return empty, 0
+
+    current_val = df_result['Market Value (KRW)'].to_numpy(dtype=float)
+    target_ratio = df_result['TargetRatio'].to_numpy(dtype=float)
+
+    # 가장 비중이 부족하지 않은 종목을 기준으로 필요한 총자산 역산
+    implied_total = _safe_divide(current_val, target_ratio / 100)
+    max_implied_total = implied_total.max(initial=0.0)
+    if max_implied_total <= total_value:
+        return empty, 0
+
+    new_target_val = max_implied_total * (target_ratio / 100)
+    buy_needed = new_target_val - current_val
+    price_krw = df_result['Current Price'].to_numpy(dtype=float) * position_rates(df_result, rates)
+    buy_qty = _safe_divide(buy_needed, price_krw)
+
+    selected = buy_needed > BUY_THRESHOLD
+    buy_only_df = pd.DataFrame({
+        '종목': df_result['Ticker'].to_numpy()[selected],
+        '현재 금액': current_val[selected],
+        '추가 매수 금액': buy_needed[selected],
+        '최종 금액': new_target_val[selected],
+        '추가 매수 수량': buy_qty[selected]
+    })
+    return buy_only_df, float(buy_needed[selected].sum())
+
+
+def check_rebalancing_proximity(df_result, total_value, threshold=5.0):
+    """
+    리밸런싱 근접도 체크
+
+    Args:
+        df_result: 포트폴리오 데이터프레임
+        total_value: 총 자산 가치
+        threshold: 허용 편차 (%, 기본값 5%)
+
+    Returns:
+        tuple: (is_near_balanced, max_deviation, deviations DataFrame[index=종목, current/target/deviation])
+    """
+    deviation_columns = ['current', 'target', 'deviation']
+    if total_value == 0:
+        return False, 0, pd.DataFrame(columns=deviation_columns)
+
+    targeted = df_result[df_result['TargetRatio'] != 0]
+    current = targeted['Market Value (KRW)'].to_numpy(dtype=float) / total_value * 100
+    target = targeted['TargetRatio'].to_numpy(dtype=float)
+    deviations = pd.DataFrame({
+        'current': current,
+        'target': target,
+        'deviation': np.abs(current - target)
+    }, index=pd.Index(targeted['Ticker'].to_numpy(), name='종목'))
+
+    max_deviation = float(deviations['deviation'].max()) if not deviations.empty else 0
+    return max_deviation <= threshold, max_deviation, deviations
+
+
+def calculate_dividend_maximized_top3(df_result, additional_budget, rates=None):
+    """
+    배당 극대화 전략으로 상위 3종목에 투자금 배분
+
+    Args:
+        df_result: 포트폴리오 데이터프레임
+        additional_budget: 추가 투자 가능 금액
+        rates: 평가에 사용한 환율 RateSnapshot (없으면 FX Rate 컬럼 사용)
+
+    Returns:
+        tuple: (top3 투자 DataFrame, total_expected_annual_dividend, total_expected_monthly_dividend)
+    """
+    empty = pd.DataFrame(columns=TOP3_COLUMNS)
+    if additional_budget <= 0 or df_result.empty:
+        return empty, 0, 0
+
+    # 배당률이 있는 종목 중 상위 3종목
+    dividend_stocks = df_result[df_result['Dividend Yield (%)'] > 0]
+    top_stocks = dividend_stocks.nlargest(3, 'Dividend Yield (%)', keep='first')
+    if top_stocks.empty:
+        return empty, 0, 0
+
+    dividend_yield = top_stocks['Dividend Yield (%)'].to_numpy(dtype=float)
+    total_yield = dividend_yield.sum()
+    if total_yield == 0:
+        return empty, 0, 0
+
+    # 배당률 비율로 투자 금액 배분
+    weight = dividend_yield / total_yield
+    investment_amount = additional_budget * weight
+    current_price = top_stocks['Current Price'].to_numpy(dtype=float)
+    buy_quantity = _safe_divide(investment_amount, current_price * position_rates(top_stocks, rates))
+    expected_annual_dividend = investment_amount * (dividend_yield / 100)
+
+    investment_df = pd.DataFrame({
+        '종목': top_stocks['Ticker'].to_numpy(),
+        '배당률': dividend_yield,
+        '가중치': weight * 100,
+        '투자 금액': investment_amount,
+        '매수 수량': buy_quantity,
+        '현재가': current_price,
+        '통화': top_stocks['Currency'].to_numpy(),
+        '예상 연 배당금': expected_annual_dividend,
+        '예상 월 배당금': expected_annual_dividend / 12
+    })
+    total_expected_annual_div = float(expected_annual_dividend.sum())
+    return investment_df, total_expected_annual_div, total_expected_annual_div / 12
+
+
+def _water_fill(deficit, budget):
+    """
+    Σb = budget, b >= 0 조건에서 Σ(deficit - b)² 를 최소화하는 연속 해.
+    b_i = max(0, deficit_i - λ) 이며 λ 는 예산을 정확히 소진하도록 정합니다.
+    (부족분 합계가 예산보다 작으면 부족분만큼만 매수)
+    """
+    positive = np.maximum(deficit, 0.0)
+    if positive.sum() <= budget:
+        return positive
+    sorted_deficit = np.sort(positive)[::-1]
+    cumulative = np.cumsum(sorted_deficit)
+    # k 개 종목이 매수 대상일 때의 λ 후보
+    k = np.arange(1, len(sorted_deficit) + 1)
+    lambdas = (cumulative - budget) / k
+    valid = sorted_deficit > lambdas
+    lam = lambdas[np.nonzero(valid)[0][-1]]
+    return np.maximum(deficit - lam, 0.0)
+
+
+def optimize_integer_allocation(df_result, budget, total_value=None, lot_size=1.0, rates=None):
+    """
+    추가 매수 예산을 정수 주(또는 증권사 최소 단위) 단위로 배분합니다.
+    매수 후 평가액이 목표 비중과 벌어진 정도(편차 제곱합)가 최소가 되도록 하고,
+    같은 효과라면 배당률이 높은 종목을 우선합니다.
+
+    1) 연속 해(LP 완화): 예산 제약 하의 최적 매수 금액을 water-filling 으로 계산
+    2) 단위 내림: 각 종목 매수 금액을 최소 단위 가격으로 내림
+    3) 탐욕적 보정: 남은 현금으로, 편차를 가장 많이 줄이는 종목을 한 단위씩 추가 매수
+    4) 교환 보정: 한 단위씩 맞바꾸거나(또는 남은 현금으로 추가 매수하여) 편차가 줄어드는 경우 반영
+
+    Args:
+        df_result: 포트폴리오 데이터프레임
+        budget: 추가 투자 가능 금액 (원)
+        total_value: 현재 총 자산 (기본값: 평가액 합계)
+        lot_size: 최소 매수 단위 (1 = 정수 주, 0.001 등 소수점 거래 단위 가능)
+        rates: 평가에 사용한 환율 RateSnapshot (없으면 FX Rate 컬럼 사용)
+
+    Returns:
+        tuple: (매수 계획 DataFrame, 총 매수 금액, 남는 현금)
+    """
+    empty = pd.DataFrame(columns=INTEGER_PLAN_COLUMNS)
+    if budget <= 0 or df_result.empty:
+        return empty, 0, budget
+
+    if total_value is None:
+        total_value = df_result['Market Value (KRW)'].sum()
+
+    lot_price = df_result['Current Price'].to_numpy(dtype=float) * position_rates(df_result, rates) * lot_size
+    target_ratio = df_result['TargetRatio'].to_numpy(dtype=float)
+    eligible = (target_ratio > 0) & (lot_price > 0)
+    if not eligible.any():
+        return empty, 0, budget
+
+    current_val = df_result['Market Value (KRW)'].to_numpy(dtype=float)
+    target_val = (total_value + budget) * (target_ratio / 100)
+    deficit = np.where(eligible, target_val - current_val, 0.0)
+    dividend_yield = df_result['Dividend Yield (%)'].to_numpy(dtype=float)
+
+    # 1) 연속 해 → 2) 최소 단위로 내림
+    continuous = np.where(eligible, _water_fill(deficit, budget), 0.0)
+    safe_lot_price = np.where(eligible, lot_price, 1.0)
+    lots = np.where(eligible, np.floor(continuous / safe_lot_price + 1e-9), 0.0)
+    remaining = budget - (lots * lot_price).sum()
+
+    # 3) 남은 현금 탐욕적 배분: 한 단위 매수 시 편차 제곱합 감소량 = 2 r c - c²
+    residual = deficit - lots * lot_price
+    heap = []
+    for i in np.nonzero(eligible)[0]:
+        gain = 2 * residual[i] * lot_price[i] - lot_price[i] ** 2
+        if gain > 0:
+            heap.append((-gain, -dividend_yield[i], i))
+    heapq.heapify(heap)
+    while heap:
+        neg_gain, neg_yield, i = heapq.heappop(heap)
+        if lot_price[i] > remaining:
+            # 남은 현금은 줄어들기만 하므로 다시 살 수 없음
+            continue
+        lots[i] += 1
+        remaining -= lot_price[i]
+        residual[i] -= lot_price[i]
+        gain = 2 * residual[i] * lot_price[i] - lot_price[i] ** 2
+        if gain > 0:
+            heapq.heappush(heap, (-gain, neg_yield, i))
+
+    # 4) 교환 보정: 한 종목의 한 단위를 다른 종목 한 단위로 바꿔 편차가 줄어들면 교환
+    #    (후보는 효과가 큰 상위 종목으로 제한하여 종목 수가 많아도 빠르게 끝나도록 함)
+    for _ in range(SWAP_ITERATIONS):
+        add_delta = np.where(eligible, lot_price ** 2 - 2 * residual * lot_price, np.inf)
+        remove_delta = np.where(lots > 0, lot_price ** 2 + 2 * residual * lot_price, np.inf)
+        add_idx = np.argsort(add_delta)[:SWAP_CANDIDATES]
+        remove_idx = np.argsort(remove_delta)[:SWAP_CANDIDATES]
+        remove_idx = remove_idx[np.isfinite(remove_delta[remove_idx])]
+        # 마지막 행(-1)은 교환 없이 추가 매수만 하는 경우
+        remove_idx = np.append(remove_idx, -1)
+        freed = np.where(remove_idx >= 0, lot_price[remove_idx], 0.0)
+        total_delta = np.where(remove_idx >= 0, remove_delta[remove_idx], 0.0)[:, None] + add_delta[add_idx][None, :]
+        affordable = lot_price[add_idx][None, :] <= remaining + freed[:, None]
+        total_delta = np.where(affordable & (remove_idx[:, None] != add_idx[None, :]), total_delta, np.inf)
+        j, i = np.unravel_index(np.argmin(total_delta), total_delta.shape)
+        if not total_delta[j, i] < -1e-9:
+            break
+        j, i = remove_idx[j], add_idx[i]
+        if j >= 0:
+            lots[j] -= 1
+            remaining += lot_price[j]
+            residual[j] += lot_price[j]
+        lots[i] += 1
+        remaining -= lot_price[i]
+        residual[i] -= lot_price[i]
+
+    buy_amount = lots * lot_price
+    new_total = total_value + buy_amount.sum()
+    selected = lots > 0
+    plan_df = pd.DataFrame({
+        '종목': df_result['Ticker'].to_numpy()[selected],
+        '현재가': df_result['Current Price'].to_numpy(dtype=float)[selected],
+        '통화': df_result['Currency'].to_numpy()[selected],
+        '매수 수량': (lots * lot_size)[selected],
+        '매수 금액': buy_amount[selected],
+        '현재 비중': (current_val / total_value * 100 if total_value > 0 else np.zeros_like(current_val))[selected],
+        '매수 후 비중': ((current_val + buy_amount) / new_total * 100)[selected],
+        '목표 비중': target_ratio[selected],
+        '예상 연 배당금': (buy_amount * dividend_yield / 100)[selected]
+    })
+    return plan_df, float(buy_amount.sum()), float(remaining)
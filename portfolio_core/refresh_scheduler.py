@@ -0,0 +1,171 @@
+import time
+import threading
+from datetime import datetime, time as dtime
+from zoneinfo import ZoneInfo
+from . import instrumentation
+
+# 거래소별 (시간대, 개장, 폐장) - 공휴일은 고려하지 않음
+EXCHANGE_HOURS = {
+    'KRX': ('Asia/Seoul', dtime(9, 0), dtime(15, 30)),
+    'US': ('America/New_York', dtime(9, 30), dtime(16, 0)),
+    'TSE': ('Asia/Tokyo', dtime(9, 0), dtime(15, 30)),
+    'HKEX': ('Asia/Hong_Kong', dtime(9, 30), dtime(16, 0)),
+    'LSE': ('Europe/London', dtime(8, 0), dtime(16, 30)),
+    'TSX': ('America/Toronto', dtime(9, 30), dtime(16, 0)),
+    'EURONEXT': ('Europe/Paris', dtime(9, 0), dtime(17, 30)),
+    'XETRA': ('Europe/Berlin', dtime(9, 0), dtime(17, 30)),
+}
+
+# 티커 접미사별 거래소 (접미사가 없으면 미국)
+SUFFIX_EXCHANGES = {
+    '.KS': 'KRX', '.KQ': 'KRX', '.T': 'TSE', '.HK': 'HKEX', '.L': 'LSE',
+    '.TO': 'TSX', '.PA': 'EURONEXT', '.DE': 'XETRA',
+}
+
+# 갱신 주기(초)
+OPEN_PRICE_INTERVAL = 60           # 장중 현재가
+CLOSED_PRICE_INTERVAL = 30 * 60    # 장 마감 후 현재가
+FX_INTERVAL = 5 * 60               # 환율 (주중 24시간 거래)
+DIVIDEND_INTERVAL = 60 * 60        # 배당 이력 (저장소가 종목별 확인 주기를 따로 관리)
+
+# 대기 중에도 새 종목 등록/중지 요청을 확인하는 최대 간격(초)
+MAX_SLEEP = 30
+
+# 이 시간(초) 동안 다시 등록되지 않은 포트폴리오(세션이 끝난 경우 등)의 종목은 갱신하지 않음
+WATCH_TTL = 60 * 60
+
+
+def exchange_for(ticker):
+    for suffix, exchange in SUFFIX_EXCHANGES.items():
+        if ticker.endswith(suffix):
+            return exchange
+    return 'US'
+
+
+def is_market_open(exchange, now=None):
+    """거래소 정규장 시간 여부 (주말 제외, 공휴일은 고려하지 않음)"""
+    tz, open_at, close_at = EXCHANGE_HOURS[exchange]
+    local = (now or datetime.now(ZoneInfo('UTC'))).astimezone(ZoneInfo(tz))
+    return local.weekday() < 5 and open_at <= local.time() < close_at
+
+
+class RefreshScheduler:
+    """
+    현재가/환율/배당 이력을 Streamlit 실행과 별개로 미리 갱신하는 데몬 스레드.
+    화면은 갱신된 공유 캐시만 읽으므로 TTL 만료 직후의 사용자도 네트워크를 기다리지 않습니다.
+    현재가는 보유 종목의 거래소 중 하나라도 열려 있으면 1분, 모두 닫혀 있으면 30분마다 갱신합니다.
+    갱신 대상은 등록자(포트폴리오)별 종목 목록의 합이며, watch_ttl 동안 다시 등록되지 않은 목록은 빠집니다.
+
+    Args:
+        refresh_prices: refresh_prices(tickers) 현재가 갱신
+        refresh_fx: refresh_fx(tickers) 환율 갱신
+        refresh_dividends: refresh_dividends(tickers) 배당 이력 갱신
+        watch_ttl: 등록 유지 시간(초)
+    """
+
+    def __init__(self, refresh_prices, refresh_fx, refresh_dividends, watch_ttl=WATCH_TTL):
+        self.jobs = {
+            'prices': refresh_prices,
+            'fx': refresh_fx,
+            'dividends': refresh_dividends,
+        }
+        self.watch_ttl = watch_ttl
+        self.as_of = {}          # {작업: 마지막 성공 시각(epoch 초)}
+        self._owners = {}        # {등록자: (종목 set, 마지막 등록 시각)}
+        self._pending = set()    # 새로 등록되어 다음 실행에서 바로 갱신할 종목
+        self._last_run = {}      # {작업: 마지막 실행 시각}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def watch(self, tickers, owner=None, now=None):
+        """
+        owner(포트폴리오 등)의 갱신 대상 종목을 등록합니다. 같은 owner 의 이전 목록은 교체됩니다.
+        처음 보는 종목이 있으면 그 종목만 바로 갱신하도록 깨웁니다. (다른 종목의 갱신 주기는 그대로)
+        """
+        now = time.time() if now is None else now
+        tickers = set(tickers)
+        with self._lock:
+            new = tickers - self._watched(now)
+            self._owners[owner] = (tickers, now)
+            self._pending |= new
+        if new:
+            self._wake.set()
+
+    def _watched(self, now):
+        """최근 등록된 종목 (watch_ttl 이 지난 등록은 삭제). 잠금 안에서 호출합니다."""
+        expired = [owner for owner, (_, seen) in self._owners.items() if now - seen > self.watch_ttl]
+        for owner in expired:
+            del self._owners[owner]
+        return set().union(*(tickers for tickers, _ in self._owners.values()))
+
+    @property
+    def watched(self):
+        with self._lock:
+            return self._watched(time.time())
+
+    def interval(self, job, now=None, tickers=None):
+        if job == 'prices':
+            exchanges = {exchange_for(t) for t in (self.watched if tickers is None else tickers)}
+            if any(is_market_open(e, now) for e in exchanges):
+                return OPEN_PRICE_INTERVAL
+            return CLOSED_PRICE_INTERVAL
+        return FX_INTERVAL if job == 'fx' else DIVIDEND_INTERVAL
+
+    def run_once(self, now=None):
+        """주기가 된 작업을 실행하고, 다음 작업까지 남은 시간(초)을 반환합니다."""
+        now = time.time() if now is None else now
+        with self._lock:
+            tickers = sorted(self._watched(now))
+            pending = sorted(self._pending.intersection(tickers))
+            self._pending.clear()
+        if not tickers:
+            return MAX_SLEEP
+
+        wait = MAX_SLEEP
+        for job, refresh in self.jobs.items():
+            interval = self.interval(job, tickers=tickers)
+            remaining = self._last_run.get(job, 0) + interval - now
+            if remaining > 0:
+                # 주기가 되지 않은 작업은 새로 등록된 종목만 갱신 (전체 종목의 갱신 주기는 그대로)
+                if pending:
+                    self._run(job, refresh, pending)
+                wait = min(wait, remaining)
+                continue
+            self._last_run[job] = now
+            if self._run(job, refresh, tickers):
+                self.as_of[job] = time.time()
+            wait = min(wait, interval)
+        return wait
+
+    def _run(self, job, refresh, tickers):
+        try:
+            with instrumentation.span(f'background.{job}', tickers=len(tickers)):
+                refresh(tickers)
+            return True
+        except Exception as e:
+            print(f"Background refresh error ({job}): {e}")
+            return False
+
+    def _loop(self):
+        while not self._stop.is_set():
+            wait = self.run_once()
+            self._wake.wait(timeout=max(1.0, wait))
+            self._wake.clear()
+
+    def start(self):
+        if self.is_running():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="market-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
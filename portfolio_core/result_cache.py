@@ -0,0 +1,85 @@
+import time
+import pickle
+import hashlib
+import threading
+import functools
+import pandas as pd
+
+# 함수별 최대 보관 결과 수 (넘으면 가장 오래된 결과부터 버림)
+MAX_ENTRIES = 64
+
+
+def _digest(value):
+    """인자를 비교 가능한 키로 바꿉니다. DataFrame/Series 는 내용 해시를 사용합니다."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        try:
+            hashed = pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes()
+        except TypeError:
+            # 셀에 리스트/딕셔너리 등 해시할 수 없는 값이 있으면 직렬화한 내용으로 비교
+            hashed = pickle.dumps(value)
+        columns = tuple(value.columns) if isinstance(value, pd.DataFrame) else value.name
+        return (type(value).__name__, columns, hashlib.sha1(hashed).hexdigest())
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return hashlib.sha1(pickle.dumps(value)).hexdigest()
+
+
+class ResultCache:
+    """
+    계산 결과를 인자별로 ttl 초 동안 보관하는 스레드 안전 메모. (Streamlit 없이 쓰는 st.cache_data 대용)
+    같은 인자로 동시에 호출되면 한 번만 계산하고 나머지는 그 결과를 기다립니다.
+    """
+
+    def __init__(self, ttl, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute):
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and time.time() - entry[0] < self.ttl:
+                    return entry[1]
+                event = self._in_flight.get(key)
+                if event is None:
+                    event = self._in_flight[key] = threading.Event()
+                    break
+            event.wait()
+
+        try:
+            value = compute()
+            with self._lock:
+                self._entries.pop(key, None)
+                self._entries[key] = (time.time(), value)
+                while len(self._entries) > self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            return value
+        finally:
+            with self._lock:
+                self._in_flight.pop(key).set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def memoize(ttl, max_entries=MAX_ENTRIES):
+    """
+    함수 결과를 인자 기준으로 ttl 초 동안 재사용하는 데코레이터.
+    wrapper.cache.clear() 로 비울 수 있습니다. 예외는 보관하지 않습니다.
+    """
+    def decorator(func):
+        cache = ResultCache(ttl, max_entries)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (tuple(_digest(a) for a in args), tuple(sorted((k, _digest(v)) for k, v in kwargs.items())))
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+        wrapper.cache = cache
+        return wrapper
+    return decorator
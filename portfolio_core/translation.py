@@ -0,0 +1,166 @@
+import os
+import queue
+import sqlite3
+import hashlib
+import threading
+from .market_cache import CACHE_DIR
+from . import instrumentation
+
+
+class GoogleTranslatorBackend:
+    """
+    deep_translator 의 GoogleTranslator 를 사용하는 번역 백엔드.
+    deep_translator 는 첫 번역 때 불러오고, 번역기는 대상 언어별로 한 번만 만들어 재사용합니다.
+    (번역은 translation-worker 스레드 하나에서만 호출됨)
+    """
+
+    def __init__(self):
+        self._translators = {}
+
+    def translate(self, text, target):
+        translator = self._translators.get(target)
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = self._translators[target] = GoogleTranslator(source='auto', target=target)
+        return translator.translate(text)
+
+
+class StubTranslatorBackend:
+    """네트워크 없이 동작하는 테스트/벤치마크용 번역 백엔드"""
+
+    def __init__(self, prefix='[ko] '):
+        self.prefix = prefix
+        self.calls = 0
+
+    def translate(self, text, target):
+        self.calls += 1
+        return f"{self.prefix}{text}"
+
+
+class Translator:
+    """
+    내용 해시 기반 영구 번역 캐시 + 백그라운드 번역 큐.
+    get() 은 절대 번역을 기다리지 않습니다. 캐시에 있으면 번역문을,
+    없으면 원문을 즉시 반환하고 번역 작업을 큐에 넣습니다.
+    """
+
+    def __init__(self, backend=None, cache_dir=None, target='ko'):
+        self.backend = backend or GoogleTranslatorBackend()
+        self.target = target
+        cache_dir = cache_dir or CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'translations.sqlite3')
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                " key TEXT PRIMARY KEY,"
+                " translated TEXT NOT NULL)"
+            )
+        self._memory = {}
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=10)
+
+    def _key(self, text):
+        return hashlib.sha256(f"{self.target}\n{text}".encode('utf-8')).hexdigest()
+
+    def lookup(self, text):
+        """캐시된 번역문을 반환합니다. 없으면 None"""
+        key = self._key(text)
+        if key in self._memory:
+            return self._memory[key]
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT translated FROM translations WHERE key = ?", (key,)).fetchone()
+        except Exception as e:
+            print(f"Translation cache read error: {e}")
+            return None
+        if row is not None:
+            self._memory[key] = row[0]
+            return row[0]
+        return None
+
+    def _store(self, text, translated):
+        key = self._key(text)
+        self._memory[key] = translated
+        try:
+            with self._connect() as conn:
+                conn.execute("INSERT OR REPLACE INTO translations (key, translated) VALUES (?, ?)", (key, translated))
+        except Exception as e:
+            print(f"Translation cache write error: {e}")
+
+    def translate_now(self, text):
+        """번역을 동기적으로 수행하고 캐시에 저장합니다. 실패 시 원문을 반환합니다."""
+        cached = self.lookup(text)
+        if cached is not None:
+            return cached
+        try:
+            instrumentation.count('network.translate')
+            with instrumentation.span('translation.translate'):
+                translated = self.backend.translate(text, self.target)
+        except Exception as e:
+            print(f"Translation failed: {e}")
+            return text # 번역 실패 시 원문 사용 (캐시하지 않고 다음에 재시도)
+        self._store(text, translated)
+        return translated
+
+    def get(self, text):
+        """캐시된 번역문 또는 원문을 즉시 반환합니다. 번역이 없으면 백그라운드 번역을 예약합니다."""
+        if not text:
+            return text
+        cached = self.lookup(text)
+        if cached is not None:
+            instrumentation.count('cache.translation.hit')
+            return cached
+        instrumentation.count('cache.translation.miss')
+        self.enqueue(text)
+        return text
+
+    def enqueue(self, text):
+        """번역 작업을 백그라운드 큐에 추가합니다. (중복 요청은 무시)"""
+        key = self._key(text)
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='translation-worker', daemon=True)
+                self._worker.start()
+        self._queue.put(text)
+
+    def _run(self):
+        while True:
+            text = self._queue.get()
+            try:
+                self.translate_now(text)
+            finally:
+                with self._lock:
+                    self._queued.discard(self._key(text))
+                self._queue.task_done()
+
+    def wait(self):
+        """대기 중인 번역 작업이 모두 끝날 때까지 기다립니다. (테스트/벤치마크용)"""
+        self._queue.join()
+
+
+_translator = None
+_translator_lock = threading.Lock()
+
+def get_translator():
+    """앱 전체에서 공유하는 Translator 인스턴스"""
+    global _translator
+    with _translator_lock:
+        if _translator is None:
+            _translator = Translator()
+        return _translator
+
+def set_translator(translator):
+    """공유 Translator 를 교체합니다. (스텁 백엔드 사용 시)"""
+    global _translator
+    with _translator_lock:
+        _translator = translator
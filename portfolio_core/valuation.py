@@ -0,0 +1,152 @@
+import pandas as pd
+from . import dividend_projection
+from . import fx_rates
+
+
+def project_history(dividend_history, now=None):
+    """
+    배당 이력으로 종목별 최근 1년 배당 합계와 향후 12개월 배당 일정을 추정합니다.
+    여러 포트폴리오를 평가할 때 한 번만 계산하여 compute_positions(projection=...) 에 넘길 수 있습니다.
+
+    Returns:
+        tuple: (최근 1년 주당 배당 합계 Series (index=Ticker), 추정 배당 일정 DataFrame)
+    """
+    return (dividend_projection.trailing_annual_dividend(dividend_history, now),
+            dividend_projection.project_dividends(dividend_history, now=now))
+
+
+def compute_positions(portfolio_df, market_data, rate_table, on_error=None, now=None, dividend_history=None,
+                      cost_basis=None, projection=None):
+    """
+    캐시된 종목별 시장 데이터와 보유 수량으로 평가액/배당금을 계산합니다.
+    네트워크 호출 없이 순수 계산만 수행하므로 수량/목표 비중 변경 시 바로 재계산할 수 있습니다.
+
+    Args:
+        portfolio_df: Ticker, Quantity, TargetRatio 컬럼을 가진 포트폴리오
+        market_data: {ticker: {'price', 'dividends', 'error'}} (info 가 있으면 배당 정보에 활용)
+        rate_table: 통화별 원화 환산율을 주는 환율표 (fx_rates.RateTable 등, snapshot(currencies) 사용)
+        on_error: 종목 처리 실패 시 호출되는 콜백 (ticker, exception)
+        now: 배당 일정 추정 기준 시각 (기본값: 현재)
+        dividend_history: 배당 이력 저장소의 Ticker, Date, Amount DataFrame
+                          (없으면 market_data 의 종목별 dividends 를 사용)
+        cost_basis: 거래 원장의 종목별 누적값 DataFrame (Ticker, Avg Cost, ... 현지 통화)
+                    원장에 없는 종목의 원가 컬럼은 NaN 입니다.
+        projection: project_history 로 미리 계산한 배당 추정 (있으면 dividend_history 대신 사용)
+
+    Returns:
+        tuple: (결과 DataFrame, 총 평가액, 연 배당금 합계, 월별 배당 일정 MonthlyDividends,
+                평가에 사용한 환율 RateSnapshot)
+               결과 DataFrame 의 FX Rate 컬럼은 종목별 원화 환산율입니다.
+               평가 손익은 현재 환율로 환산합니다. (매수 시점 환율은 반영하지 않음)
+    """
+    positions = []
+    dividends_by_ticker = {}
+
+    for _, row in portfolio_df.iterrows():
+        ticker_symbol = row['Ticker']
+        qty = row['Quantity']
+        target_ratio = float(row.get('TargetRatio', 0.0))
+        if pd.isna(target_ratio): target_ratio = 0.0
+
+        try:
+            data = market_data.get(ticker_symbol)
+            if data is None:
+                raise KeyError(f"{ticker_symbol} 시장 데이터가 없습니다")
+            if data.get('error') is not None:
+                raise data['error']
+            info = data.get('info') or {}
+            price = data.get('price') or {}
+
+            # 현재가 (1분 단위로 갱신되는 price 우선, 없으면 info 사용)
+            current_price = price.get('price') or info.get('currentPrice') or info.get('regularMarketPrice') or 0
+
+            # 통화 확인
+            currency = price.get('currency') or info.get('currency', 'USD')
+
+            if data.get('dividends') is not None:
+                dividends_by_ticker[ticker_symbol] = data['dividends']
+
+            positions.append({
+                'Ticker': ticker_symbol,
+                'Quantity': qty,
+                'TargetRatio': target_ratio,
+                'Current Price': current_price,
+                'Currency': currency,
+                # 배당 정보 (info 가 있는 경우에만 값이 있음)
+                'Dividend Rate': float(info.get('dividendRate') or 0),
+                'Dividend Yield': float(info.get('dividendYield') or 0)
+            })
+        except Exception as e:
+            if on_error:
+                on_error(ticker_symbol, e)
+
+    if not positions:
+        return pd.DataFrame(), 0, 0, dividend_projection.MonthlyDividends(now=now), fx_rates.RateSnapshot()
+
+    df = pd.DataFrame(positions)
+
+    # 적용 환율: 포트폴리오의 통화들을 한 번에 조회하여 일괄 환산
+    snapshot = rate_table.snapshot(df['Currency'].unique().tolist())
+    df['FX Rate'] = snapshot.column(df['Currency'])
+    missing_fx = df['FX Rate'].isna()
+    if missing_fx.any():
+        for ticker_symbol, currency in df.loc[missing_fx, ['Ticker', 'Currency']].itertuples(index=False):
+            if on_error:
+                on_error(ticker_symbol, ValueError(f"{currency} 환율을 가져오지 못했습니다"))
+        df = df[~missing_fx].reset_index(drop=True)
+        if df.empty:
+            return pd.DataFrame(), 0, 0, dividend_projection.MonthlyDividends(now=now), snapshot
+
+    # 평가액
+    df['Market Value (KRW)'] = df['Current Price'] * df['Quantity'] * df['FX Rate']
+
+    # 모든 종목의 배당 내역을 한 번에 처리
+    if projection is None:
+        if dividend_history is None:
+            dividend_history = dividend_projection.build_history_frame(dividends_by_ticker)
+        projection = project_history(dividend_history, now)
+    trailing_by_ticker, projected = projection
+
+    # info 에 배당 정보가 없는 종목은 최근 1년 배당 합계로 보정
+    trailing = df['Ticker'].map(trailing_by_ticker).fillna(0)
+    missing_rate = (df['Dividend Rate'] == 0) & (trailing > 0)
+    df.loc[missing_rate, 'Dividend Rate'] = trailing[missing_rate]
+    df.loc[missing_rate, 'Dividend Yield'] = (trailing / df['Current Price'].where(df['Current Price'] > 0))[missing_rate].fillna(0)
+
+    # 월별 배당 일정 (과거 패턴 기반 추정)
+    events = df[['Ticker', 'Quantity', 'FX Rate']].reset_index().merge(projected, on='Ticker')
+    events['Dividend'] = events['Amount'] * events['Quantity'] * events['FX Rate']
+    events = events.sort_values(['index', 'Date'], kind='stable')
+    projected_annual = events.groupby('index')['Dividend'].sum().reindex(df.index, fill_value=0)
+
+    # 연 배당금 결정: 추정 일정이 있으면 그 합계, 없으면 연 배당률 기준
+    df['Annual Dividend (KRW)'] = projected_annual.where(
+        projected_annual > 0, df['Dividend Rate'] * df['Quantity'] * df['FX Rate'])
+    df['Dividend Yield (%)'] = df['Dividend Yield'] * 100
+
+    monthly_dividends = dividend_projection.MonthlyDividends(events, now=now)
+
+    # 취득원가 기준 지표 (거래 원장이 있는 종목만)
+    avg_cost = df['Ticker'].map(cost_basis.set_index('Ticker')['Avg Cost']) if cost_basis is not None \
+        else pd.Series(float('nan'), index=df.index)
+    df['Avg Cost'] = avg_cost.astype(float)
+    df['Unrealized Gain (KRW)'] = (df['Current Price'] - df['Avg Cost']) * df['Quantity'] * df['FX Rate']
+    df['Yield on Cost (%)'] = df['Dividend Rate'] / df['Avg Cost'].where(df['Avg Cost'] > 0) * 100
+
+    df_result = df[['Ticker', 'Quantity', 'TargetRatio', 'Current Price', 'Currency', 'FX Rate',
+                    'Market Value (KRW)', 'Annual Dividend (KRW)', 'Dividend Yield (%)',
+                    'Avg Cost', 'Unrealized Gain (KRW)', 'Yield on Cost (%)']]
+    return df_result, df['Market Value (KRW)'].sum(), df['Annual Dividend (KRW)'].sum(), monthly_dividends, snapshot
+
+
+def detail_row(ticker_symbol, info):
+    """종목 상세 정보(요약, 전문가 의견, 52주 범위 등)를 info 에서 추출합니다."""
+    return {
+        'Ticker': ticker_symbol,
+        'Summary': info.get('longBusinessSummary', 'No description available.'),
+        'Recommendation': (info.get('recommendationKey') or 'N/A').upper(),
+        'Target Price': info.get('targetMeanPrice', 0) or 0,
+        '52WeekHigh': info.get('fiftyTwoWeekHigh', 0) or 0,
+        '52WeekLow': info.get('fiftyTwoWeekLow', 0) or 0,
+        'Beta': info.get('beta', 0) or 0
+    }
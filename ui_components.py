@@ -1,8 +1,7 @@
 import streamlit as st
-import plotly.express as px
-import plotly.graph_objects as go
 import pandas as pd
 from datetime import datetime
+from portfolio_core import instrumentation
 
 def inject_custom_css():
     """앱 전반에 사용되는 CSS 스타일을 주입합니다."""
@@ -66,6 +65,7 @@ def inject_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
+@instrumentation.timed('ui.portfolio_card')
 def render_portfolio_card(total_value, total_div, current_month_total, pay_dates_html, dividend_yield_total):
     """포트폴리오 현황 카드 렌더링"""
     current_month = datetime.now().month
@@ -100,6 +100,7 @@ def render_portfolio_card(total_value, total_div, current_month_total, pay_dates
     </div>
     """, unsafe_allow_html=True)
 
+@instrumentation.timed('ui.exchange_card')
 def render_exchange_card(exchange_data):
     """환율 분석 카드 렌더링"""
     if not exchange_data:
@@ -133,19 +134,48 @@ def render_exchange_card(exchange_data):
     </div>
     """, unsafe_allow_html=True)
 
-def render_monthly_dividend_chart(monthly_div_list):
-    """월별 예상 배당금 차트"""
-    if not monthly_div_list:
+def build_pay_dates_html(month_divs, paid_total, expected_total):
+    """
+    이번 달 배당 일정 HTML 생성
+    
+    Args:
+        month_divs: MonthlyDividends.for_month() 결과 (Date, Ticker, Dividend, Paid, 날짜순)
+        paid_total: 지급완료 합계
+        expected_total: 지급예정 합계
+    """
+    if month_divs.empty:
+        return "<div style='font-size: 0.8em; color: #888;'>배당 없음</div>"
+    
+    rows = []
+    for date, t_symbol, amount, paid in zip(month_divs['Date'], month_divs['Ticker'], month_divs['Dividend'], month_divs['Paid']):
+        if paid:
+            style = "color: #aaa;"
+            icon = "✅"
+        else:
+            style = "color: #fff; font-weight: bold;"
+            icon = "📅"
+        rows.append(f"<div style='font-size: 0.8em; {style}; display: flex; justify-content: space-between;'><span>{icon} {date.strftime('%m/%d')} {t_symbol}</span> <span>₩{amount:,.0f}</span></div>")
+    
+    rows.append(f"""
+    <div style='font-size: 0.8em; margin-top: 5px; padding-top: 5px; border-top: 1px dashed rgba(255,255,255,0.2); display: flex; justify-content: space-between; color: #ddd;'>
+        <span>✅ 지급완료:</span> <span>₩{paid_total:,.0f}</span>
+    </div>
+    <div style='font-size: 0.8em; display: flex; justify-content: space-between; color: #fff; font-weight: bold;'>
+        <span>📅 지급예정:</span> <span>₩{expected_total:,.0f}</span>
+    </div>
+    """)
+    return "".join(rows)
+
+@instrumentation.timed('ui.monthly_dividend_chart')
+def render_monthly_dividend_chart(monthly_divs):
+    """월별 예상 배당금 차트 (MonthlyDividends 의 미리 계산된 월별·종목별 합계 사용)"""
+    if not monthly_divs:
         st.info("배당 정보가 없습니다.")
         return
 
-    monthly_df = pd.DataFrame(monthly_div_list)
-    monthly_df = monthly_df.groupby(['Month', 'Ticker'])['Dividend'].sum().reset_index()
-    
-    current_month = datetime.now().month
-    monthly_df['SortKey'] = monthly_df['Month'].apply(lambda x: x if x >= current_month else x + 12)
-    monthly_df = monthly_df.sort_values('SortKey')
-    monthly_df['MonthLabel'] = monthly_df['Month'].apply(lambda x: f"{x}월")
+    import plotly.express as px
+    monthly_df = monthly_divs.by_month_ticker.copy()
+    monthly_df['MonthLabel'] = monthly_df['Month'].astype(str) + "월"
     
     fig_bar = px.bar(monthly_df, x='MonthLabel', y='Dividend', color='Ticker',
                      labels={'Dividend': '배당금 (KRW)', 'MonthLabel': '월'},
@@ -153,14 +183,18 @@ def render_monthly_dividend_chart(monthly_div_list):
     fig_bar.update_layout(xaxis={'categoryorder':'array', 'categoryarray': monthly_df['MonthLabel'].unique()})
     st.plotly_chart(fig_bar, use_container_width=True)
 
+@instrumentation.timed('ui.portfolio_pie_chart')
 def render_portfolio_pie_chart(df_result):
     """포트폴리오 비중 파이 차트"""
     if not df_result.empty:
+        import plotly.express as px
         fig_pie = px.pie(df_result, values='Market Value (KRW)', names='Ticker', hole=0.4)
         st.plotly_chart(fig_pie, use_container_width=True)
 
+@instrumentation.timed('ui.exchange_chart')
 def render_exchange_chart(exchange_data, chart_style):
     """환율 차트 렌더링"""
+    import plotly.graph_objects as go
     hist = exchange_data['history']
     fig = go.Figure()
     
@@ -188,3 +222,59 @@ def render_exchange_chart(exchange_data, chart_style):
         template='plotly_dark'
     )
     st.plotly_chart(fig, use_container_width=True)
+
+@instrumentation.timed('ui.drip_chart')
+def render_drip_chart(projection, scenario):
+    """배당 재투자 유무에 따른 월 배당금 / 평가액 추이 차트"""
+    if projection.empty:
+        st.info("배당 정보가 없습니다.")
+        return
+
+    import plotly.express as px
+    df = projection[projection['Scenario'] == scenario].copy()
+    df['구분'] = df['Reinvest'].map({True: '재투자 (DRIP)', False: '현금 수령'})
+
+    fig_income = px.line(df, x='Date', y='Monthly Income', color='구분',
+                         labels={'Monthly Income': '월 배당금 (KRW)', 'Date': ''})
+    fig_income.update_layout(title="월 배당금", legend_title_text='')
+    st.plotly_chart(fig_income, use_container_width=True)
+
+    fig_value = px.line(df, x='Date', y='Portfolio Value', color='구분',
+                        labels={'Portfolio Value': '평가액 (KRW)', 'Date': ''})
+    fig_value.update_layout(title="평가액", legend_title_text='')
+    st.plotly_chart(fig_value, use_container_width=True)
+
+def render_diagnostics_panel(recorder, run_id, run_ms):
+    """단계별 소요 시간, 네트워크 호출 수, 캐시 적중률, 실행 시간을 보여주는 진단 패널"""
+    with st.expander("🔧 진단 정보", expanded=False):
+        runs = recorder.run_durations()
+        counters = recorder.counter_values()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("이번 실행", f"{run_ms:,.0f} ms" if run_ms is not None else "-")
+        col2.metric("최근 실행 평균", f"{runs['ms'].mean():,.0f} ms" if not runs.empty else "-")
+        col3.metric("네트워크 호출 (누적)", f"{sum(v for k, v in counters.items() if k.startswith('network.')):,}")
+
+        st.markdown("#### ⏱️ 이번 실행 단계별 시간")
+        st.dataframe(recorder.summary(run_id).style.format(precision=1), use_container_width=True, hide_index=True)
+
+        st.markdown("#### 🗂️ 캐시 적중률 (누적)")
+        st.dataframe(recorder.cache_ratios().style.format({'Hit Ratio': '{:.0%}'}, na_rep='-'),
+                     use_container_width=True, hide_index=True)
+
+        st.markdown("#### 🌐 네트워크 호출 / 카운터 (누적)")
+        st.dataframe(pd.DataFrame(sorted(counters.items()), columns=['Counter', 'Count']),
+                     use_container_width=True, hide_index=True)
+
+        st.markdown("#### 📈 종목별 조회 시간 (누적)")
+        st.dataframe(recorder.by_ticker('fetch.ticker').style.format(precision=1), use_container_width=True, hide_index=True)
+
+        st.markdown("#### 📊 전체 단계별 시간 (누적, 백그라운드 포함)")
+        st.dataframe(recorder.summary().style.format(precision=1), use_container_width=True, hide_index=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button("JSONL 내보내기", recorder.to_jsonl(), file_name="diagnostics.jsonl",
+                               mime="application/jsonl")
+        with col2:
+            if st.button("기록 초기화", key="diagnostics_reset"):
+                recorder.reset()
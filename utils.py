@@ -1,281 +1,149 @@
 import pandas as pd
 import os
+from portfolio_core.portfolio_store import PortfolioStore, DEFAULT_USER, DEFAULT_PORTFOLIO, PORTFOLIO_COLUMNS, diff_holdings
+from portfolio_core.ledger import TransactionLedger, LEDGER_POSITION_COLUMNS, TRANSACTION_COLUMNS, KINDS as TRANSACTION_KINDS
 
-# CSV 파일 경로
+from portfolio_core import instrumentation
+from portfolio_core import rebalancing
+
+# 리밸런싱 계산은 rebalancing 모듈에서 열 단위로 수행합니다. (진단 패널에 단계별 시간 기록)
+calculate_rebalancing = instrumentation.timed('rebalancing.calculate_rebalancing')(rebalancing.calculate_rebalancing)
+calculate_buy_only_rebalancing = instrumentation.timed('rebalancing.buy_only')(rebalancing.calculate_buy_only_rebalancing)
+check_rebalancing_proximity = rebalancing.check_rebalancing_proximity
+calculate_dividend_maximized_top3 = instrumentation.timed('rebalancing.dividend_top3')(rebalancing.calculate_dividend_maximized_top3)
+optimize_integer_allocation = instrumentation.timed('rebalancing.integer_allocation')(rebalancing.optimize_integer_allocation)
+
+# 기존 CSV 파일 경로 (기본 포트폴리오가 비어 있으면 처음 한 번 가져옴)
 CSV_FILE = 'portfolio.csv'
 
-def load_portfolio():
-    """포트폴리오 CSV 파일을 로드합니다."""
-    if os.path.exists(CSV_FILE):
-        try:
-            df = pd.read_csv(CSV_FILE)
-            if 'TargetRatio' not in df.columns:
-                df['TargetRatio'] = 0.0
-            # NaN 값을 0.0으로 채우기
-            df['TargetRatio'] = df['TargetRatio'].fillna(0.0)
-            return df
-        except Exception as e:
-            print(f"Error loading portfolio: {e}")
-            return pd.DataFrame(columns=['Ticker', 'Quantity', 'TargetRatio'])
-    return pd.DataFrame(columns=['Ticker', 'Quantity', 'TargetRatio'])
+# 사용자/포트폴리오별 저장소 (SQLite)
+_store = None
+
+def get_store():
+    global _store
+    if _store is None:
+        _store = PortfolioStore()
+    return _store
+
+def set_store(store):
+    """포트폴리오 저장소를 교체합니다."""
+    global _store, _ledger
+    _store = store
+    _ledger = None
 
-def save_portfolio(df):
-    """포트폴리오를 CSV 파일로 저장합니다."""
+# 거래 원장 (포트폴리오 저장소와 같은 DB 사용)
+# 보유 수량을 바꾸는 저장은 원장을 거쳐 수량 조정 거래로 함께 기록합니다. (두 저장소가 어긋나지 않도록)
+_ledger = None
+
+def get_ledger():
+    global _ledger
+    if _ledger is None:
+        _ledger = TransactionLedger(get_store())
+    return _ledger
+
+def _load_csv():
+    """기존 portfolio.csv 를 읽습니다."""
     try:
-        df.to_csv(CSV_FILE, index=False)
-        # 업데이트 타임스탬프 저장
-        from datetime import datetime
-        with open('portfolio_updated.txt', 'w') as f:
-            f.write(datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        df = pd.read_csv(CSV_FILE)
+        if 'TargetRatio' not in df.columns:
+            df['TargetRatio'] = 0.0
+        # NaN 값을 0.0으로 채우기
+        df['TargetRatio'] = df['TargetRatio'].fillna(0.0)
+        return df
     except Exception as e:
-        print(f"Error saving portfolio: {e}")
+        print(f"Error loading portfolio: {e}")
+        return pd.DataFrame(columns=PORTFOLIO_COLUMNS)
 
-def get_last_update():
-    """마지막 업데이트 시간 가져오기"""
+@instrumentation.timed('portfolio.load')
+def load_portfolio(user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """사용자/포트폴리오의 보유 종목을 로드합니다."""
+    store = get_store()
     try:
-        if os.path.exists('portfolio_updated.txt'):
-            with open('portfolio_updated.txt', 'r') as f:
-                return f.read().strip()
-        return "없음"
-    except:
-        return "없음"
+        if (user_id, portfolio_id) == (DEFAULT_USER, DEFAULT_PORTFOLIO) \
+                and not store.exists(user_id, portfolio_id) and os.path.exists(CSV_FILE):
+            store.replace(user_id, portfolio_id, _load_csv())
+        return store.load(user_id, portfolio_id)
+    except Exception as e:
+        print(f"Error loading portfolio: {e}")
+        return pd.DataFrame(columns=PORTFOLIO_COLUMNS)
 
-def format_currency(value, currency='KRW'):
-    """통화 포맷팅 헬퍼 함수"""
-    symbol = '₩' if currency == 'KRW' else '$'
-    return f"{symbol}{value:,.0f}" if currency == 'KRW' else f"{symbol}{value:,.2f}"
+@instrumentation.timed('portfolio.save')
+def save_portfolio(df, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """포트폴리오 전체를 한 번에 저장합니다. (한 종목 수정은 upsert_holding 사용)"""
+    try:
+        get_ledger().replace(user_id, portfolio_id, df)
+    except Exception as e:
+        print(f"Error saving portfolio: {e}")
 
-def calculate_rebalancing(df_result, total_value):
-    """리밸런싱 데이터 계산"""
-    rebalancing_data = []
-    projected_total_monthly_div = 0
-    total_div = df_result['Annual Dividend (KRW)'].sum()
-    
-    for _, row in df_result.iterrows():
-        ticker = row['Ticker']
-        current_val = row['Market Value (KRW)']
-        target_ratio = row['TargetRatio']
-        current_price = row['Current Price']
-        currency = row['Currency']
-        exchange_rate = 1400 if currency == 'USD' else 1 # Approximate for calc
-        # Note: In a real scenario, we should pass the real exchange rate or use the one in row if available
-        # But df_result already has converted values, so we can infer or pass it.
-        # Let's assume we can get a rough estimate or use the implicit rate from Market Value / Quantity / Price
-        
-        if row['Quantity'] > 0 and row['Current Price'] > 0:
-            implied_rate = row['Market Value (KRW)'] / (row['Quantity'] * row['Current Price'])
-        else:
-            implied_rate = 1400 if currency == 'USD' else 1
-            
-        # 목표 금액 계산
-        target_val = total_value * (target_ratio / 100)
-        
-        # 차액 계산
-        diff_val = target_val - current_val
-        
-        # 매수/매도 수량 계산
-        price_krw = current_price * implied_rate
-        if price_krw > 0:
-            action_qty = diff_val / price_krw
-            target_qty = target_val / price_krw
-        else:
-            action_qty = 0
-            target_qty = 0
-        
-        # 예상 배당금 계산
-        if row['Quantity'] > 0:
-            div_per_share_krw = row['Annual Dividend (KRW)'] / row['Quantity']
-        else:
-            div_per_share_krw = 0
-            if row['Current Price'] > 0:
-                 div_per_share_krw = row['Current Price'] * (row['Dividend Yield (%)'] / 100) * implied_rate
+def upsert_holding(ticker, quantity, target_ratio, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """종목 한 줄을 추가하거나 수정합니다."""
+    try:
+        get_ledger().apply_changes(user_id, portfolio_id, [(ticker, quantity, target_ratio)], [])
+    except Exception as e:
+        print(f"Error saving portfolio: {e}")
 
-        projected_div = target_qty * div_per_share_krw
-        projected_total_monthly_div += (projected_div / 12)
+@instrumentation.timed('portfolio.apply_changes')
+def apply_holding_changes(upserts, deletes, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """편집기에서 바뀐 줄만 한 번에 저장합니다. (upserts: [(ticker, 수량, 목표 비중)], deletes: [ticker])"""
+    try:
+        get_ledger().apply_changes(user_id, portfolio_id, upserts, deletes)
+    except Exception as e:
+        print(f"Error saving portfolio: {e}")
 
-        action = "유지"
-        if abs(diff_val) > 10000: # 1만원 이상 차이
-            if diff_val > 0:
-                action = "매수 (Buy)"
-            else:
-                action = "매도 (Sell)"
-        
-        rebalancing_data.append({
-            '종목': ticker,
-            '현재 비중': f"{(current_val / total_value * 100):.1f}%",
-            '목표 비중': f"{target_ratio:.1f}%",
-            '목표 금액': target_val,
-            '현재 금액': current_val,
-            '조정 필요 금액': diff_val,
-            '추천 동작': action,
-            '수량': abs(action_qty)
-        })
-        
-    return rebalancing_data, projected_total_monthly_div
+def delete_holding(ticker, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """종목 한 줄을 삭제합니다."""
+    try:
+        get_ledger().apply_changes(user_id, portfolio_id, [], [ticker])
+    except Exception as e:
+        print(f"Error saving portfolio: {e}")
 
-def calculate_buy_only_rebalancing(df_result, total_value):
-    """매도 없는 리밸런싱 (추가 매수) 계산"""
-    max_implied_total = 0
-    
-    for _, row in df_result.iterrows():
-        if row['TargetRatio'] > 0:
-            implied_total = row['Market Value (KRW)'] / (row['TargetRatio'] / 100)
-            if implied_total > max_implied_total:
-                max_implied_total = implied_total
-    
-    buy_only_data = []
-    total_additional_invest = 0
-    
-    if max_implied_total > total_value:
-        for _, row in df_result.iterrows():
-            ticker = row['Ticker']
-            current_val = row['Market Value (KRW)']
-            target_ratio = row['TargetRatio']
-            current_price = row['Current Price']
-            currency = row['Currency']
-            
-            if row['Quantity'] > 0 and row['Current Price'] > 0:
-                implied_rate = row['Market Value (KRW)'] / (row['Quantity'] * row['Current Price'])
-            else:
-                implied_rate = 1400 if currency == 'USD' else 1
-            
-            new_target_val = max_implied_total * (target_ratio / 100)
-            buy_needed = new_target_val - current_val
-            
-            price_krw = current_price * implied_rate
-            if price_krw > 0:
-                buy_qty = buy_needed / price_krw
-            else:
-                buy_qty = 0
-                
-            if buy_needed > 1000:
-                buy_only_data.append({
-                    '종목': ticker,
-                    '현재 금액': current_val,
-                    '추가 매수 금액': buy_needed,
-                    '최종 금액': new_target_val,
-                    '추가 매수 수량': buy_qty
-                })
-                total_additional_invest += buy_needed
-                
-    return buy_only_data, total_additional_invest
+def update_target_ratios(target_ratios, user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """여러 종목의 목표 비중을 한 번에 수정합니다. ({ticker: 목표 비중})"""
+    try:
+        get_store().update_targets(user_id, portfolio_id, target_ratios)
+    except Exception as e:
+        print(f"Error saving portfolio: {e}")
 
-def check_rebalancing_proximity(df_result, total_value, threshold=5.0):
+@instrumentation.timed('ledger.record')
+def record_transaction(ticker, kind, quantity=0.0, price=0.0, amount=0.0, fee=0.0, trade_date=None,
+                       user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
     """
-    리밸런싱 근접도 체크
-    
-    Args:
-        df_result: 포트폴리오 데이터프레임
-        total_value: 총 자산 가치
-        threshold: 허용 편차 (%, 기본값 5%)
-    
-    Returns:
-        tuple: (is_near_balanced, max_deviation, deviations_dict)
+    거래 한 건을 원장에 기록하고 보유 수량을 갱신합니다.
+    보유 수량보다 많이 매도하는 등 잘못된 거래는 ValueError 를 그대로 발생시킵니다.
     """
-    if total_value == 0:
-        return False, 0, {}
-    
-    deviations = {}
-    max_deviation = 0
-    
-    for _, row in df_result.iterrows():
-        if row['TargetRatio'] == 0:
-            continue
-            
-        ticker = row['Ticker']
-        current_ratio = (row['Market Value (KRW)'] / total_value) * 100
-        target_ratio = row['TargetRatio']
-        deviation = abs(current_ratio - target_ratio)
-        
-        deviations[ticker] = {
-            'current': current_ratio,
-            'target': target_ratio,
-            'deviation': deviation
-        }
-        
-        if deviation > max_deviation:
-            max_deviation = deviation
-    
-    is_near_balanced = max_deviation <= threshold
-    
-    return is_near_balanced, max_deviation, deviations
+    get_ledger().record(user_id, portfolio_id, ticker, kind, quantity, price, amount, fee, trade_date)
 
-def calculate_dividend_maximized_top3(df_result, additional_budget):
-    """
-    배당 극대화 전략으로 상위 3종목에 투자금 배분
-    
-    Args:
-        df_result: 포트폴리오 데이터프레임
-        additional_budget: 추가 투자 가능 금액
-    
-    Returns:
-        tuple: (top3_investment_data, total_expected_annual_dividend, total_expected_monthly_dividend)
-    """
-    if additional_budget <= 0 or df_result.empty:
-        return [], 0, 0
-    
-    # 배당률이 있는 종목만 필터링
-    dividend_stocks = df_result[df_result['Dividend Yield (%)'] > 0].copy()
-    
-    if dividend_stocks.empty:
-        return [], 0, 0
-    
-    # 배당률 기준 내림차순 정렬
-    dividend_stocks = dividend_stocks.sort_values('Dividend Yield (%)', ascending=False)
-    
-    # 상위 3종목 선택 (또는 전체 종목이 3개 미만인 경우)
-    top_stocks = dividend_stocks.head(min(3, len(dividend_stocks)))
-    
-    # 배당률 합계
-    total_yield = top_stocks['Dividend Yield (%)'].sum()
-    
-    if total_yield == 0:
-        return [], 0, 0
-    
-    investment_data = []
-    total_expected_annual_div = 0
-    
-    for _, row in top_stocks.iterrows():
-        ticker = row['Ticker']
-        dividend_yield = row['Dividend Yield (%)']
-        current_price = row['Current Price']
-        currency = row['Currency']
-        
-        # 환율 계산
-        if row['Quantity'] > 0 and row['Current Price'] > 0:
-            implied_rate = row['Market Value (KRW)'] / (row['Quantity'] * row['Current Price'])
-        else:
-            implied_rate = 1400 if currency == 'USD' else 1
-        
-        # 가중치 계산 (배당률 비율)
-        weight = dividend_yield / total_yield
-        
-        # 투자 금액 배분
-        investment_amount = additional_budget * weight
-        
-        # 매수 가능 수량
-        price_krw = current_price * implied_rate
-        if price_krw > 0:
-            buy_quantity = investment_amount / price_krw
-        else:
-            buy_quantity = 0
-        
-        # 예상 연 배당금
-        expected_annual_dividend = investment_amount * (dividend_yield / 100)
-        total_expected_annual_div += expected_annual_dividend
-        
-        investment_data.append({
-            '종목': ticker,
-            '배당률': dividend_yield,
-            '가중치': weight * 100,
-            '투자 금액': investment_amount,
-            '매수 수량': buy_quantity,
-            '현재가': current_price,
-            '통화': currency,
-            '예상 연 배당금': expected_annual_dividend,
-            '예상 월 배당금': expected_annual_dividend / 12
-        })
-    
-    total_expected_monthly_div = total_expected_annual_div / 12
-    
-    return investment_data, total_expected_annual_div, total_expected_monthly_div
+@instrumentation.timed('ledger.positions')
+def get_ledger_positions(user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """종목별 취득원가/실현 손익/배당 수령액 (거래 기록이 없으면 빈 DataFrame)"""
+    try:
+        return get_ledger().positions(user_id, portfolio_id)
+    except Exception as e:
+        print(f"Error loading ledger: {e}")
+        return pd.DataFrame(columns=LEDGER_POSITION_COLUMNS)
+
+def get_transactions(user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO, ticker=None):
+    try:
+        return get_ledger().transactions(user_id, portfolio_id, ticker)
+    except Exception as e:
+        print(f"Error loading ledger: {e}")
+        return pd.DataFrame(columns=TRANSACTION_COLUMNS)
+
+def list_portfolios(user_id=DEFAULT_USER):
+    try:
+        return get_store().list_portfolios(user_id)
+    except Exception as e:
+        print(f"Error loading portfolio list: {e}")
+        return []
+
+def get_last_update(user_id=DEFAULT_USER, portfolio_id=DEFAULT_PORTFOLIO):
+    """마지막 업데이트 시간 가져오기"""
+    try:
+        return get_store().last_update(user_id, portfolio_id) or "없음"
+    except Exception:
+        return "없음"
+
+def format_currency(value, currency='KRW'):
+    """통화 포맷팅 헬퍼 함수"""
+    symbol = '₩' if currency == 'KRW' else '$'
+    return f"{symbol}{value:,.0f}" if currency == 'KRW' else f"{symbol}{value:,.2f}"
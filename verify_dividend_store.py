@@ -0,0 +1,82 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core.dividend_store import DividendStore
+
+# 분할 뒤 yfinance 가 과거 배당 금액을 다시 조정해도 저장된 이력이 한 가지 기준으로 유지되는지 확인합니다.
+DAY = 24 * 60 * 60
+failures = []
+
+
+class SplitProvider:
+    """분기 배당 0.8 을 주다가 split(ticker, ratio) 이후 과거 금액까지 ratio 로 나눠 돌려주는 제공자"""
+
+    def __init__(self, dates):
+        self.dates = pd.DatetimeIndex(dates)
+        self.ratio = {}
+        self.flagged = set()
+        self.batches = []
+
+    def split(self, ticker, ratio, flagged=True):
+        self.ratio[ticker] = ratio
+        if flagged:
+            self.flagged.add(ticker)
+
+    def get_dividends_batch(self, tickers, start=None, period=None):
+        self.batches.append((tuple(tickers), start))
+        result = {}
+        for t in tickers:
+            hist = pd.Series(0.8 / self.ratio.get(t, 1.0), index=self.dates, name='Dividends')
+            result[t] = hist[hist.index >= start] if start is not None else hist
+            if t in self.flagged and start is not None:
+                result[t].attrs['split'] = True
+        return result
+
+
+def check(name, actual, expected):
+    if actual != expected:
+        failures.append(f"{name}: {actual} (expected {expected})")
+        print(f"❌ {name}: {actual} (expected {expected})")
+    else:
+        print(f"✅ {name}: {actual}")
+
+
+def amounts(store, ticker):
+    history = store.history([ticker])
+    return sorted(set(history['Amount'].round(6)))
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    store = DividendStore(tmp, sync_interval=DAY)
+    provider = SplitProvider(['2025-03-10', '2025-06-10', '2025-09-10', '2025-12-10'])
+    tickers = ['SPLT', 'FLAG', 'EDIT', 'SAME']
+    store.sync(tickers, provider, now=0)
+    check("initial rows", len(store.history(tickers)), 16)
+
+    # 분할 정보가 있는 종목과 금액만 다시 조정된 종목은 전체 이력을 다시 받아 교체
+    provider.split('SPLT', 2.0)
+    provider.split('FLAG', 1.0)
+    provider.split('EDIT', 4.0, flagged=False)
+    provider.dates = provider.dates.append(pd.DatetimeIndex(['2026-03-10']))
+    store.sync(tickers, provider, now=DAY)
+    check("SPLT amounts after split", amounts(store, 'SPLT'), [0.4])
+    check("EDIT amounts after re-adjustment", amounts(store, 'EDIT'), [0.2])
+    check("SAME amounts unchanged", amounts(store, 'SAME'), [0.8])
+    check("rows after sync", [len(store.history([t])) for t in tickers], [5, 5, 5, 5])
+    check("re-fetch only re-adjusted tickers", provider.batches[-1], (('SPLT', 'FLAG', 'EDIT'), None))
+
+    # 교체한 뒤에는 다시 받지 않음
+    provider.flagged.clear()
+    batches = len(provider.batches)
+    store.sync(tickers, provider, now=2 * DAY)
+    check("no re-fetch when amounts match", len(provider.batches) - batches, 1)
+
+if failures:
+    print(f"\n❌ {len(failures)} check(s) failed")
+    sys.exit(1)
+print("\n✅ Dividend history stays on one adjustment basis.")
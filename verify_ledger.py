@@ -0,0 +1,72 @@
+import sys
+import os
+import tempfile
+import pandas as pd
+
+# Add the directory to path to import modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from portfolio_core.portfolio_store import PortfolioStore
+from portfolio_core.ledger import TransactionLedger, ADJUST, BUY, SELL, DIVIDEND
+
+# 원장 밖에서 입력한 보유 수량(CSV 가져오기/편집기/종목 추가)과 거래 원장이 어긋나지 않는지 확인합니다.
+USER, PORTFOLIO = 'verify', 'verify'
+failures = []
+
+
+def check(name, actual, expected):
+    if abs(actual - expected) > 1e-9:
+        failures.append(f"{name}: {actual:g} (expected {expected:g})")
+        print(f"❌ {name}: {actual:g} (expected {expected:g})")
+    else:
+        print(f"✅ {name}: {actual:g}")
+
+
+def holdings(store):
+    return store.load(USER, PORTFOLIO).set_index('Ticker')['Quantity']
+
+
+with tempfile.TemporaryDirectory() as tmp:
+    store = PortfolioStore(os.path.join(tmp, 'ledger.sqlite3'))
+    ledger = TransactionLedger(store)
+    ledger.replace(USER, PORTFOLIO, pd.DataFrame({'Ticker': ['JEPI', 'JEPQ'], 'Quantity': [10.0, 20.0],
+                                                  'TargetRatio': [50.0, 50.0]}))
+
+    # 배당만 기록해도 보유 종목이 지워지지 않아야 함
+    ledger.record(USER, PORTFOLIO, 'JEPI', DIVIDEND, amount=5.0, trade_date='2026-01-15')
+    check("JEPI after DIVIDEND", holdings(store).get('JEPI', 0.0), 10.0)
+
+    # 매수는 기존 보유 수량에 더해짐
+    ledger.record(USER, PORTFOLIO, 'JEPQ', BUY, quantity=1.0, price=55.0, trade_date='2026-01-16')
+    check("JEPQ after BUY 1", holdings(store)['JEPQ'], 21.0)
+
+    # 기초 잔고만큼 매도 가능
+    ledger.record(USER, PORTFOLIO, 'JEPQ', SELL, quantity=5.0, price=56.0, trade_date='2026-01-17')
+    check("JEPQ after SELL 5", holdings(store)['JEPQ'], 16.0)
+
+    # 편집기 수정은 수량 조정으로 원장에 기록됨
+    ledger.apply_changes(USER, PORTFOLIO, [('JEPQ', 30.0, 50.0)], [])
+    positions = ledger.positions(USER, PORTFOLIO).set_index('Ticker')
+    check("JEPQ ledger after edit", positions.loc['JEPQ', 'Quantity'], 30.0)
+    ledger.record(USER, PORTFOLIO, 'JEPQ', SELL, quantity=25.0, price=57.0)
+    check("JEPQ after edit + SELL 25", holdings(store)['JEPQ'], 5.0)
+
+    # 목표 비중은 거래 기록 후에도 유지
+    check("JEPI target ratio", store.load(USER, PORTFOLIO).set_index('Ticker').loc['JEPI', 'TargetRatio'], 50.0)
+
+    # 원가를 아는 수량(매수 1주)으로만 평균 단가 계산
+    positions = ledger.positions(USER, PORTFOLIO).set_index('Ticker')
+    check("JEPI avg cost unknown", float(pd.isna(positions.loc['JEPI', 'Avg Cost'])), 1.0)
+    check("JEPQ avg cost", positions.loc['JEPQ', 'Avg Cost'], 55.0)
+
+    # 다시 계산해도 같은 결과 (기초 잔고/조정 거래 포함)
+    kinds = set(ledger.transactions(USER, PORTFOLIO)['Kind'])
+    check("ADJUST entries recorded", float(ADJUST in kinds), 1.0)
+    rebuilt = ledger.rebuild(USER, PORTFOLIO)
+    check("JEPQ after rebuild", rebuilt['JEPQ']['quantity'], 5.0)
+    check("JEPQ holdings after rebuild", holdings(store)['JEPQ'], 5.0)
+
+if failures:
+    print(f"\n❌ {len(failures)} check(s) failed")
+    sys.exit(1)
+print("\n✅ Ledger and holdings stay in sync.")
@@ -23,7 +23,7 @@ test_portfolio = pd.DataFrame({
 })
 
 try:
-    df, val, div, monthly = data_manager.fetch_stock_data_batch(test_portfolio)
+    df, val, div, monthly, rates = data_manager.fetch_stock_data_batch(test_portfolio)
     print(f"✅ Data fetched. Total Value: {val}, Annual Div: {div}")
     print(df[['Ticker', 'Current Price', 'Market Value (KRW)']])
 except Exception as e:
@@ -32,7 +32,7 @@ except Exception as e:
 # Test rebalancing calc
 print("\nTesting rebalancing calculation...")
 try:
-    rebal, proj = utils.calculate_rebalancing(df, val)
+    rebal, proj = utils.calculate_rebalancing(df, val, rates=rates)
     print(f"✅ Rebalancing calculated. Projected Monthly Div: {proj}")
 except Exception as e:
     print(f"❌ Rebalancing calculation failed: {e}")